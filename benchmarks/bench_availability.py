@@ -0,0 +1,136 @@
+"""
+Benchmark the available_from/available_to anti-join on GET /properties.
+
+Builds a throwaway SQLite database with --properties listings (default
+100k) and --bookings bookings (default 1M) spread over two years, then
+for each scenario prints the query plan and the median time to fetch the
+first and a later keyset page. The NOT EXISTS probe should SEARCH
+ix_bookings_property_dates as a covering index, never SCAN bookings.
+
+    python -m benchmarks.bench_availability --properties 100000 --bookings 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import text
+from werkzeug.datastructures import MultiDict
+
+from server.models import db, Property, Booking
+from server.utils.pagination import paginate_keyset
+from server.utils.property_filters import apply_property_filters
+
+STATUSES = ["approved"] * 5 + ["paid"] * 2 + ["active", "pending", "cancelled"]
+
+SCENARIOS = [
+    "available_from=2025-06-01&available_to=2025-06-07",
+    "available_from=2025-06-01&available_to=2025-08-31",
+    "available=true&available_from=2025-06-01&available_to=2025-06-30",
+    "available_from=2025-12-20&available_to=2026-01-05&min_rent=40000&max_rent=60000",
+]
+
+
+def build(properties, bookings, batch=50_000):
+    rng = random.Random(42)
+    created = datetime(2020, 1, 1)
+    conn = db.session.connection()
+    db.session.execute(text("INSERT INTO users (id, name, email, _password_hash, role) VALUES "
+                            "(1, 'Landlord', 'l@example.com', 'x', 'landlord'), "
+                            "(2, 'Tenant', 't@example.com', 'x', 'tenant')"))
+    for offset in range(0, properties, batch):
+        conn.execute(Property.__table__.insert(), [{
+            "id": pid,
+            "title": f"Listing {pid}",
+            "description": "Synthetic benchmark listing",
+            "rent_price": rng.randrange(5_000, 250_000),
+            "location": "Westlands, Nairobi",
+            "landlord_id": 1,
+            "available": rng.random() < 0.8,
+            "created_at": created + timedelta(minutes=pid),
+        } for pid in range(offset + 1, min(offset + batch, properties) + 1)])
+
+    # each property gets back-to-back stays with gaps, so blocking bookings never overlap
+    per_property = max(1, bookings // properties)
+    first_day = date(2025, 1, 1)
+    rows, booking_id = [], 0
+    for pid in range(1, properties + 1):
+        day = first_day + timedelta(days=rng.randrange(0, 30))
+        for _ in range(per_property):
+            length = rng.randrange(3, 60)
+            booking_id += 1
+            rows.append({
+                "id": booking_id, "tenant_id": 2, "property_id": pid, "status": rng.choice(STATUSES),
+                "start_date": day, "end_date": day + timedelta(days=length - 1),
+                "created_at": created, "updated_at": created,
+            })
+            day += timedelta(days=length + rng.randrange(0, 30))
+        if len(rows) >= batch:
+            conn.execute(Booking.__table__.insert(), rows)
+            rows = []
+    if rows:
+        conn.execute(Booking.__table__.insert(), rows)
+    db.session.execute(text("ANALYZE"))
+    db.session.commit()
+    return booking_id
+
+
+def plan(query):
+    compiled = query.statement.compile(db.engine, compile_kwargs={"literal_binds": True})
+    rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return "\n".join(f"    {row[-1]}" for row in rows)
+
+
+def timed_pages(query, pages, repeat):
+    """Median seconds to fetch page 1 and page `pages`, following cursors like a client would."""
+    firsts, lasts = [], []
+    for _ in range(repeat):
+        after = None
+        for page in range(1, pages + 1):
+            t0 = time.perf_counter()
+            rows, after = paginate_keyset(query, Property, limit=50, after=after)
+            elapsed = time.perf_counter() - t0
+            db.session.expunge_all()
+            if page == 1:
+                firsts.append(elapsed)
+            if page == pages or after is None:
+                lasts.append(elapsed)
+                break
+    return statistics.median(firsts), statistics.median(lasts), len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--properties", type=int, default=100_000)
+    parser.add_argument("--bookings", type=int, default=1_000_000)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_availability.db")
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        t0 = time.perf_counter()
+        built = build(args.properties, args.bookings)
+        print(f"built {args.properties:,} properties and {built:,} bookings in {time.perf_counter() - t0:.1f}s ({path})\n")
+
+        for scenario in SCENARIOS:
+            params = MultiDict([pair.split("=") for pair in scenario.split("&")])
+            query = apply_property_filters(Property.query, params)
+            first, last, found = timed_pages(query, args.pages, args.repeat)
+            total = apply_property_filters(db.session.query(Property.id), params).count()
+            print(f"{scenario}\n  {total:,} matching; page 1 median {first * 1000:.1f} ms, "
+                  f"page {args.pages} median {last * 1000:.1f} ms ({found} rows)")
+            print(plan(query.order_by(Property.created_at.desc(), Property.id.desc()).limit(50)), "\n")
+
+
+if __name__ == "__main__":
+    main()
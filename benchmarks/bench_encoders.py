@@ -0,0 +1,97 @@
+"""
+Compare response encoders on Property.to_dict / Booking.to_dict payloads.
+
+Builds --rows transient properties (with landlord, amenities and booking
+ids) and bookings embedding them, serializes the detail tier of each, then
+times the stdlib fallback, orjson and MessagePack through the same
+FastJSONProvider code path the app uses.
+
+    python -m benchmarks.bench_encoders --rows 2000
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from flask import Flask
+
+from server.models import db, User, Property, PropertyAmenity, Booking
+from server.utils import encoding
+
+
+def build_payloads(rows):
+    landlord = User(id=1, name="Bench Landlord", email="landlord@example.com", role="landlord")
+    tenant = User(id=2, name="Bench Tenant", email="tenant@example.com", role="tenant")
+    start = datetime(2024, 1, 1, 8, 30, 15, 123456)
+    properties, bookings = [], []
+    for i in range(rows):
+        prop = Property(
+            id=i + 1, title=f"Listing {i}", description="Two bedroom apartment with a view " * 4,
+            rent_price=Decimal("45000.00") + i, location="Westlands, Nairobi", available=True,
+            created_at=start + timedelta(minutes=i), updated_at=start + timedelta(minutes=i, seconds=5),
+            landlord_id=1, latitude=-1.2676, longitude=36.8108,
+            favorite_count=3, booking_count=1, rating_count=2, rating_avg=4.5,
+        )
+        prop.landlord = landlord
+        prop.amenities = [PropertyAmenity(id=i * 3 + k, amenity_name=name, included=True)
+                          for k, name in enumerate(["wifi", "parking", "security"])]
+        booking = Booking(
+            id=i + 1, tenant_id=2, property_id=prop.id, status="approved",
+            start_date=date(2024, 6, 1), end_date=date(2024, 6, 30),
+            created_at=start, updated_at=start,
+        )
+        booking.tenant = tenant
+        booking.prop = prop
+        properties.append(prop)
+        bookings.append(booking)
+    return [p.to_dict() for p in properties], [b.to_dict() for b in bookings]
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        body = fn()
+        timings.append(time.perf_counter() - t0)
+    return statistics.median(timings), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+    provider = encoding.FastJSONProvider(app)
+    orjson, msgpack = encoding.orjson, encoding.msgpack
+
+    with app.app_context():
+        payloads = build_payloads(args.rows)
+
+    encoders = [("stdlib json", lambda obj: json.dumps(obj, default=encoding._default, separators=(",", ":")).encode())]
+    if orjson is not None:
+        encoders.append(("orjson", lambda obj: orjson.dumps(obj, default=encoding._default)))
+    if msgpack is not None:
+        encoders.append(("msgpack", lambda obj: msgpack.packb(obj, default=encoding._default, use_bin_type=True)))
+
+    for label, payload in zip(["Property.to_dict", "Booking.to_dict"], payloads):
+        print(f"{label} x {args.rows}")
+        baseline = None
+        for name, encode in encoders:
+            seconds, size = timed(lambda: encode(payload), args.repeat)
+            baseline = baseline or seconds
+            print(f"  {name:<12} {seconds * 1000:8.2f} ms  {size / 1024:8.1f} KiB  {baseline / seconds:5.1f}x")
+        print()
+
+    with app.test_request_context():
+        body, mimetype = provider.encode(payloads[0])
+        print(f"FastJSONProvider is using: {'orjson' if orjson else 'stdlib json'} ({mimetype})")
+
+
+if __name__ == "__main__":
+    main()
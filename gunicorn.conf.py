@@ -0,0 +1,26 @@
+"""
+gunicorn settings, read automatically from the working directory.
+
+Each worker gets the lowest WORKER_INDEX no live worker holds, so a worker
+restarted by gunicorn takes over its predecessor's slot and transaction ids
+(server/utils/ids.py) stay unique per process: WORKER_ID_BASE + WORKER_INDEX.
+
+Workers are threaded, so one process serves GUNICORN_THREADS requests at
+once; that is what lets PASSWORD_HASH_MAX_PENDING turn a login burst away
+with 503s (server/utils/passwords.py). Each thread can hold a database
+connection, so keep DB_POOL_SIZE + DB_MAX_OVERFLOW at or above it.
+"""
+import os
+
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+
+
+def pre_fork(server, worker):
+    # runs in the master, which knows every live worker
+    taken = {getattr(w, "worker_index", None) for w in server.WORKERS.values()}
+    worker.worker_index = next(i for i in range(len(taken) + 1) if i not in taken)
+
+
+def post_fork(server, worker):
+    os.environ["WORKER_INDEX"] = str(worker.worker_index)
@@ -1,23 +1,49 @@
 from flask import Flask, jsonify, request
-from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity, create_access_token
+from flask_jwt_extended import JWTManager, jwt_required, create_access_token, current_user
 from flask_migrate import Migrate
 from flask_cors import CORS
 from flask_swagger_ui import get_swaggerui_blueprint
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 import os
-import cloudinary
-import cloudinary.uploader
 import sendgrid
 from sendgrid.helpers.mail import Mail, Email, To, Content
 from server.swagger_spec import get_swagger_spec
+from server.utils.bookings import (
+    BookingConflict, InvalidBookingDates, ensure_available, init_booking_constraints, lock_property, parse_booking_dates,
+)
+from server.utils.cache import ResponseCache, query_string_key
+from server.utils.conditional import Validators, conditional
+from server.utils.db_pool import pool_status
+from server.utils.dashboard import landlord_dashboard
+from server.utils.digests import digest_metrics
 from server.utils.email_service import send_email
+from server.utils.encoding import FastJSONProvider
+from server.utils.outbox import enqueue_email
+from server.utils.passwords import PasswordHasherBusy
+from server.utils.pagination import InvalidCursor, paginate_keyset, paginated_response, parse_limit
+from server.utils.export import InvalidExportFormat, export_response
+from server.utils.ids import SnowflakeGenerator
+from server.utils.identity import identity_cache, identity_claims, session_user
+from server.utils.income import InvalidIncomeRange, income_series, income_total, parse_income_range
+from server.utils.geo import InvalidCoordinates, MAX_RADIUS_KM, candidate_cell_ranges, haversine_km, parse_coordinate
+from server.utils.occupancy import InvalidCalendarRange, expand, month_key, parse_calendar_range
+from server.utils.property_filters import InvalidFilter, apply_property_filters
+from server.utils.uploads import ImageUploadPool, UploadFailed, discard_spool, known_asset, spool, upload_many
+from server.utils.schema import upgrade_schema
+from server.utils.search import init_search_index, index_property, remove_property, search_property_ids
 from server.config import Config
-from server.models import db, User, Property, PropertyImage, PropertyAmenity, Booking, Payment, Review
+from server.models import (
+    db, User, Property, PropertyImage, PropertyAmenity, PropertyOccupancy, Booking, Payment, Review, ImageUpload,
+    InvalidFieldSet,
+)
 
-from sqlalchemy import func
+from sqlalchemy import func, insert, or_
+from sqlalchemy.exc import IntegrityError
 
 app = Flask(__name__)
 app.config.from_object(Config)
+app.json = FastJSONProvider(app)
 
 # Swagger setup
 SWAGGER_URL = '/docs'
@@ -32,7 +58,9 @@ CORS(app,
      origins=["*"],
      supports_credentials=True,
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
-     allow_headers=["Content-Type", "Authorization", "Accept"]
+     allow_headers=["Content-Type", "Authorization", "Accept", "Idempotency-Key"],
+     # list pages carry their next cursor in these; browsers hide unexposed headers from other origins
+     expose_headers=["X-Next-Cursor", "Link"]
 )
 
 # JWT setup
@@ -40,8 +68,171 @@ jwt = JWTManager()
 db.init_app(app)
 with app.app_context():
     db.create_all()
+    upgrade_schema(db.engine, db.metadata)
+    init_search_index(db)
+    init_booking_constraints(db)
 jwt.init_app(app)
 migrate = Migrate(app, db)
+response_cache = ResponseCache.from_config(app.config)
+transaction_ids = SnowflakeGenerator(app.config['WORKER_ID_BASE'])
+
+
+@jwt.user_identity_loader
+def user_identity(user):
+    # PyJWT only accepts string subjects
+    return str(getattr(user, 'id', user))
+
+
+@jwt.additional_claims_loader
+def user_claims(user):
+    return identity_claims(user) if hasattr(user, 'role') else {}
+
+
+def lookup_session_user(user_id):
+    row = db.session.query(User.id, User.name, User.email, User.role).filter_by(id=user_id).first()
+    return session_user(row) if row else None
+
+
+@jwt.user_lookup_loader
+def load_session_user(jwt_header, jwt_data):
+    """current_user for @jwt_required routes: a SessionUser, usually without touching the users table."""
+    return identity_cache.load(jwt_data, lookup_session_user)
+
+
+def property_list_validators():
+    last_modified, count = apply_property_filters(
+        db.session.query(func.max(Property.updated_at), func.count(Property.id)), request.args
+    ).one()
+    return Validators(last_modified, count, last_modified=last_modified)
+
+
+def property_validators(property_id):
+    last_modified = db.session.query(Property.updated_at).filter_by(id=property_id).scalar()
+    if last_modified is None:
+        return None
+    return Validators(property_id, last_modified, last_modified=last_modified)
+
+
+def booking_list_validators(*criteria):
+    booking_max, property_max, count = (
+        db.session.query(func.max(Booking.updated_at), func.max(Property.updated_at), func.count(Booking.id))
+        .join(Booking.prop)
+        .filter(*criteria)
+        .one()
+    )
+    last_modified = max(filter(None, [booking_max, property_max]), default=None)
+    return Validators(booking_max, property_max, count, last_modified=last_modified)
+
+
+def invalidate_property_cache(property_id=None):
+    """Drop cached listings, plus the detail entries of one property when given."""
+    response_cache.invalidate_prefix('properties:')
+    if property_id is not None:
+        response_cache.invalidate_prefix(f'property:{property_id}:')
+
+
+image_uploads = ImageUploadPool.from_config(app, on_ready=lambda property_id: invalidate_property_cache(property_id))
+if app.config['IMAGE_UPLOAD_RECOVER_EVERY'] > 0:
+    image_uploads.start_recovery(app.config['IMAGE_UPLOAD_RECOVER_EVERY'])
+gallery_transfers = ThreadPoolExecutor(max_workers=app.config['IMAGE_GALLERY_CONCURRENCY'], thread_name_prefix="gallery")
+
+
+def queue_image_upload(file, property_id=None):
+    """
+    Spool `file` and add an ImageUpload row for the background pool; returns (upload, sha256).
+
+    upload is None when Cloudinary already has these bytes, and the caller
+    uses known_asset's URL directly. Otherwise the caller commits, then
+    calls image_uploads.submit(upload.id).
+    """
+    path, sha256 = spool(file, app.config['IMAGE_SPOOL_DIR'])
+    if known_asset(db.session, sha256) is not None:
+        discard_spool(path)
+        return None, sha256
+    upload = ImageUpload(property_id=property_id, sha256=sha256, spool_path=path)
+    db.session.add(upload)
+    return upload, sha256
+
+
+def invalidate_landlord_cache(landlord_id):
+    """Drop a landlord's cached income and dashboard responses."""
+    response_cache.invalidate_prefix(f'landlord_income:{landlord_id}:', f'landlord_dashboard:{landlord_id}:')
+
+
+def invalidate_booking_cache(property_id):
+    """A booking write changes its property's listings and its landlord's aggregates."""
+    invalidate_property_cache(property_id)
+    invalidate_landlord_cache(db.session.query(Property.landlord_id).filter_by(id=property_id).scalar())
+
+
+@app.errorhandler(InvalidCursor)
+@app.errorhandler(InvalidFilter)
+@app.errorhandler(InvalidCoordinates)
+@app.errorhandler(InvalidExportFormat)
+@app.errorhandler(InvalidBookingDates)
+@app.errorhandler(InvalidCalendarRange)
+@app.errorhandler(InvalidIncomeRange)
+@app.errorhandler(InvalidFieldSet)
+def bad_query_param(e):
+    return jsonify({"error": str(e)}), 400
+
+
+@app.errorhandler(BookingConflict)
+def booking_conflict(e):
+    db.session.rollback()
+    return jsonify({"error": str(e), "conflicting_booking_id": e.booking.id}), 409
+
+
+@app.errorhandler(PasswordHasherBusy)
+def password_hasher_busy(e):
+    db.session.rollback()
+    return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
+
+
+def parse_coordinates(data):
+    """Read an optional latitude/longitude pair from a request body; both or neither."""
+    if data.get('latitude') in (None, '') and data.get('longitude') in (None, ''):
+        return None
+    return parse_coordinate(data.get('latitude'), 'latitude', 90), parse_coordinate(data.get('longitude'), 'longitude', 180)
+
+
+def request_fieldset(model, default=None):
+    """Resolve ?fields= (a list or "summary"/"detail", else `default`) and ?include= for `model`."""
+    return model.fieldset(request.args.get('fields') or default, request.args.get('include'))
+
+
+def booking_feed(query):
+    """
+    Serialize a bookings query, embedding each property or side-loading them.
+
+    With ?sideload=properties the bookings carry only property_id and the
+    properties come back once each under included.properties (keyed by id),
+    fetched in one batched query; ?property_fields= picks their fields.
+    """
+    fieldset = request_fieldset(Booking)
+    sideload = request.args.get('sideload')
+    if not sideload:
+        bookings = query.options(*Booking.load_options(fieldset)).all()
+        return [b.to_dict(fieldset) for b in bookings]
+    if sideload != 'properties':
+        raise InvalidFieldSet("Invalid sideload. Must be 'properties'")
+
+    fieldset = fieldset._replace(names=tuple(n for n in fieldset.names if n != 'property'))
+    if 'property_id' not in fieldset.names:
+        fieldset = fieldset._replace(names=fieldset.names + ('property_id',))
+    bookings = query.options(*Booking.load_options(fieldset)).all()
+
+    property_fieldset = Property.fieldset(request.args.get('property_fields') or fieldset.tier)
+    property_ids = {b.property_id for b in bookings}
+    properties = (
+        Property.query.options(*Property.load_options(property_fieldset))
+        .filter(Property.id.in_(property_ids)).all()
+        if property_ids else []
+    )
+    return {
+        "bookings": [b.to_dict(fieldset) for b in bookings],
+        "included": {"properties": {str(p.id): p.to_dict(property_fieldset) for p in properties}},
+    }
 
 
 @app.route('/test-email')
@@ -66,12 +257,46 @@ def upload_image():
     if 'file' not in request.files:
         return jsonify({"error": "No file uploaded"}), 400
 
-    file = request.files['file']
-    result = cloudinary.uploader.upload(file)
-    return jsonify({
-        "url": result['secure_url'],
-        "public_id": result['public_id']
-    }), 200
+    # The transfer to Cloudinary happens in the background; poll GET /uploads/<id> for the URL
+    upload, sha256 = queue_image_upload(request.files['file'])
+    if upload is None:
+        asset = known_asset(db.session, sha256)
+        return jsonify({"status": "ready", "url": asset.url, "public_id": asset.public_id}), 200
+    db.session.commit()
+    image_uploads.submit(upload.id)
+    return jsonify({**upload.to_dict(), "status_url": f"/uploads/{upload.id}"}), 202
+
+
+@app.route('/uploads/<int:upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    upload = db.session.get(ImageUpload, upload_id)
+    if not upload:
+        return jsonify({"error": "Upload not found"}), 404
+    return jsonify(upload.to_dict()), 200
+
+@app.route('/metrics/booking-events')
+def booking_event_metrics():
+    """Digest throughput over the last ?minutes= (default 60) plus the unsent backlog."""
+    minutes = request.args.get('minutes', 60, type=float)
+    now = datetime.utcnow()
+    return jsonify(digest_metrics(db.session, now - timedelta(minutes=minutes), now)), 200
+
+
+@app.route('/metrics/cache')
+def cache_metrics():
+    return jsonify(response_cache.metrics()), 200
+
+
+@app.route('/metrics/db-pool')
+def db_pool_metrics():
+    """This worker's connection pool: checked-out and overflow connections, checkout wait times."""
+    return jsonify(pool_status(db.engine)), 200
+
+
+@app.route('/metrics/identity-cache')
+def identity_cache_metrics():
+    return jsonify(identity_cache.metrics()), 200
+
 
 @app.route('/')
 def home():
@@ -79,23 +304,115 @@ def home():
 
 
 # property routes
+def list_properties_page():
+    """Serialize one filtered keyset page of properties, loading only what ?fields= asks for."""
+    fieldset = request_fieldset(Property, default='summary')
+    query = apply_property_filters(Property.query, request.args)
+    properties, next_cursor = paginate_keyset(
+        query.options(*Property.load_options(fieldset)),
+        Property,
+        limit=request.args.get('limit'),
+        after=request.args.get('after'),
+    )
+    return paginated_response(jsonify([p.to_dict(fieldset) for p in properties]), next_cursor), 200
+
+
 @app.route('/properties')
+@conditional(property_list_validators)
+@response_cache.cached(lambda: f'properties:list:{query_string_key()}')
 def get_properties():
-    properties = Property.query.all()
-    return jsonify([p.to_dict() for p in properties])
+    return list_properties_page()
+
+
+@app.route('/properties/search')
+def search_properties():
+    q = (request.args.get('q') or '').strip()
+    if not q:
+        return jsonify({"error": "q query param required"}), 400
+
+    limit = parse_limit(request.args.get('limit'))
+    try:
+        offset = int(request.args.get('after', 0))
+    except ValueError:
+        raise InvalidCursor("Invalid cursor")
+
+    ids = search_property_ids(db.session, q, limit + 1, offset)
+    next_cursor = str(offset + limit) if len(ids) > limit else None
+    ids = ids[:limit]
+
+    # load the page in one query, then restore rank order
+    fieldset = request_fieldset(Property, default='summary')
+    rows = Property.query.options(*Property.load_options(fieldset)).filter(Property.id.in_(ids)).all()
+    by_id = {p.id: p for p in rows}
+    results = [by_id[i].to_dict(fieldset) for i in ids if i in by_id]
+    return paginated_response(jsonify(results), next_cursor), 200
+
+
+@app.route('/properties/nearby')
+def nearby_properties():
+    lat = parse_coordinate(request.args.get('lat'), 'lat', 90)
+    lng = parse_coordinate(request.args.get('lng'), 'lng', 180)
+    radius_km = parse_coordinate(request.args.get('radius_km', 5), 'radius_km', MAX_RADIUS_KM)
+    if radius_km <= 0:
+        raise InvalidCoordinates("radius_km must be greater than 0")
+    limit = parse_limit(request.args.get('limit'))
+
+    # prune to the grid cells around the point, then compute exact distances for those rows only
+    cells = or_(*[Property.geo_cell.between(lo, hi) for lo, hi in candidate_cell_ranges(lat, lng, radius_km)])
+    candidates = apply_property_filters(
+        db.session.query(Property.id, Property.latitude, Property.longitude).filter(cells),
+        request.args,
+    ).all()
+    distances = haversine_km(lat, lng, [c.latitude for c in candidates], [c.longitude for c in candidates])
+    nearest = sorted((d, c.id) for d, c in zip(distances, candidates) if d <= radius_km)[:limit]
+
+    fieldset = request_fieldset(Property, default='summary')
+    ids = [property_id for _, property_id in nearest]
+    by_id = {p.id: p for p in Property.query.options(*Property.load_options(fieldset)).filter(Property.id.in_(ids))}
+    results = []
+    for distance, property_id in nearest:
+        item = by_id[property_id].to_dict(fieldset)
+        item['distance_km'] = round(distance, 3)
+        results.append(item)
+    return jsonify(results), 200
 
 
 @app.route('/properties/<int:property_id>', methods=['GET'])
+@conditional(property_validators)
+@response_cache.cached(lambda property_id: f'property:{property_id}:{query_string_key()}')
 def get_property(property_id):
-    prop = Property.query.get(property_id)
+    fieldset = request_fieldset(Property)
+    prop = Property.query.options(*Property.load_options(fieldset)).filter_by(id=property_id).first()
     if not prop:
         return jsonify({"error": "Property not found"}), 404
-    return jsonify(prop.to_dict()), 200
+    return jsonify(prop.to_dict(fieldset)), 200
+
+
+@app.route('/properties/<int:property_id>/calendar', methods=['GET'])
+def property_calendar(property_id):
+    start, end = parse_calendar_range(request.args.get('from'), request.args.get('to'), datetime.utcnow().date())
+    if db.session.get(Property, property_id) is None:
+        return jsonify({"error": "Property not found"}), 404
+    months = dict(
+        db.session.query(PropertyOccupancy.month, PropertyOccupancy.booked_days)
+        .filter(PropertyOccupancy.property_id == property_id,
+                PropertyOccupancy.month.between(month_key(start), month_key(end)))
+        .all()
+    )
+    booked, free = expand(start, end, months)
+    return jsonify({
+        "property_id": property_id,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "booked": [d.isoformat() for d in booked],
+        "free": [d.isoformat() for d in free],
+    }), 200
+
 
 @app.route('/properties', methods=['POST'])
 def create_property():
     # Initialize defaults
-    title = description = location = rent_price = landlord_id = image_url = None
+    title = description = location = rent_price = landlord_id = image_url = file = None
 
     #Handle JSON request
     if request.is_json:
@@ -117,13 +434,11 @@ def create_property():
         landlord_id = data.get('landlord_id')
 
         file = request.files.get('image')
-        if file:
-            upload_result = cloudinary.uploader.upload(file)
-            image_url = upload_result.get('secure_url')
 
     # Validate required fields
     if not all([title, description, location, rent_price, landlord_id]):
         return jsonify({"error": "Missing required fields"}), 400
+    coordinates = parse_coordinates(data)
 
     # Save to database
     property_obj = Property(
@@ -134,14 +449,89 @@ def create_property():
         image_url=image_url,
         landlord_id=int(landlord_id)
     )
+    if coordinates:
+        property_obj.set_coordinates(*coordinates)
 
     db.session.add(property_obj)
+    db.session.flush()
+    index_property(db.session, property_obj)
+
+    # Acknowledge now with image_status "processing"; the pool sets image_url once Cloudinary has the file
+    upload = None
+    if file:
+        upload, sha256 = queue_image_upload(file, property_obj.id)
+        if upload is None:
+            property_obj.image_url = known_asset(db.session, sha256).url
+        else:
+            property_obj.image_status = "processing"
     db.session.commit()
+    if upload is not None:
+        image_uploads.submit(upload.id)
+    invalidate_property_cache()
+    invalidate_landlord_cache(property_obj.landlord_id)
 
     return jsonify(property_obj.to_dict()), 201
 
 
 
+@app.route('/properties/<int:property_id>/images', methods=['POST'])
+def add_property_images(property_id):
+    prop = db.session.get(Property, property_id)
+    if not prop:
+        return jsonify({"error": "Property not found"}), 404
+
+    files = request.files.getlist('images')
+    if not files:
+        return jsonify({"error": "No files uploaded; send them as 'images'"}), 400
+    if len(files) > app.config['IMAGE_GALLERY_MAX_FILES']:
+        return jsonify({"error": f"At most {app.config['IMAGE_GALLERY_MAX_FILES']} images per request"}), 400
+    not_images = [f.filename for f in files if not (f.mimetype or '').startswith('image/')]
+    if not_images:
+        return jsonify({"error": f"Not images: {', '.join(not_images)}"}), 400
+    captions = request.form.getlist('caption')
+    primary = request.form.get('primary', type=int)
+    if primary is not None and not 0 <= primary < len(files):
+        return jsonify({"error": f"primary must be between 0 and {len(files) - 1}"}), 400
+
+    # every file goes up at once on the bounded pool, so the request takes about as long as the slowest one
+    spooled = [spool(f, app.config['IMAGE_SPOOL_DIR']) for f in files]
+    try:
+        uploaded = upload_many(db.session, image_uploads.uploader, gallery_transfers, spooled)
+    except UploadFailed as e:
+        return jsonify({"error": str(e), "failed": {files[i].filename: msg for i, msg in e.errors.items()}}), 502
+
+    last_order, has_primary = db.session.query(
+        func.max(PropertyImage.sort_order), func.max(db.case((PropertyImage.is_primary.is_(True), 1), else_=0))
+    ).filter(PropertyImage.property_id == property_id).one()
+    if primary is None and not has_primary:
+        primary = 0
+    if primary is not None and has_primary:
+        PropertyImage.query.filter_by(property_id=property_id, is_primary=True).update({"is_primary": False})
+
+    start = 0 if last_order is None else last_order + 1
+    rows = [
+        {
+            "property_id": property_id,
+            "image_url": url,
+            "caption": captions[i] if i < len(captions) else None,
+            "is_primary": i == primary,
+            "sort_order": start + i,
+            "created_at": datetime.utcnow(),
+        }
+        for i, (url, _) in enumerate(uploaded)
+    ]
+    table = PropertyImage.__table__
+    inserted = db.session.execute(insert(table).values(rows).returning(*table.c)).mappings().all()
+    if primary is not None:
+        prop.image_url = rows[primary]["image_url"]
+        prop.image_status = "ready"
+    # the gallery is part of the property's representation, so its ETag has to change
+    prop.updated_at = datetime.utcnow()
+    db.session.commit()
+    invalidate_property_cache(property_id)
+    return jsonify([PropertyImage(**row).to_dict() for row in inserted]), 201
+
+
 @app.route('/properties/<int:property_id>', methods=['PUT'])
 def update_property(property_id):
     prop = db.session.get(Property, property_id)
@@ -162,7 +552,14 @@ def update_property(property_id):
     if 'image_url' in data:
         prop.image_url = data['image_url']
 
+    if 'latitude' in data or 'longitude' in data:
+        coordinates = parse_coordinates(data)
+        prop.set_coordinates(*(coordinates or (None, None)))
+
+    index_property(db.session, prop)
     db.session.commit()
+    invalidate_property_cache(property_id)
+    invalidate_landlord_cache(prop.landlord_id)
     return jsonify(prop.to_dict()), 200
 
 
@@ -171,8 +568,12 @@ def delete_property(property_id):
     prop = Property.query.get(property_id)
     if not prop:
         return jsonify({"error": "Property not found"}), 404
+    landlord_id = prop.landlord_id
+    remove_property(db.session, prop.id)
     db.session.delete(prop)
     db.session.commit()
+    invalidate_property_cache(property_id)
+    invalidate_landlord_cache(landlord_id)
     return jsonify({"message": "Property deleted"}), 200
 
 
@@ -182,17 +583,27 @@ def create_booking():
     data = request.get_json()
     tenant_id = data.get('tenant_id')
     property_id = data.get('property_id')
-    start_date = data.get('start_date', datetime.utcnow().date())
-    end_date = data.get('end_date', datetime.utcnow().date())
+    start_date, end_date = parse_booking_dates(
+        data.get('start_date', datetime.utcnow().date()),
+        data.get('end_date', datetime.utcnow().date()),
+    )
 
     if not all([tenant_id, property_id]):
         return jsonify({"error": "Missing required fields"}), 400
 
+    # Hold the property until commit so concurrent requests cannot both pass the checks below
+    if not lock_property(db.session, property_id):
+        return jsonify({"error": "Property not found"}), 404
+
     # ✅ Check if tenant already booked this property (any status except cancelled)
     existing = Booking.query.filter_by(tenant_id=tenant_id, property_id=property_id).filter(Booking.status != "cancelled").first()
     if existing:
+        db.session.rollback()
         return jsonify({"error": "You have already booked this property."}), 400
 
+    # Reject dates that overlap another tenant's approved/active booking
+    ensure_available(db.session, property_id, start_date, end_date)
+
     new_booking = Booking(
         tenant_id=tenant_id,
         property_id=property_id,
@@ -202,29 +613,21 @@ def create_booking():
     )
     db.session.add(new_booking)
     db.session.commit()
+    invalidate_booking_cache(new_booking.property_id)
 
     return jsonify(new_booking.to_dict()), 201
 
 
 
 @app.route('/bookings', methods=['GET'])
+@conditional(lambda: booking_list_validators(Booking.tenant_id == request.args.get('tenant_id', type=int))
+             if request.args.get('tenant_id', type=int) else None)
 def get_tenant_bookings():
     tenant_id = request.args.get('tenant_id')
     if not tenant_id:
         return jsonify({"error": "tenant_id query param required"}), 400
 
-    bookings = Booking.query.filter_by(tenant_id=tenant_id).all()
-
-
-    result = []
-    for b in bookings:
-        b_dict = b.to_dict()
-        property_obj = Property.query.get(b.property_id)
-        if property_obj:
-            b_dict['property'] = property_obj.to_dict()
-        result.append(b_dict)
-
-    return jsonify(result), 200
+    return jsonify(booking_feed(Booking.query.filter_by(tenant_id=tenant_id))), 200
 
 
 
@@ -238,8 +641,18 @@ def update_booking_status(id):
     allowed = ["pending", "approved", "cancelled"]
     if status not in allowed:
         return jsonify({"error": f"Invalid status. Must be one of {allowed}"}), 400
+    if status == "approved" and booking.status != "approved":
+        lock_property(db.session, booking.property_id)
+        ensure_available(db.session, booking.property_id, booking.start_date, booking.end_date, exclude_booking_id=booking.id)
     booking.status = status
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # PostgreSQL's bookings_no_overlap constraint caught a race the check above could not see
+        db.session.rollback()
+        return jsonify({"error": "Property is already booked for these dates."}), 409
+    # approving or cancelling changes the property's availability for date-filtered listings
+    invalidate_booking_cache(booking.property_id)
 
     # Return updated booking object (including property)
     b_dict = booking.to_dict()
@@ -254,30 +667,47 @@ def cancel_booking(id):
     booking = Booking.query.get(id)
     if not booking:
         return jsonify({"error": "Booking not found"}), 404
+    property_id = booking.property_id
     db.session.delete(booking)
     db.session.commit()
+    invalidate_booking_cache(property_id)
     return jsonify({"message": "Booking deleted"}), 200
 
 
 @app.route('/landlord/bookings', methods=['GET'])
+@conditional(lambda: booking_list_validators(Property.landlord_id == request.args.get('landlord_id', type=int))
+             if request.args.get('landlord_id', type=int) else None)
 def get_landlord_bookings():
     landlord_id = request.args.get('landlord_id')
     if not landlord_id:
         return jsonify({"error": "landlord_id query param required"}), 400
 
     landlord_id = int(landlord_id)  # direct cast
+    query = Booking.query.join(Property).filter(Property.landlord_id == landlord_id)
+    return jsonify(booking_feed(query)), 200
 
-    bookings = (
-        Booking.query.join(Property)
-        .filter(Property.landlord_id == landlord_id)
-        .all()
-    )
 
-    return jsonify([b.to_dict() for b in bookings]), 200
+@app.route('/landlord/dashboard', methods=['GET'])
+@response_cache.cached(lambda: f'landlord_dashboard:{request.args.get("landlord_id")}:'
+                               f'{datetime.utcnow().date()}:{query_string_key()}')
+def get_landlord_dashboard():
+    landlord_id = request.args.get('landlord_id', type=int)
+    if not landlord_id:
+        return jsonify({"error": "landlord_id query param required"}), 400
+
+    # occupancy defaults to the current calendar month
+    today = datetime.utcnow().date()
+    if not request.args.get('from') and not request.args.get('to'):
+        start = today.replace(day=1)
+        end = (start + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+    else:
+        start, end = parse_calendar_range(request.args.get('from'), request.args.get('to'), today)
+    return jsonify(landlord_dashboard(db.session, landlord_id, start, end)), 200
 
 
 # landlord income summary
 @app.route('/landlord/income', methods=['GET'])
+@response_cache.cached(lambda: f'landlord_income:{request.args.get("landlord_id")}:{query_string_key()}')
 def landlord_income():
     landlord_id = request.args.get('landlord_id')
     if not landlord_id:
@@ -287,11 +717,15 @@ def landlord_income():
     except ValueError:
         return jsonify({"error": "invalid landlord_id"}), 400
 
-    # Sum only completed payments for this landlord
-    total = db.session.query(func.coalesce(func.sum(Payment.amount), 0)).filter(
-        Payment.landlord_id == landlord_id_int,
-        Payment.status == "completed"
-    ).scalar()
+    granularity = request.args.get('granularity')
+    if granularity:
+        granularity, start, end = parse_income_range(
+            granularity, request.args.get('from'), request.args.get('to'), datetime.utcnow().date()
+        )
+        return jsonify(income_series(db.session, landlord_id_int, granularity, start, end)), 200
+
+    # Sum only completed payments for this landlord, from the monthly rollup
+    total = income_total(db.session, landlord_id_int)
 
     # Ensure float serializable
     total_float = float(total) if total is not None else 0.0
@@ -300,6 +734,26 @@ def landlord_income():
 
 
 # payment routes
+def payment_response(payment):
+    return jsonify({
+        "message": "Payment successful",
+        "payment": payment.to_dict(),
+        "booking": payment.booking.to_dict(),  # embeds the property
+    })
+
+
+def replay_payment(tenant_id, idempotency_key, booking_id, amount):
+    """The stored response for a repeated Idempotency-Key, a 422 if the body changed, or None."""
+    payment = Payment.query.filter_by(tenant_id=tenant_id, idempotency_key=idempotency_key).first()
+    if payment is None:
+        return None
+    if payment.booking_id != int(booking_id) or float(payment.amount) != amount:
+        return jsonify({"error": "Idempotency-Key was already used for a different payment"}), 422
+    response = payment_response(payment)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response, 201
+
+
 @app.route('/payments', methods=['POST'])
 @jwt_required()
 def create_payment():
@@ -318,6 +772,13 @@ def create_payment():
         if not booking:
             return jsonify({"error": "Booking not found"}), 404
 
+        # A retried request with the same Idempotency-Key gets the original payment back
+        idempotency_key = request.headers.get('Idempotency-Key') or None
+        if idempotency_key:
+            replay = replay_payment(booking.tenant_id, idempotency_key, booking_id, amount)
+            if replay is not None:
+                return replay
+
         if (booking.status or "").lower() != "approved":
             return jsonify({"error": "Booking must be approved before payment"}), 400
 
@@ -327,7 +788,7 @@ def create_payment():
 
         tenant_id = booking.tenant_id
         landlord_id = property_obj.landlord_id
-        transaction_id = f"TXN-{datetime.utcnow().timestamp()}"
+        transaction_id = transaction_ids.next_id("TXN-")
 
         payment = Payment(
             booking_id=booking_id,
@@ -336,6 +797,7 @@ def create_payment():
             amount=amount,
             payment_method=payment_method,
             transaction_id=transaction_id,
+            idempotency_key=idempotency_key,
             status="completed",
             paid_at=datetime.utcnow()
         )
@@ -343,17 +805,17 @@ def create_payment():
         booking.status = "active"
 
         db.session.add(payment)
-        db.session.commit()
-
-        payment_data = payment.to_dict()
-        booking_data = booking.to_dict()
-        booking_data["property"] = property_obj.to_dict()
-
-        return jsonify({
-            "message": "Payment successful",
-            "payment": payment_data,
-            "booking": booking_data
-        }), 201
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # a concurrent request with the same Idempotency-Key committed first
+            db.session.rollback()
+            replay = idempotency_key and replay_payment(tenant_id, idempotency_key, booking_id, amount)
+            if replay:
+                return replay
+            raise
+        invalidate_landlord_cache(landlord_id)
+        return payment_response(payment), 201
 
     except Exception as e:
         db.session.rollback()
@@ -364,15 +826,17 @@ def create_payment():
 @app.route('/payments', methods=['GET'])
 @jwt_required()
 def get_payments():
-    user_id = get_jwt_identity()
+    user_id = current_user.id
     role = request.args.get("role", "tenant")
+    fieldset = request_fieldset(Payment)
+    query = Payment.query.options(*Payment.load_options(fieldset))
 
     if role == "tenant":
-        payments = Payment.query.filter_by(tenant_id=user_id).all()
+        payments = query.filter_by(tenant_id=user_id).all()
     else:
-        payments = Payment.query.filter_by(landlord_id=user_id).all()
+        payments = query.filter_by(landlord_id=user_id).all()
 
-    return jsonify([p.to_dict() for p in payments]), 200
+    return jsonify([p.to_dict(fieldset) for p in payments]), 200
 
 
 @app.route('/payments/<int:id>', methods=['PUT'])
@@ -392,6 +856,7 @@ def update_payment(id):
     payment.status = status
     payment.paid_at = datetime.utcnow() if status == "completed" else None
     db.session.commit()
+    invalidate_landlord_cache(payment.landlord_id)
     return jsonify({"message": f"Payment updated to {status}", "payment": payment.to_dict()}), 200
 
 
@@ -401,7 +866,11 @@ def login():
     data = request.get_json()
     user = User.query.filter_by(email=data['email']).first()
     if user and user.check_password(data['password']):
-        access_token = create_access_token(identity=user.id)
+        if user.password_needs_rehash():
+            # upgrade hashes made with older parameters while we still have the plaintext
+            user.password = data['password']
+            db.session.commit()
+        access_token = create_access_token(identity=user)
         return jsonify({
             "message": "Login successful",
             "token": access_token,
@@ -434,9 +903,8 @@ def register_user():
     )
     new_user.password = data['password']
     db.session.add(new_user)
-    db.session.commit()
 
-    #Send welcome email (SendGrid)
+    #Queue welcome email in the same transaction; server/workers/email_outbox.py sends it
     subject = f"Welcome to RentEase, {data['name']}!"
     content = f"""
         <h2>Welcome to RentEase, {data['name']}! 🎉</h2>
@@ -445,8 +913,8 @@ def register_user():
         <br>
         <p>Best regards,<br>RentEase Team</p>
     """
-
-    send_email(data['email'], subject, content)
+    enqueue_email(db.session, data['email'], subject, content)
+    db.session.commit()
 
     #success response
     return jsonify({"message": "User registered successfully"}), 201
@@ -454,8 +922,14 @@ def register_user():
 #admin routes
 @app.route('/admin/users', methods=['GET'])
 def get_all_users():
-    users = User.query.all()
-    return jsonify([u.to_dict() for u in users]), 200
+    fieldset = request_fieldset(User)
+    users, next_cursor = paginate_keyset(
+        User.query.options(*User.load_options(fieldset, relations=False)),
+        User,
+        limit=request.args.get('limit'),
+        after=request.args.get('after'),
+    )
+    return paginated_response(jsonify(User.bulk_to_dict(users, fieldset)), next_cursor), 200
 
 
 @app.route('/admin/users/<int:id>', methods=['DELETE'])
@@ -469,15 +943,47 @@ def delete_user(id):
 
 
 @app.route('/admin/properties', methods=['GET'])
+@conditional(property_list_validators)
 def get_all_properties():
-    properties = Property.query.all()
-    return jsonify([p.to_dict() for p in properties]), 200
+    return list_properties_page()
+
+
+EXPORTABLE = {"users": User, "properties": Property, "bookings": Booking, "payments": Payment}
+
+
+def export_rows(model, *criteria, filename):
+    """Stream `model` rows matching `criteria` in ?format=ndjson|csv, summary tier unless ?fields= says otherwise."""
+    fieldset = model.fieldset(request.args.get('fields') or 'summary', request.args.get('include'))
+    statement = (
+        db.select(model)
+        .where(*criteria)
+        .options(*model.load_options(fieldset, relations=not hasattr(model, 'bulk_to_dict')))
+        .order_by(model.id)
+    )
+    return export_response(statement, model, fieldset, request.args.get('format', 'ndjson'), filename)
+
+
+@app.route('/admin/export/<entity>', methods=['GET'])
+def admin_export(entity):
+    model = EXPORTABLE.get(entity)
+    if model is None:
+        return jsonify({"error": f"Unknown export. Must be one of {list(EXPORTABLE)}"}), 404
+    return export_rows(model, filename=entity)
+
+
+@app.route('/landlord/export/payments', methods=['GET'])
+def landlord_export_payments():
+    landlord_id = request.args.get('landlord_id', type=int)
+    if not landlord_id:
+        return jsonify({"error": "landlord_id query param required"}), 400
+    return export_rows(Payment, Payment.landlord_id == landlord_id, filename=f"payments-landlord-{landlord_id}")
 
 
 @app.route('/admin/bookings', methods=['GET'])
 def get_all_bookings_admin():
-    bookings = Booking.query.all()
-    return jsonify([b.to_dict() for b in bookings]), 200
+    fieldset = request_fieldset(Booking)
+    bookings = Booking.query.options(*Booking.load_options(fieldset)).all()
+    return jsonify([b.to_dict(fieldset) for b in bookings]), 200
 
 
 
@@ -2,6 +2,8 @@ import os
 import cloudinary
 from dotenv import load_dotenv
 
+from server.utils.db_pool import engine_options
+
 # Load .env from project root
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 load_dotenv(os.path.join(BASE_DIR, '.env'))
@@ -22,17 +24,79 @@ class Config:
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Connection pool, per worker process: gunicorn -w 4 with the defaults opens at most
+    # 4 * (5 + 5) connections. DB_POOL_MODE=pgbouncer for pgbouncer in transaction pooling mode.
+    DB_POOL_MODE = os.getenv('DB_POOL_MODE', 'queue')
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 5))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', '1').lower() not in ('0', 'false', 'no')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        SQLALCHEMY_DATABASE_URI, DB_POOL_MODE, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT, pool_recycle=DB_POOL_RECYCLE, pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
     # JWT
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'fallback-secret-key')
 
+    # JWT user loader: per-worker cache of token identities, refreshed from the users table at most every TTL seconds
+    IDENTITY_CACHE_TTL = float(os.getenv('IDENTITY_CACHE_TTL', 60))
+    IDENTITY_CACHE_MAX_ENTRIES = int(os.getenv('IDENTITY_CACHE_MAX_ENTRIES', 4096))
+
+    # Password hashing (utils/passwords.py): werkzeug method string, e.g. "scrypt" or "scrypt:65536:8:1".
+    # Stored hashes made with other parameters are upgraded on the user's next successful login.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+    # hashes running at once per web worker before answering 503; keep it below GUNICORN_THREADS
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 2))
+
     # Cloudinary
     CLOUDINARY_CLOUD_NAME = os.getenv('CLOUDINARY_CLOUD_NAME')
     CLOUDINARY_API_KEY = os.getenv('CLOUDINARY_API_KEY')
     CLOUDINARY_API_SECRET = os.getenv('CLOUDINARY_API_SECRET')
 
+    # Image uploads: spooled to disk by the request, pushed to Cloudinary by a background pool.
+    # IMAGE_UPLOADER=fake swaps in the offline FakeUploader (utils/uploads.py).
+    IMAGE_SPOOL_DIR = os.getenv('IMAGE_SPOOL_DIR', os.path.join(BASE_DIR, 'server', 'instance', 'upload_spool'))
+    IMAGE_UPLOADER = os.getenv('IMAGE_UPLOADER', 'cloudinary')
+    IMAGE_UPLOAD_WORKERS = int(os.getenv('IMAGE_UPLOAD_WORKERS', 4))
+    IMAGE_UPLOAD_MAX_ATTEMPTS = int(os.getenv('IMAGE_UPLOAD_MAX_ATTEMPTS', 3))
+    # Uploads still "processing" after this many minutes were left by an exited worker; each web
+    # worker resubmits those whose spool file is on its host, at boot and every N seconds (0 = never).
+    IMAGE_UPLOAD_STALE_MINUTES = float(os.getenv('IMAGE_UPLOAD_STALE_MINUTES', 15))
+    IMAGE_UPLOAD_RECOVER_EVERY = float(os.getenv('IMAGE_UPLOAD_RECOVER_EVERY', 300))
+    # POST /properties/<id>/images: files per request, and parallel transfers per web worker
+    IMAGE_GALLERY_MAX_FILES = int(os.getenv('IMAGE_GALLERY_MAX_FILES', 20))
+    IMAGE_GALLERY_CONCURRENCY = int(os.getenv('IMAGE_GALLERY_CONCURRENCY', 8))
+
+    # Response cache: per-worker LRU plus an optional shared tier (sqlite:///path or redis://...)
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1024))
+    CACHE_LOCAL_TTL = float(os.getenv('CACHE_LOCAL_TTL', 5))
+    CACHE_SHARED_URL = os.getenv('CACHE_SHARED_URL', '')
+    CACHE_SHARED_TTL = float(os.getenv('CACHE_SHARED_TTL', 300))
+
+    # Transaction ids (utils/ids.py) need a worker id, 0-1023, unique per process across all hosts:
+    # WORKER_ID_BASE + the WORKER_INDEX gunicorn.conf.py assigns each gunicorn worker. Give every host
+    # its own WORKER_ID_BASE, at least twice its worker count apart (a reload briefly runs both generations).
+    WORKER_ID_BASE = int(os.getenv('WORKER_ID_BASE', 0))
+
     # SendGrid
     SENDGRID_API_KEY = os.getenv('SENDGRID_API_KEY', '')
     SENDGRID_FROM_EMAIL = os.getenv('SENDGRID_FROM_EMAIL', 'jerr.jomo@gmail.com')
+    # point at http://localhost:8025 with python -m server.workers.fake_sendgrid to test offline
+    SENDGRID_API_URL = os.getenv('SENDGRID_API_URL', 'https://api.sendgrid.com')
+
+    # Email outbox worker (python -m server.workers.email_outbox)
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 50))
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 8))
+    EMAIL_OUTBOX_POLL_INTERVAL = float(os.getenv('EMAIL_OUTBOX_POLL_INTERVAL', 2))
+
+    # Booking event digests (python -m server.workers.booking_digests)
+    BOOKING_DIGEST_WINDOW = float(os.getenv('BOOKING_DIGEST_WINDOW', 300))
+    BOOKING_DIGEST_BATCH_SIZE = int(os.getenv('BOOKING_DIGEST_BATCH_SIZE', 1000))  # SendGrid allows 1000
+    BOOKING_DIGEST_MAX_ITEMS = int(os.getenv('BOOKING_DIGEST_MAX_ITEMS', 20))
+    # windows an event is retried in after 5xx/429/network failures before it is dead-lettered
+    BOOKING_DIGEST_MAX_ATTEMPTS = int(os.getenv('BOOKING_DIGEST_MAX_ATTEMPTS', 5))
 
 
 # Configure Cloudinary globally
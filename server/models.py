@@ -1,20 +1,147 @@
+from collections import namedtuple
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from sqlalchemy.orm import validates
-from sqlalchemy import func
-from werkzeug.security import generate_password_hash, check_password_hash
+from decimal import Decimal
+from sqlalchemy.orm import validates, selectinload, joinedload, load_only
+from sqlalchemy import event, func
+from sqlalchemy.sql import ClauseElement
+from server.utils.geo import grid_cell
+from server.utils.identity import CLAIMS, identity_cache
+from server.utils.images import responsive_urls, srcset
+from server.utils.occupancy import month_bits, month_key
+from server.utils.passwords import password_hasher
+from server.utils.upsert import upsert
 
 
 db = SQLAlchemy()
 
+
+class InvalidFieldSet(ValueError):
+    """Raised when ?fields= or ?include= names a field the model does not expose."""
+
+
+# names: the to_dict keys to emit; tier: "summary" or "detail", passed on to nested objects
+FieldSet = namedtuple('FieldSet', ['names', 'tier'])
+
+
+class Field:
+    """
+    One key of a model's to_dict output.
+
+    `columns` are the columns the getter reads, `relation` the relationship it
+    walks (with `relation_columns` restricting what is loaded from it) and
+    `nested` marks a relation serialized with the related model's own to_dict.
+    """
+
+    def __init__(self, getter=None, columns=(), relation=None, relation_columns=None, nested=False):
+        self.getter = getter
+        self.columns = columns
+        self.relation = relation
+        self.relation_columns = relation_columns
+        self.nested = nested
+
+    def value(self, obj, tier):
+        if not self.nested:
+            return self.getter(obj)
+        target = getattr(obj, self.relation)
+        if target is None:
+            return None
+        if isinstance(target, list):
+            return [t.to_dict(t.fieldset(tier)) for t in target]
+        return target.to_dict(target.fieldset(tier))
+
+
+def column(name):
+    return Field(lambda obj: getattr(obj, name), columns=(name,))
+
+
+def datetime_column(name):
+    # datetimes, dates and Decimals are left native for the app's JSON provider
+    # (server/utils/encoding.py), which renders them as ISO strings / decimal strings
+    return column(name)
+
+
+def id_list(relation):
+    return Field(lambda obj: [o.id for o in getattr(obj, relation)], relation=relation, relation_columns=('id',))
+
+
+class SerializerMixin:
+    """
+    Shared to_dict projection for all models.
+
+    Each model declares `serializable_fields` (name -> Field, in detail order)
+    and `summary_fields`. `fieldset()` turns ?fields=/?include= into a FieldSet,
+    `load_options()` turns a FieldSet into loader options that only fetch the
+    columns and relations it needs, and `to_dict()` emits exactly those keys.
+    """
+
+    serializable_fields = {}
+    summary_fields = ()
+
+    @classmethod
+    def fieldset(cls, fields=None, include=None):
+        if fields in (None, '', 'detail'):
+            names, tier = list(cls.serializable_fields), 'detail'
+        elif fields == 'summary':
+            names, tier = list(cls.summary_fields), 'summary'
+        else:
+            names, tier = ['id'] + cls._split_fields(fields), 'summary'
+        if include:
+            names += cls._split_fields(include)
+        return FieldSet(tuple(dict.fromkeys(names)), tier)
+
+    @classmethod
+    def _split_fields(cls, value):
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in cls.serializable_fields]
+        if unknown:
+            raise InvalidFieldSet(f"Unknown fields for {cls.__name__}: {', '.join(unknown)}")
+        return names
+
+    @classmethod
+    def load_options(cls, fieldset=None, relations=True):
+        """
+        Loader options that fetch only what `fieldset` serializes, relations batched.
+
+        Pass relations=False when the caller bulk-loads related data itself
+        (see User.bulk_to_dict).
+        """
+        fieldset = fieldset or cls.fieldset()
+        columns = {'id'}
+        loaders = {}
+        for name in fieldset.names:
+            field = cls.serializable_fields[name]
+            columns.update(field.columns)
+            if field.relation and relations:
+                loaders[field.relation] = field
+
+        options = [load_only(*(getattr(cls, c) for c in sorted(columns)))]
+        for name, field in loaders.items():
+            attr = getattr(cls, name)
+            related = attr.property.mapper.class_
+            loader = selectinload(attr) if attr.property.uselist else joinedload(attr)
+            if field.nested:
+                loader = loader.options(*related.load_options(related.fieldset(fieldset.tier)))
+            elif field.relation_columns:
+                loader = loader.load_only(*(getattr(related, c) for c in field.relation_columns))
+            options.append(loader)
+        return options
+
+    def to_dict(self, fieldset=None):
+        fieldset = fieldset or self.fieldset()
+        return {name: self.serializable_fields[name].value(self, fieldset.tier) for name in fieldset.names}
+
 favorites = db.Table(
     'favorites',
     db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
     db.Column('property_id', db.Integer, db.ForeignKey('properties.id'), primary_key=True)
 )
 
-class User(db.Model):
+class User(SerializerMixin, db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        db.Index('ix_users_created_at_id', 'created_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -37,12 +164,16 @@ class User(db.Model):
 
     @password.setter
     def password(self, plain_password):
-        """Automatically hash passwords when setting them"""
-        self._password_hash = generate_password_hash(plain_password)
+        """Automatically hash passwords when setting them (on the password hashing pool)"""
+        self._password_hash = password_hasher.hash(plain_password)
 
     def check_password(self, plain_password):
         """Verify a plaintext password against the stored hash"""
-        return check_password_hash(self._password_hash, plain_password)
+        return password_hasher.verify(self._password_hash, plain_password)
+
+    def password_needs_rehash(self):
+        """True when the stored hash predates the configured PASSWORD_HASH_METHOD."""
+        return password_hasher.needs_rehash(self._password_hash)
 
 
     @validates('email')
@@ -58,29 +189,92 @@ class User(db.Model):
             raise ValueError(f"Invalid role. Must be one of {allowed}.")
         return value
 
+    # values filled in by bulk_to_dict so to_dict needs no per-user queries
+    _prefetched = None
+
     # total income property for landlords
     @property
     def total_income(self):
         """Calculate total completed payments for this landlord."""
+        if self._prefetched and 'total_income' in self._prefetched:
+            return self._prefetched['total_income']
         total = db.session.query(func.sum(Payment.amount)).filter_by(landlord_id=self.id, status='completed').scalar()
         return float(total or 0.0)
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "name": self.name,
-            "email": self.email,
-            "role": self.role,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "properties": [prop.id for prop in self.properties],
-            "bookings": [booking.id for booking in self.bookings],
-            "favorites": [p.id for p in self.favorite_properties],
-            "total_income": self.total_income if self.role == "landlord" else None
-        }
-
-
-class Property(db.Model):
+    def _ids(self, relation):
+        if self._prefetched and relation in self._prefetched:
+            return self._prefetched[relation]
+        return [obj.id for obj in getattr(self, relation)]
+
+    serializable_fields = {
+        "id": column("id"),
+        "name": column("name"),
+        "email": column("email"),
+        "role": column("role"),
+        "created_at": datetime_column("created_at"),
+        "properties": Field(lambda u: u._ids("properties"), relation="properties", relation_columns=("id",)),
+        "bookings": Field(lambda u: u._ids("bookings"), relation="bookings", relation_columns=("id",)),
+        "favorites": Field(lambda u: u._ids("favorite_properties"), relation="favorite_properties",
+                           relation_columns=("id",)),
+        "total_income": Field(lambda u: u.total_income if u.role == "landlord" else None, columns=("role",)),
+    }
+    summary_fields = ("id", "name", "email", "role", "created_at")
+
+    @classmethod
+    def bulk_to_dict(cls, users, fieldset=None):
+        """
+        Serialize a page of users with one grouped query per requested aggregate.
+
+        Relationship id lists come from plain (owner_id, id) selects and landlord
+        income from a single GROUP BY, so the query count does not depend on the
+        number of users. Load `users` with load_options(fieldset, relations=False).
+        """
+        fieldset = fieldset or cls.fieldset()
+        ids = [u.id for u in users]
+        lookups = {}
+        if ids and "properties" in fieldset.names:
+            lookups["properties"] = _group_pairs(db.select(Property.landlord_id, Property.id)
+                                                 .where(Property.landlord_id.in_(ids)).order_by(Property.id))
+        if ids and "bookings" in fieldset.names:
+            lookups["bookings"] = _group_pairs(db.select(Booking.tenant_id, Booking.id)
+                                               .where(Booking.tenant_id.in_(ids)).order_by(Booking.id))
+        if ids and "favorites" in fieldset.names:
+            lookups["favorite_properties"] = _group_pairs(db.select(favorites.c.user_id, favorites.c.property_id)
+                                                          .where(favorites.c.user_id.in_(ids)))
+        income = {}
+        landlord_ids = [u.id for u in users if u.role == "landlord"]
+        if landlord_ids and "total_income" in fieldset.names:
+            income = dict(db.session.execute(
+                db.select(Payment.landlord_id, func.sum(Payment.amount))
+                .where(Payment.landlord_id.in_(landlord_ids), Payment.status == "completed")
+                .group_by(Payment.landlord_id)
+            ).all())
+
+        for user in users:
+            user._prefetched = {name: values.get(user.id, []) for name, values in lookups.items()}
+            if user.id in landlord_ids:
+                user._prefetched["total_income"] = float(income.get(user.id) or 0.0)
+        return [user.to_dict(fieldset) for user in users]
+
+
+def _group_pairs(statement):
+    grouped = {}
+    for owner_id, obj_id in db.session.execute(statement):
+        grouped.setdefault(owner_id, []).append(obj_id)
+    return grouped
+
+
+class Property(SerializerMixin, db.Model):
     __tablename__ = "properties"
+    __table_args__ = (
+        # keyset pagination on GET /properties walks this index
+        db.Index('ix_properties_created_at_id', 'created_at', 'id'),
+        # ...and this one when ?available= is set, so date-filtered pages stop as soon as they fill
+        db.Index('ix_properties_available_created_at_id', 'available', 'created_at', 'id'),
+        # listing filters: ?available=&min_rent=&max_rent= and ?location=&min_rent=&max_rent=
+        db.Index('ix_properties_available_rent_price', 'available', 'rent_price'),
+        db.Index('ix_properties_location_rent_price', 'location', 'rent_price'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -88,9 +282,23 @@ class Property(db.Model):
     rent_price = db.Column(db.Numeric(10, 2), nullable=False)
     location = db.Column(db.String(255), nullable=False)
     image_url = db.Column(db.String)
+    image_status = db.Column(db.String(20), nullable=False, default="ready", server_default="ready",
+                             doc="processing while an upload is in flight (utils/uploads.py), then ready or failed")
     landlord_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     available = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True,
+                           doc="bumped on any change to the property's to_dict output; drives ETags")
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    geo_cell = db.Column(db.Integer, index=True, doc="grid cell of (latitude, longitude), see utils/geo.py")
+
+    # counter caches, maintained by the listeners at the bottom of this module and
+    # reconciled by server/workers/reconcile_counters.py
+    favorite_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    booking_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_avg = db.Column(db.Float)
 
     landlord = db.relationship('User', back_populates='properties')
     bookings = db.relationship('Booking', back_populates='prop', cascade="all, delete-orphan")
@@ -104,26 +312,50 @@ class Property(db.Model):
             raise ValueError("Rent price must be greater than 0.")
         return value
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "title": self.title,
-            "description": self.description,
-            "rent_price": str(self.rent_price),
-            "location": self.location,
-            "image_url": self.image_url,
-            "available": self.available,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "landlord_id": self.landlord_id,
-            "landlord_name": self.landlord.name if self.landlord else None,
-            "bookings": [booking.id for booking in self.bookings],
-            "amenities": [a.to_dict() for a in self.amenities],
-            "favorited_by": [u.id for u in self.favorited_by],
-        }
-
-
-class Booking(db.Model):
+    serializable_fields = {
+        "id": column("id"),
+        "title": column("title"),
+        "description": column("description"),
+        "rent_price": column("rent_price"),
+        "location": column("location"),
+        "latitude": column("latitude"),
+        "longitude": column("longitude"),
+        "image_url": column("image_url"),
+        "image_status": column("image_status"),
+        "available": column("available"),
+        "created_at": datetime_column("created_at"),
+        "updated_at": datetime_column("updated_at"),
+        "landlord_id": column("landlord_id"),
+        "landlord_name": Field(lambda p: p.landlord.name if p.landlord else None, columns=("landlord_id",),
+                               relation="landlord", relation_columns=("id", "name")),
+        "bookings": id_list("bookings"),
+        "amenities": Field(relation="amenities", nested=True),
+        "images": Field(relation="images", nested=True),
+        "favorited_by": id_list("favorited_by"),
+        "favorite_count": column("favorite_count"),
+        "booking_count": column("booking_count"),
+        "rating_avg": Field(lambda p: round(p.rating_avg, 2) if p.rating_avg is not None else None,
+                            columns=("rating_avg",)),
+        "rating_count": column("rating_count"),
+    }
+    summary_fields = ("id", "title", "rent_price", "location", "latitude", "longitude", "image_url",
+                      "image_status", "available", "created_at", "landlord_id", "landlord_name",
+                      "favorite_count", "booking_count", "rating_avg", "rating_count")
+
+    def set_coordinates(self, latitude, longitude):
+        """Set (or clear, with None) the map position and keep geo_cell in step."""
+        self.latitude = latitude
+        self.longitude = longitude
+        self.geo_cell = grid_cell(latitude, longitude) if latitude is not None and longitude is not None else None
+
+
+class Booking(SerializerMixin, db.Model):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # overlap checks range-scan a property's bookings by date;
+        # status makes the index covering for the available_from/available_to anti-join
+        db.Index('ix_bookings_property_dates', 'property_id', 'start_date', 'end_date', 'status'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     tenant_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -132,12 +364,16 @@ class Booking(db.Model):
     end_date = db.Column(db.Date, nullable=False)
     status = db.Column(db.String(20), nullable=False, default="pending", doc="pending, approved, paid, cancelled")  # ✅ ADDED paid
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     tenant = db.relationship('User', back_populates='bookings')
     prop = db.relationship('Property', back_populates='bookings')
     payments = db.relationship('Payment', back_populates='booking', cascade="all, delete-orphan")
     review = db.relationship('Review', back_populates='booking', uselist=False)
 
+    # statuses that hold the property for the booked dates
+    BLOCKING_STATUSES = ("approved", "active", "paid")
+
     @validates('status')
     def validate_status(self, key, value):
         allowed = ["pending", "approved", "paid", "cancelled", "active"]
@@ -145,22 +381,29 @@ class Booking(db.Model):
             raise ValueError(f"Invalid status. Must be one of {allowed}.")
         return value
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "tenant_id": self.tenant_id,
-            "tenant_name": self.tenant.name if self.tenant else None,
-            "property_id": self.property_id,
-            "property": self.prop.to_dict() if self.prop else None,
-            "status": self.status,
-            "start_date": self.start_date.isoformat() if self.start_date else None,
-            "end_date": self.end_date.isoformat() if self.end_date else None,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-        }
-
-
-class Payment(db.Model):
+    serializable_fields = {
+        "id": column("id"),
+        "tenant_id": column("tenant_id"),
+        "tenant_name": Field(lambda b: b.tenant.name if b.tenant else None, columns=("tenant_id",),
+                             relation="tenant", relation_columns=("id", "name")),
+        "property_id": column("property_id"),
+        "property": Field(columns=("property_id",), relation="prop", nested=True),
+        "status": column("status"),
+        "start_date": datetime_column("start_date"),
+        "end_date": datetime_column("end_date"),
+        "created_at": datetime_column("created_at"),
+        "updated_at": datetime_column("updated_at"),
+    }
+    summary_fields = ("id", "tenant_id", "tenant_name", "property_id", "property", "status",
+                      "start_date", "end_date")
+
+
+class Payment(SerializerMixin, db.Model):
     __tablename__ = "payments"
+    __table_args__ = (
+        # Idempotency-Key replays on POST /payments are scoped to the paying tenant
+        db.UniqueConstraint('tenant_id', 'idempotency_key', name='uq_payments_tenant_idempotency_key'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'), nullable=False)
@@ -170,6 +413,7 @@ class Payment(db.Model):
     payment_method = db.Column(db.String(50), nullable=False, doc="credit_card, debit_card, bank_transfer, digital_wallet")
     status = db.Column(db.String(20), nullable=False, default="pending", doc="pending, completed, failed, refunded")
     transaction_id = db.Column(db.String(255), unique=True, nullable=False)
+    idempotency_key = db.Column(db.String(255))
     paid_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -183,48 +427,65 @@ class Payment(db.Model):
             raise ValueError("Payment amount must be greater than 0.")
         return value
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "booking_id": self.booking_id,
-            "tenant_id": self.tenant_id,
-            "tenant_name": self.tenant.name if self.tenant else None,
-            "landlord_id": self.landlord_id,
-            "landlord_name": self.landlord.name if self.landlord else None,
-            "amount": str(self.amount),
-            "payment_method": self.payment_method,
-            "status": self.status,
-            "transaction_id": self.transaction_id,
-            "paid_at": self.paid_at.isoformat() if self.paid_at else None,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-        }
-
-
-class PropertyAmenity(db.Model):
+    serializable_fields = {
+        "id": column("id"),
+        "booking_id": column("booking_id"),
+        "tenant_id": column("tenant_id"),
+        "tenant_name": Field(lambda p: p.tenant.name if p.tenant else None, columns=("tenant_id",),
+                             relation="tenant", relation_columns=("id", "name")),
+        "landlord_id": column("landlord_id"),
+        "landlord_name": Field(lambda p: p.landlord.name if p.landlord else None, columns=("landlord_id",),
+                               relation="landlord", relation_columns=("id", "name")),
+        "amount": column("amount"),
+        "payment_method": column("payment_method"),
+        "status": column("status"),
+        "transaction_id": column("transaction_id"),
+        "paid_at": datetime_column("paid_at"),
+        "created_at": datetime_column("created_at"),
+    }
+    summary_fields = ("id", "booking_id", "amount", "payment_method", "status", "transaction_id", "paid_at")
+
+
+class PaymentRollup(db.Model):
+    """Per landlord, month (yyyymm, from Payment.created_at) and status: payment total and count."""
+    __tablename__ = "payment_rollups"
+
+    landlord_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    month = db.Column(db.Integer, primary_key=True, doc="yyyymm")
+    status = db.Column(db.String(20), primary_key=True)
+    amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class PropertyAmenity(SerializerMixin, db.Model):
     __tablename__ = "property_amenities"
+    __table_args__ = (
+        # ?amenity= filter probes (amenity_name, property_id) per listing row
+        db.Index('ix_property_amenities_name_property', 'amenity_name', 'property_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    property_id = db.Column(db.Integer, db.ForeignKey('properties.id'), nullable=False)
+    property_id = db.Column(db.Integer, db.ForeignKey('properties.id'), nullable=False, index=True)
     amenity_name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     included = db.Column(db.Boolean, default=True)
 
     property = db.relationship('Property', back_populates='amenities')
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "amenity_name": self.amenity_name,
-            "description": self.description,
-            "included": self.included
-        }
+    serializable_fields = {
+        "id": column("id"),
+        "amenity_name": column("amenity_name"),
+        "description": column("description"),
+        "included": column("included"),
+    }
+    summary_fields = ("id", "amenity_name", "included")
 
 
-class PropertyImage(db.Model):
+class PropertyImage(SerializerMixin, db.Model):
     __tablename__ = "property_images"
 
     id = db.Column(db.Integer, primary_key=True)
-    property_id = db.Column(db.Integer, db.ForeignKey('properties.id'), nullable=False)
+    property_id = db.Column(db.Integer, db.ForeignKey('properties.id'), nullable=False, index=True)
     image_url = db.Column(db.String, nullable=False)
     caption = db.Column(db.String)
     is_primary = db.Column(db.Boolean, default=False)
@@ -233,17 +494,69 @@ class PropertyImage(db.Model):
 
     property = db.relationship('Property', back_populates='images')
 
+    serializable_fields = {
+        "id": column("id"),
+        "image_url": column("image_url"),
+        "sizes": Field(lambda i: responsive_urls(i.image_url), columns=("image_url",)),
+        "srcset": Field(lambda i: srcset(i.image_url), columns=("image_url",)),
+        "caption": column("caption"),
+        "is_primary": column("is_primary"),
+        "sort_order": column("sort_order"),
+    }
+    summary_fields = ("id", "image_url", "sizes", "is_primary", "sort_order")
+
+
+class UploadedAsset(db.Model):
+    """An image already on Cloudinary, keyed by the SHA-256 of its bytes so identical files upload once."""
+    __tablename__ = "uploaded_assets"
+
+    sha256 = db.Column(db.String(64), primary_key=True)
+    url = db.Column(db.String, nullable=False)
+    public_id = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ImageUpload(db.Model):
+    """A spooled file waiting for the background upload pool (utils/uploads.py)."""
+    __tablename__ = "image_uploads"
+    __table_args__ = (
+        db.Index('ix_image_uploads_status_created', 'status', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    property_id = db.Column(db.Integer, db.ForeignKey('properties.id', ondelete='CASCADE'),
+                            doc="set when the upload becomes the property's image_url")
+    sha256 = db.Column(db.String(64), nullable=False)
+    spool_path = db.Column(db.String, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="processing", doc="processing, ready, failed")
+    url = db.Column(db.String)
+    public_id = db.Column(db.String(255))
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
     def to_dict(self):
         return {
             "id": self.id,
-            "image_url": self.image_url,
-            "caption": self.caption,
-            "is_primary": self.is_primary,
-            "sort_order": self.sort_order,
+            "property_id": self.property_id,
+            "status": self.status,
+            "url": self.url,
+            "public_id": self.public_id,
+            "error": self.error,
         }
 
 
-class Review(db.Model):
+class PropertyOccupancy(db.Model):
+    """One month of a property's calendar as a bitmask: bit (day - 1) set = booked."""
+    __tablename__ = "property_occupancy"
+
+    property_id = db.Column(db.Integer, db.ForeignKey('properties.id', ondelete='CASCADE'), primary_key=True)
+    month = db.Column(db.Integer, primary_key=True, doc="yyyymm")
+    booked_days = db.Column(db.Integer, nullable=False, default=0)
+
+
+class Review(SerializerMixin, db.Model):
     __tablename__ = "reviews"
 
     id = db.Column(db.Integer, primary_key=True)
@@ -266,13 +579,269 @@ class Review(db.Model):
             raise ValueError("Rating must be between 1 and 5 stars.")
         return value
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "rating": self.rating,
-            "review_text": self.review_text,
-            "landlord_reply": self.landlord_reply,
-            "is_approved": self.is_approved,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
+    serializable_fields = {
+        "id": column("id"),
+        "rating": column("rating"),
+        "review_text": column("review_text"),
+        "landlord_reply": column("landlord_reply"),
+        "is_approved": column("is_approved"),
+        "created_at": datetime_column("created_at"),
+        "updated_at": datetime_column("updated_at"),
+    }
+    summary_fields = ("id", "rating", "review_text", "created_at")
+
+
+class OutboxEmail(db.Model):
+    """
+    A transactional email waiting for server/workers/email_outbox.py.
+
+    Rows are added in the same transaction as the change that triggers
+    them, so an email is queued if and only if that change commits.
+    """
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # the worker claims due rows oldest first
+        db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    html_content = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="pending", doc="pending, sent, dead")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+
+class BookingEvent(db.Model):
+    """
+    A booking change to tell one user about, digested by server/workers/booking_digests.py.
+
+    Written by the Booking mapper events below in the same flush as the
+    change itself; booking_id is a plain column so events outlive deleted
+    bookings.
+    """
+    __tablename__ = "booking_events"
+    __table_args__ = (
+        # the digest worker reads the unprocessed backlog oldest first
+        db.Index('ix_booking_events_processed_created', 'processed_at', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipient_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    booking_id = db.Column(db.Integer, nullable=False)
+    property_id = db.Column(db.Integer, nullable=False)
+    tenant_id = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(20), nullable=False, doc="created, a new status (approved, cancelled, ...), deleted")
+    start_date = db.Column(db.Date)
+    end_date = db.Column(db.Date)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # set once the event went out in a digest, or was dead-lettered (then last_error says why)
+    processed_at = db.Column(db.DateTime)
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_error = db.Column(db.Text)
+
+
+class DigestBatch(db.Model):
+    """One multi-personalization SendGrid request sent by the digest worker, for throughput metrics."""
+    __tablename__ = "digest_batches"
+
+    id = db.Column(db.Integer, primary_key=True)
+    sent_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    events = db.Column(db.Integer, nullable=False)
+    emails = db.Column(db.Integer, nullable=False)
+    duration_ms = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(20), nullable=False, doc="sent, failed")
+
+
+# Counter-cache maintenance for Property.{booking,rating,favorite}_count / rating_avg.
+# Bookings and reviews adjust the parent row with a single relative UPDATE at flush
+# time, so concurrent writers never overwrite each other's increments.
+
+def _adjust_property(connection, property_id, **values):
+    connection.execute(
+        Property.__table__.update().where(Property.__table__.c.id == property_id).values(**values)
+    )
+
+
+@event.listens_for(Booking, 'after_insert')
+def _booking_inserted(mapper, connection, target):
+    _adjust_property(connection, target.property_id, booking_count=Property.booking_count + 1)
+    if target.status in Booking.BLOCKING_STATUSES:
+        _mark_occupancy(connection, target.property_id, target.start_date, target.end_date, booked=True)
+    _record_booking_event(connection, target, "created")
+
+
+@event.listens_for(Booking, 'after_delete')
+def _booking_deleted(mapper, connection, target):
+    _adjust_property(connection, target.property_id, booking_count=Property.booking_count - 1)
+    if target.status in Booking.BLOCKING_STATUSES:
+        _mark_occupancy(connection, target.property_id, target.start_date, target.end_date, booked=False)
+    _record_booking_event(connection, target, "deleted")
+
+
+def _previous(target, attr):
+    """An attribute's value before the pending flush."""
+    history = db.inspect(target).attrs[attr].history
+    return history.deleted[0] if history.deleted else getattr(target, attr)
+
+
+def _keep_history(*attributes):
+    """Load the old value when an expired attribute is assigned (e.g. after a commit), so _previous sees it."""
+    for attribute in attributes:
+        event.listen(attribute, 'set', lambda *args: None, active_history=True)
+
+
+_keep_history(Booking.status, Booking.property_id, Booking.start_date, Booking.end_date,
+              Payment.landlord_id, Payment.created_at, Payment.status, Payment.amount)
+
+
+@event.listens_for(Booking, 'after_update')
+def _booking_updated(mapper, connection, target):
+    old = tuple(_previous(target, attr) for attr in ('status', 'property_id', 'start_date', 'end_date'))
+    new = (target.status, target.property_id, target.start_date, target.end_date)
+    if old[0] != new[0]:
+        # the landlord hears about every status change, the tenant about decisions on their request
+        _record_booking_event(connection, target, new[0], notify_tenant=new[0] in ("approved", "cancelled"))
+    if old == new:
+        return
+    if old[0] in Booking.BLOCKING_STATUSES:
+        _mark_occupancy(connection, *old[1:], booked=False)
+    if new[0] in Booking.BLOCKING_STATUSES:
+        _mark_occupancy(connection, *new[1:], booked=True)
+
+
+def _record_booking_event(connection, target, kind, notify_tenant=False):
+    table = BookingEvent.__table__
+    values = {
+        "booking_id": target.id, "property_id": target.property_id, "tenant_id": target.tenant_id,
+        "kind": kind, "start_date": target.start_date, "end_date": target.end_date, "created_at": datetime.utcnow(),
+    }
+    landlord = db.select(Property.landlord_id).where(Property.id == target.property_id).scalar_subquery()
+    connection.execute(table.insert().values(recipient_id=landlord, **values))
+    if notify_tenant:
+        connection.execute(table.insert().values(recipient_id=target.tenant_id, **values))
+
+
+# Occupancy bitmaps: blocking bookings of a property never overlap (utils/bookings.py),
+# so setting and clearing a booking's bits is exact and needs no re-scan of other rows.
+# Writers hold the property row lock while they touch its months, which is what lets
+# the reconciler (workers/reconcile_counters.py) rebuild them without losing bits.
+
+def _mark_occupancy(connection, property_id, start, end, booked):
+    table = PropertyOccupancy.__table__
+    if connection.dialect.name == "postgresql":
+        connection.execute(db.select(Property.id).where(Property.id == property_id).with_for_update())
+    for month, bits in month_bits(start, end).items():
+        if booked:
+            upsert(connection, table, {"property_id": property_id, "month": month, "booked_days": bits},
+                   index_elements=["property_id", "month"],
+                   set_={"booked_days": table.c.booked_days.op('|')(bits)})
+        else:
+            connection.execute(
+                table.update()
+                .where(table.c.property_id == property_id, table.c.month == month)
+                .values(booked_days=table.c.booked_days.op('&')(~bits & 0x7FFFFFFF))
+            )
+
+
+def _roll_payment(connection, landlord_id, created_at, status, amount, sign):
+    table = PaymentRollup.__table__
+    if connection.dialect.name == "postgresql":
+        # held like the property row above, so the reconciler's rebuild cannot drop this change
+        connection.execute(db.select(User.id).where(User.id == landlord_id).with_for_update())
+    amount = Decimal(str(amount)) * sign
+    upsert(connection, table,
+           {"landlord_id": landlord_id, "month": month_key(created_at), "status": status, "amount": amount, "count": sign},
+           index_elements=["landlord_id", "month", "status"],
+           set_={"amount": table.c.amount + amount, "count": table.c.count + sign})
+
+
+@event.listens_for(Payment, 'after_insert')
+def _payment_inserted(mapper, connection, target):
+    _roll_payment(connection, target.landlord_id, target.created_at, target.status, target.amount, 1)
+
+
+@event.listens_for(Payment, 'after_delete')
+def _payment_deleted(mapper, connection, target):
+    _roll_payment(connection, target.landlord_id, target.created_at, target.status, target.amount, -1)
+
+
+@event.listens_for(Payment, 'after_update')
+def _payment_updated(mapper, connection, target):
+    # e.g. completed -> refunded moves the amount between two status buckets of the same month
+    attrs = ('landlord_id', 'created_at', 'status', 'amount')
+    old = tuple(_previous(target, attr) for attr in attrs)
+    new = tuple(getattr(target, attr) for attr in attrs)
+    if old != new:
+        _roll_payment(connection, *old, -1)
+        _roll_payment(connection, *new, 1)
+
+
+def _rating_change(old_rating, new_rating, count_delta):
+    """SQL for the running average after removing old_rating and/or adding new_rating."""
+    total = func.coalesce(Property.rating_avg, 0) * Property.rating_count - (old_rating or 0) + (new_rating or 0)
+    new_count = Property.rating_count + count_delta
+    return {
+        "rating_count": new_count,
+        "rating_avg": db.case((new_count > 0, total * 1.0 / new_count), else_=None),
+    }
+
+
+@event.listens_for(Review, 'after_insert')
+def _review_inserted(mapper, connection, target):
+    _adjust_property(connection, target.property_id, **_rating_change(None, target.rating, 1))
+
+
+@event.listens_for(Review, 'after_delete')
+def _review_deleted(mapper, connection, target):
+    _adjust_property(connection, target.property_id, **_rating_change(target.rating, None, -1))
+
+
+@event.listens_for(Review, 'after_update')
+def _review_updated(mapper, connection, target):
+    history = db.inspect(target).attrs.rating.history
+    if history.deleted and history.added:
+        _adjust_property(connection, target.property_id, **_rating_change(history.deleted[0], history.added[0], 0))
+
+
+def _bump(target, attr, delta):
+    current = target.__dict__.get(attr)
+    if target.id is None:
+        # not inserted yet: a plain value is safe
+        setattr(target, attr, (current or 0) + delta)
+    elif isinstance(current, ClauseElement):
+        setattr(target, attr, current + delta)
+    else:
+        # assign a SQL expression so the flush emits "SET col = col + n" rather than a stale absolute value
+        setattr(target, attr, getattr(Property, attr) + delta)
+
+
+# The JWT user loader trusts cached identities and fresh token claims; make this
+# worker re-check a user whose claims changed or who was deleted.
+
+_keep_history(*(getattr(User, claim) for claim in CLAIMS))
+
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    if any(_previous(target, claim) != getattr(target, claim) for claim in CLAIMS):
+        identity_cache.invalidate(target.id)
+
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    identity_cache.invalidate(target.id)
+
+
+@event.listens_for(Property.favorited_by, 'append')
+def _favorite_added(target, value, initiator):
+    _bump(target, 'favorite_count', 1)
+
+
+@event.listens_for(Property.favorited_by, 'remove')
+def _favorite_removed(target, value, initiator):
+    _bump(target, 'favorite_count', -1)
@@ -1,6 +1,9 @@
 # seed.py
 from server.app import app, db
-from server.models import User, Property, PropertyImage, PropertyAmenity, Booking, Payment, Review
+from server.models import (
+    User, Property, PropertyImage, PropertyAmenity, Booking, Payment, Review, PaymentRollup, PropertyOccupancy,
+)
+from server.utils.search import rebuild_search_index
 from datetime import datetime
 
 def seed_database():
@@ -8,7 +11,10 @@ def seed_database():
     with app.app_context():
         # Clear existing data
         db.session.query(Review).delete()
+        # bulk deletes skip the mapper events, so clear the tables they maintain too
+        db.session.query(PaymentRollup).delete()
         db.session.query(Payment).delete()
+        db.session.query(PropertyOccupancy).delete()
         db.session.query(Booking).delete()
         db.session.query(PropertyAmenity).delete()
         db.session.query(PropertyImage).delete()
@@ -284,6 +290,7 @@ def seed_database():
         ]
 
         db.session.add_all(reviews)
+        rebuild_search_index(db.session)
         db.session.commit()
 
         print("✅ Database seeded successfully with 14 properties, images, and amenities!")
@@ -47,7 +47,15 @@ def get_swagger_spec():
                 "get": {
                     "tags": ["Properties"],
                     "summary": "Get All Properties",
-                    "description": "Retrieve a list of all rental properties",
+                    "description": "Retrieve a page of rental properties, newest first. The next page cursor is returned in the X-Next-Cursor and Link headers.",
+                    "parameters": [
+                        {"name": "limit", "in": "query", "type": "integer", "description": "Page size (default 50, max 200)"},
+                        {"name": "after", "in": "query", "type": "string", "description": "Cursor from the previous page's X-Next-Cursor header"},
+                        {"name": "fields", "in": "query", "type": "string", "description": "Comma-separated fields, or the 'summary'/'detail' tier (default summary: counters instead of booking/favorite id lists)"},
+                        {"name": "include", "in": "query", "type": "string", "description": "Extra comma-separated fields to add to the selected tier, e.g. amenities"},
+                        {"name": "available_from", "in": "query", "type": "string", "format": "date", "description": "Only properties with no approved, active or paid booking overlapping available_from..available_to"},
+                        {"name": "available_to", "in": "query", "type": "string", "format": "date", "description": "Last day of the stay (inclusive); defaults to available_from"}
+                    ],
                     "responses": {
                         "200": {
                             "description": "List of properties retrieved successfully",
@@ -89,6 +97,76 @@ def get_swagger_spec():
                     }
                 }
             },
+            "/properties/search": {
+                "get": {
+                    "tags": ["Properties"],
+                    "summary": "Search Properties",
+                    "description": "Full-text search over title, description and location, best match first",
+                    "parameters": [
+                        {"name": "q", "in": "query", "required": True, "type": "string", "description": "Search terms"},
+                        {"name": "limit", "in": "query", "type": "integer", "description": "Page size (default 50, max 200)"},
+                        {"name": "after", "in": "query", "type": "string", "description": "Cursor from the previous page's X-Next-Cursor header"}
+                    ],
+                    "responses": {
+                        "200": {"description": "Ranked list of matching properties"},
+                        "400": {"description": "Missing q"}
+                    }
+                }
+            },
+            "/properties/nearby": {
+                "get": {
+                    "tags": ["Properties"],
+                    "summary": "Properties Near a Point",
+                    "description": "Properties within radius_km of (lat, lng), nearest first, each with distance_km. Accepts the same filters as GET /properties.",
+                    "parameters": [
+                        {"name": "lat", "in": "query", "required": True, "type": "number"},
+                        {"name": "lng", "in": "query", "required": True, "type": "number"},
+                        {"name": "radius_km", "in": "query", "type": "number", "description": "Search radius (default 5, max 100)"},
+                        {"name": "limit", "in": "query", "type": "integer", "description": "Maximum results (default 50, max 200)"}
+                    ],
+                    "responses": {
+                        "200": {"description": "Distance-sorted list of properties"},
+                        "400": {"description": "Invalid coordinates or radius"}
+                    }
+                }
+            },
+            "/properties/{property_id}/calendar": {
+                "get": {
+                    "tags": ["Properties"],
+                    "summary": "Property Availability Calendar",
+                    "description": "Booked and free days between from and to (inclusive). Days held by approved, active or paid bookings are booked.",
+                    "parameters": [
+                        {"name": "property_id", "in": "path", "required": True, "type": "integer"},
+                        {"name": "from", "in": "query", "type": "string", "format": "date", "description": "First day (default today)"},
+                        {"name": "to", "in": "query", "type": "string", "format": "date", "description": "Last day (default from + 89 days, range at most 366 days)"}
+                    ],
+                    "responses": {
+                        "200": {"description": "property_id, from, to, booked and free date lists"},
+                        "400": {"description": "Invalid date range"},
+                        "404": {"description": "Property not found"}
+                    }
+                }
+            },
+            "/properties/{property_id}/images": {
+                "post": {
+                    "tags": ["Properties"],
+                    "summary": "Add Gallery Images",
+                    "description": "Upload several images in one multipart request. Files are sent to Cloudinary in parallel; identical files are stored once. Each image is returned with responsive-size URLs (sizes, srcset).",
+                    "consumes": ["multipart/form-data"],
+                    "parameters": [
+                        {"name": "property_id", "in": "path", "required": True, "type": "integer"},
+                        {"name": "images", "in": "formData", "required": True, "type": "file", "description": "Repeat for each image (default max 20)"},
+                        {"name": "caption", "in": "formData", "type": "string", "description": "Optional, repeated in the same order as images"},
+                        {"name": "primary", "in": "formData", "type": "integer", "description": "Index of the new primary image (default: the first, if the property has none)"}
+                    ],
+                    "responses": {
+                        "201": {"description": "The created images"},
+                        "400": {"description": "No files, too many files or non-image files"},
+                        "404": {"description": "Property not found"},
+                        "502": {"description": "Some files could not be uploaded; nothing was added"}
+                    }
+                }
+            },
             "/properties/{property_id}": {
                 "get": {
                     "tags": ["Properties"],
@@ -175,7 +253,7 @@ def get_swagger_spec():
                 "post": {
                     "tags": ["Authentication"],
                     "summary": "User Login",
-                    "description": "Authenticate user and return JWT token",
+                    "description": "Authenticate user and return JWT token. The token carries the user's name, email and role as claims.",
                     "parameters": [
                         {
                             "name": "body",
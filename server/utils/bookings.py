@@ -0,0 +1,141 @@
+from datetime import date
+
+from sqlalchemy import and_, select, text
+from sqlalchemy.orm import aliased
+
+from server.models import Booking, Property
+
+BLOCKING_STATUSES = Booking.BLOCKING_STATUSES
+
+# pg_advisory_xact_lock key serializing the workers that try to add the constraint at boot
+CONSTRAINT_LOCK_KEY = 0x6E6F6F76  # "noov"
+
+POSTGRES_EXCLUSION_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    """
+    ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap
+    EXCLUDE USING gist (property_id WITH =, daterange(start_date, end_date, '[]') WITH &&)
+    WHERE (status IN ('approved', 'active', 'paid'))
+    """,
+]
+
+
+class InvalidBookingDates(ValueError):
+    """Raised for unparseable or inverted booking dates."""
+
+
+class BookingConflict(Exception):
+    """Raised when requested dates overlap a blocking booking of the same property."""
+
+    def __init__(self, booking):
+        super().__init__(
+            f"Property is already booked from {booking.start_date.isoformat()} to {booking.end_date.isoformat()}."
+        )
+        self.booking = booking
+
+
+def parse_booking_dates(start_value, end_value):
+    """Parse ISO start/end dates (or pass date objects through); both ends are inclusive."""
+    try:
+        start = start_value if isinstance(start_value, date) else date.fromisoformat(start_value)
+        end = end_value if isinstance(end_value, date) else date.fromisoformat(end_value)
+    except (TypeError, ValueError):
+        raise InvalidBookingDates("Dates must be in YYYY-MM-DD format")
+    if end < start:
+        raise InvalidBookingDates("end_date must be on or after start_date")
+    return start, end
+
+
+def find_overlapping_bookings(connection):
+    """(earlier_id, later_id) pairs of blocking bookings of one property whose dates overlap."""
+    first, second = aliased(Booking), aliased(Booking)
+    return connection.execute(
+        select(first.id, second.id)
+        .join(second, and_(
+            second.property_id == first.property_id,
+            second.id > first.id,
+            second.start_date <= first.end_date,
+            second.end_date >= first.start_date,
+        ))
+        .where(first.status.in_(BLOCKING_STATUSES), second.status.in_(BLOCKING_STATUSES))
+        .order_by(first.id, second.id)
+    ).all()
+
+
+def init_booking_constraints(db):
+    """
+    On PostgreSQL, let the database itself reject overlapping blocking bookings.
+
+    Runs at boot in every worker: an advisory lock lets one add the
+    constraint while the others wait and then find it in place. Existing
+    overlapping bookings would make the ALTER fail, so they are reported
+    and the constraint is left out (the application-level check still
+    applies) until `python -m server.workers.booking_overlaps` resolves
+    them. Any other failure is reported too; it never stops the app.
+    """
+    if db.engine.dialect.name != "postgresql":
+        return
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CONSTRAINT_LOCK_KEY})
+            exists = conn.execute(text("SELECT 1 FROM pg_constraint WHERE conname = 'bookings_no_overlap'")).first()
+            if exists:
+                return
+            overlaps = find_overlapping_bookings(conn)
+            if overlaps:
+                print(f"Booking constraint: not adding bookings_no_overlap, {len(overlaps)} pairs of bookings overlap "
+                      f"(e.g. {', '.join(f'#{a}/#{b}' for a, b in overlaps[:5])}); "
+                      f"review them with python -m server.workers.booking_overlaps")
+                return
+            for statement in POSTGRES_EXCLUSION_DDL:
+                conn.execute(text(statement))
+    except Exception as exc:
+        print(f"Booking constraint: could not add bookings_no_overlap: {type(exc).__name__}: {exc}")
+
+
+def lock_property(session, property_id):
+    """
+    Serialize booking writes for one property until the transaction ends.
+
+    PostgreSQL takes a row lock on the property. SQLite has no row locks, so
+    a no-op UPDATE takes the database write lock up front; a concurrent
+    request blocks there until this one commits, then re-checks against the
+    committed rows. Returns False if the property does not exist.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        locked = session.execute(
+            select(Property.id).where(Property.id == property_id).with_for_update()
+        ).scalar()
+        return locked is not None
+    result = session.execute(text("UPDATE properties SET id = id WHERE id = :id"), {"id": property_id})
+    return result.rowcount > 0
+
+
+def find_overlap(session, property_id, start, end, exclude_booking_id=None):
+    """
+    Return a blocking booking of `property_id` that overlaps [start, end], or None.
+
+    A plain range test over ix_bookings_property_dates: it does not assume
+    existing bookings are disjoint, which rows written before the check
+    existed (or without the PostgreSQL constraint) need not be.
+    """
+    query = (
+        select(Booking)
+        .where(
+            Booking.property_id == property_id,
+            Booking.start_date <= end,
+            Booking.end_date >= start,
+            Booking.status.in_(BLOCKING_STATUSES),
+        )
+        .order_by(Booking.start_date, Booking.id)
+        .limit(1)
+    )
+    if exclude_booking_id is not None:
+        query = query.where(Booking.id != exclude_booking_id)
+    return session.execute(query).scalar()
+
+
+def ensure_available(session, property_id, start, end, exclude_booking_id=None):
+    conflict = find_overlap(session, property_id, start, end, exclude_booking_id)
+    if conflict is not None:
+        raise BookingConflict(conflict)
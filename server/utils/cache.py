@@ -0,0 +1,247 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import request, make_response, Response
+
+from server.utils.encoding import negotiated_mimetype
+
+# Headers replayed on a cache hit; everything else is rebuilt by Flask
+CACHED_HEADERS = ("X-Next-Cursor", "Link", "ETag", "Last-Modified", "Vary")
+
+
+class LRUCache:
+    """In-process LRU with a per-entry TTL and a bound on the number of entries."""
+
+    def __init__(self, max_entries=1024, ttl=5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """Shared tier in a local SQLite file, visible to every worker on the host."""
+
+    def __init__(self, path, ttl=300):
+        self.path = path
+        self.ttl = ttl
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # gunicorn forks after import, so each worker opens its own connection
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value FROM response_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value):
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl),
+            )
+            conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, key):
+        with self._lock:
+            self._connection().execute("DELETE FROM response_cache WHERE key = ?", (key,))
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            self._connection().execute(
+                "DELETE FROM response_cache WHERE key >= ? AND key < ?", (prefix, prefix + "\U0010ffff")
+            )
+
+
+class RedisBackend:
+    """Shared tier on anything speaking the Redis get/set/delete/scan commands."""
+
+    def __init__(self, client, ttl=300, namespace="rentease:"):
+        self.client = client
+        self.ttl = ttl
+        self.namespace = namespace
+
+    def get(self, key):
+        return self.client.get(self.namespace + key)
+
+    def set(self, key, value):
+        self.client.set(self.namespace + key, value, ex=self.ttl)
+
+    def delete(self, key):
+        self.client.delete(self.namespace + key)
+
+    def delete_prefix(self, prefix):
+        keys = list(self.client.scan_iter(match=self.namespace + prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def shared_backend_from_url(url, ttl):
+    """Build the optional shared tier from CACHE_SHARED_URL (sqlite:///path or redis://...)."""
+    if not url:
+        return None
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):], ttl=ttl)
+    if url.startswith(("redis://", "rediss://")):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_SHARED_URL is a redis:// URL but the redis package is not installed")
+        return RedisBackend(redis.Redis.from_url(url), ttl=ttl)
+    raise ValueError(f"Unsupported CACHE_SHARED_URL: {url}")
+
+
+def _pack(response):
+    meta = {
+        "status": response.status_code,
+        "mimetype": response.mimetype,
+        "headers": {h: response.headers[h] for h in CACHED_HEADERS if h in response.headers},
+    }
+    return json.dumps(meta).encode() + b"\n" + response.get_data()
+
+
+def _unpack(value):
+    meta, body = value.split(b"\n", 1)
+    meta = json.loads(meta)
+    return Response(body, status=meta["status"], mimetype=meta["mimetype"], headers=meta["headers"])
+
+
+def query_string_key():
+    """The request's query params in a canonical order, for use in cache keys."""
+    return urlencode(sorted(request.args.items(multi=True)))
+
+
+class ResponseCache:
+    """
+    Two-tier cache for serialized GET responses.
+
+    Reads check the worker's LRU first, then the shared tier (promoting hits
+    into the LRU). Writes invalidate keys in both tiers of the writing
+    worker; other workers' LRU entries expire within the (short) local TTL.
+    """
+
+    def __init__(self, local, shared=None):
+        self.local = local
+        self.shared = shared
+        self.stats = {"local_hits": 0, "shared_hits": 0, "misses": 0, "sets": 0, "invalidations": 0}
+
+    @classmethod
+    def from_config(cls, config):
+        local = LRUCache(max_entries=config["CACHE_MAX_ENTRIES"], ttl=config["CACHE_LOCAL_TTL"])
+        return cls(local, shared_backend_from_url(config["CACHE_SHARED_URL"], config["CACHE_SHARED_TTL"]))
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is not None:
+            self.stats["local_hits"] += 1
+            return value
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.stats["shared_hits"] += 1
+                self.local.set(key, value)
+                return value
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, key, value):
+        self.stats["sets"] += 1
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+
+    def invalidate(self, *keys):
+        for key in keys:
+            self.stats["invalidations"] += 1
+            self.local.delete(key)
+            if self.shared is not None:
+                self.shared.delete(key)
+
+    def invalidate_prefix(self, *prefixes):
+        for prefix in prefixes:
+            self.stats["invalidations"] += 1
+            self.local.delete_prefix(prefix)
+            if self.shared is not None:
+                self.shared.delete_prefix(prefix)
+
+    def metrics(self):
+        lookups = self.stats["local_hits"] + self.stats["shared_hits"] + self.stats["misses"]
+        hits = lookups - self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+            "local_entries": len(self.local),
+            "shared_backend": type(self.shared).__name__ if self.shared is not None else None,
+            "pid": os.getpid(),
+        }
+
+    def cached(self, key_func):
+        """Cache a view's 200 responses under key_func(**view_kwargs)."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                key = f"{key_func(**kwargs)}|{negotiated_mimetype()}"
+                value = self.get(key)
+                if value is not None:
+                    response = _unpack(value)
+                    response.headers["X-Cache"] = "HIT"
+                    return response
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200:
+                    self.set(key, _pack(response))
+                response.headers["X-Cache"] = "MISS"
+                return response
+            return wrapper
+        return decorator
@@ -0,0 +1,53 @@
+import hashlib
+from datetime import timezone
+from functools import wraps
+
+from flask import request, make_response, Response
+
+
+class Validators:
+    """A strong ETag and Last-Modified pair derived from a cheap aggregate query."""
+
+    def __init__(self, *state, last_modified=None):
+        # the representation also depends on the query string (fields, page) and Accept
+        parts = [str(part) for part in state] + [request.full_path, request.headers.get("Accept", "")]
+        self.etag = hashlib.sha1("|".join(parts).encode()).hexdigest()
+        self.last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0) if last_modified else None
+
+    def matches(self):
+        """True when the client's If-None-Match / If-Modified-Since says its copy is current."""
+        if request.if_none_match:
+            return request.if_none_match.contains(self.etag)
+        if request.if_modified_since and self.last_modified:
+            return self.last_modified <= request.if_modified_since
+        return False
+
+    def apply(self, response):
+        response.set_etag(self.etag)
+        if self.last_modified:
+            response.last_modified = self.last_modified
+        return response
+
+
+def conditional(validators_func):
+    """
+    Answer GETs with 304 Not Modified when validators_func(**view_kwargs) matches.
+
+    validators_func should run a single aggregate (e.g. max(updated_at), count)
+    and return Validators, or None to let the view handle the request (404s).
+    The check happens before the view runs, so a 304 loads and serializes nothing.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            validators = validators_func(**kwargs)
+            if validators is None:
+                return view(*args, **kwargs)
+            if validators.matches():
+                return validators.apply(Response(status=304))
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                validators.apply(response)
+            return response
+        return wrapper
+    return decorator
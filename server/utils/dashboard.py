@@ -0,0 +1,82 @@
+from sqlalchemy import func
+
+from server.models import Booking, Property, PropertyOccupancy, User
+from server.utils.income import income_by_status
+from server.utils.occupancy import month_bits, month_key
+
+PENDING_APPROVALS_LIMIT = 20
+
+
+def _booking_counts(session, landlord_id):
+    rows = (
+        session.query(Booking.status, func.count(Booking.id))
+        .join(Property, Booking.property_id == Property.id)
+        .filter(Property.landlord_id == landlord_id)
+        .group_by(Booking.status)
+    )
+    return dict(rows.all())
+
+
+def _occupancy(session, landlord_id, start, end):
+    """Share of days in [start, end] held by blocking bookings, per property, from the calendar bitmaps."""
+    window = month_bits(start, end)
+    days = (end - start).days + 1
+    booked = {}
+    rows = (
+        session.query(PropertyOccupancy.property_id, PropertyOccupancy.month, PropertyOccupancy.booked_days)
+        .join(Property, PropertyOccupancy.property_id == Property.id)
+        .filter(Property.landlord_id == landlord_id,
+                PropertyOccupancy.month.between(month_key(start), month_key(end)))
+    )
+    for property_id, month, bits in rows:
+        booked[property_id] = booked.get(property_id, 0) + bin(bits & window.get(month, 0)).count("1")
+
+    properties = session.query(Property.id, Property.title).filter(Property.landlord_id == landlord_id).order_by(Property.id)
+    return [
+        {
+            "property_id": property_id,
+            "title": title,
+            "booked_days": booked.get(property_id, 0),
+            "occupancy_rate": round(booked.get(property_id, 0) / days, 4),
+        }
+        for property_id, title in properties
+    ]
+
+
+def _pending_approvals(session, landlord_id):
+    rows = (
+        session.query(Booking.id, Booking.property_id, Booking.tenant_id, User.name,
+                      Booking.start_date, Booking.end_date, Booking.created_at)
+        .join(Property, Booking.property_id == Property.id)
+        .join(User, Booking.tenant_id == User.id)
+        .filter(Property.landlord_id == landlord_id, Booking.status == "pending")
+        .order_by(Booking.created_at, Booking.id)
+        .limit(PENDING_APPROVALS_LIMIT)
+    )
+    return [
+        {"id": b_id, "property_id": property_id, "tenant_id": tenant_id, "tenant_name": name,
+         "start_date": start_date, "end_date": end_date, "created_at": created_at}
+        for b_id, property_id, tenant_id, name, start_date, end_date, created_at in rows
+    ]
+
+
+def landlord_dashboard(session, landlord_id, start, end):
+    """
+    Everything the landlord dashboard shows, in five grouped queries.
+
+    Occupancy covers [start, end] (both inclusive); the other sections are
+    all-time. pending_approvals lists the oldest pending bookings first.
+    """
+    counts = _booking_counts(session, landlord_id)
+    return {
+        "landlord_id": landlord_id,
+        "from": start,
+        "to": end,
+        "bookings_by_status": counts,
+        "pending_approvals": {
+            "count": counts.get("pending", 0),
+            "oldest": _pending_approvals(session, landlord_id),
+        },
+        "occupancy": _occupancy(session, landlord_id, start, end),
+        "income": income_by_status(session, landlord_id),
+    }
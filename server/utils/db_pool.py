@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+from collections import deque
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import NullPool, QueuePool
+
+DB_POOL_MODES = ("queue", "pgbouncer")
+WAIT_SAMPLES = 1000
+
+
+class PoolMetrics:
+    """
+    Connection checkout timings of this process, for GET /metrics/db-pool.
+
+    Keeps running totals plus the last WAIT_SAMPLES waits for percentiles.
+    Counters start over in each process, so gunicorn workers forked after
+    import report only their own traffic.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.recent = deque(maxlen=WAIT_SAMPLES)
+
+    def record(self, seconds, timed_out=False):
+        with self._lock:
+            if self.pid != os.getpid():
+                self._reset()
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.recent.append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            if self.pid != os.getpid():
+                self._reset()
+            recent = sorted(self.recent)
+
+        def percentile(p):
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 3) if recent else None
+
+        return {
+            "pid": self.pid,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms": {
+                "avg": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else None,
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": round(self.wait_max * 1000, 3),
+                "samples": len(recent),
+            },
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedPoolMixin:
+    """Times every checkout, including waiting for a free slot and opening a new connection."""
+
+    checked_out = 0
+
+    def _do_return_conn(self, record):
+        self.checked_out -= 1
+        super()._do_return_conn(record)
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeout:
+            pool_metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.record(time.perf_counter() - started)
+        self.checked_out += 1
+        return record
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedNullPool(TimedPoolMixin, NullPool):
+    pass
+
+
+def engine_options(database_uri, mode="queue", pool_size=5, max_overflow=5, pool_timeout=10,
+                   pool_recycle=1800, pool_pre_ping=True):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for the DB_POOL_* settings.
+
+    "queue" keeps pool_size connections per worker process, plus up to
+    max_overflow more during spikes; a checkout waits pool_timeout seconds
+    for a free one before failing. pre-ping and recycle replace connections
+    the server dropped, e.g. across a PostgreSQL restart.
+
+    "pgbouncer" is for a pgbouncer in transaction pooling mode: pgbouncer
+    does the pooling, so each checkout opens a client connection to it and
+    closes it on return (NullPool), and no session state such as prepared
+    statements outlives a transaction. psycopg2 never prepares server-side;
+    psycopg 3 (SQLAlchemy 2.1's default for postgresql://) is told not to.
+    """
+    if mode not in DB_POOL_MODES:
+        raise ValueError(f"Unsupported DB_POOL_MODE {mode!r}. Must be one of {list(DB_POOL_MODES)}")
+    if database_uri in ("sqlite://", "sqlite:///:memory:"):
+        return {}  # in-memory SQLite needs its single StaticPool connection
+    if mode == "pgbouncer":
+        options = {"poolclass": TimedNullPool}
+        if make_url(database_uri).get_dialect().driver == "psycopg":
+            options["connect_args"] = {"prepare_threshold": None}
+        return options
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+        "pool_recycle": pool_recycle,
+        "pool_pre_ping": pool_pre_ping,
+    }
+
+
+def pool_status(engine):
+    """Checked-out/overflow connections of this process's pool plus its checkout timings."""
+    pool = engine.pool
+    status = {"pool": type(pool).__name__, "checked_out": getattr(pool, "checked_out", None)}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # negative while fewer than `size` connections have been opened
+            "overflow": pool.overflow(),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+        })
+    return {**status, **pool_metrics.snapshot()}
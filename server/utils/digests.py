@@ -0,0 +1,199 @@
+import time
+from collections import defaultdict
+from datetime import datetime
+from html import escape
+
+from sqlalchemy import func, select
+
+from server.config import Config
+from server.models import BookingEvent, DigestBatch, Property, User
+
+MAX_EVENTS_PER_WINDOW = 20000
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+
+EVENT_TEXT = {
+    "created": "New booking request",
+    "approved": "Booking approved",
+    "cancelled": "Booking cancelled",
+    "active": "Booking paid and active",
+    "paid": "Booking paid",
+    "pending": "Booking moved back to pending",
+    "deleted": "Booking withdrawn",
+}
+
+# one shared body; each recipient's personalization fills in -name- and -digest-
+DIGEST_SUBJECT = "Your RentEase booking activity"
+DIGEST_HTML = "<h2>Hi -name-,</h2><p>Here is what happened with your bookings:</p>-digest-<p>RentEase Team</p>"
+
+
+def claim_events(session, now, limit=MAX_EVENTS_PER_WINDOW):
+    """Unprocessed events up to `now`, oldest first; locked against other workers on PostgreSQL."""
+    query = (
+        select(BookingEvent)
+        .where(BookingEvent.processed_at.is_(None), BookingEvent.created_at <= now)
+        .order_by(BookingEvent.created_at, BookingEvent.id)
+        .limit(limit)
+    )
+    if session.get_bind().dialect.name == "postgresql":
+        query = query.with_for_update(skip_locked=True)
+    return session.execute(query).scalars().all()
+
+
+def _digest_html(events, titles, tenants, max_items):
+    items = []
+    for event in events[:max_items]:
+        title = escape(titles.get(event.property_id) or f"property #{event.property_id}")
+        tenant = escape(tenants.get(event.tenant_id) or f"tenant #{event.tenant_id}")
+        items.append(
+            f"<li>{EVENT_TEXT.get(event.kind, event.kind)}: {title}, {event.start_date} to {event.end_date} "
+            f"({tenant}, booking #{event.booking_id})</li>"
+        )
+    if len(events) > max_items:
+        items.append(f"<li>and {len(events) - max_items} more</li>")
+    return f"<ul>{''.join(items)}</ul>"
+
+
+def build_digests(session, events, max_items):
+    """
+    Group events per recipient into SendGrid personalizations.
+
+    Returns [(personalization, recipient's events)]; names are loaded in
+    three IN queries however many events there are. Events whose recipient
+    no longer exists get personalization None.
+    """
+    by_recipient = defaultdict(list)
+    for event in events:
+        by_recipient[event.recipient_id].append(event)
+    users = {
+        u.id: u for u in session.query(User.id, User.name, User.email).filter(User.id.in_(by_recipient))
+    } if by_recipient else {}
+    titles = dict(session.query(Property.id, Property.title).filter(Property.id.in_({e.property_id for e in events})))
+    tenants = dict(session.query(User.id, User.name).filter(User.id.in_({e.tenant_id for e in events})))
+
+    digests = []
+    for recipient_id, recipient_events in by_recipient.items():
+        user = users.get(recipient_id)
+        if user is None:
+            digests.append((None, recipient_events))
+            continue
+        digests.append(({
+            "to": [{"email": user.email, "name": user.name}],
+            "subject": f"{DIGEST_SUBJECT} ({len(recipient_events)} update{'s' if len(recipient_events) != 1 else ''})",
+            "substitutions": {
+                "-name-": escape(user.name),
+                "-digest-": _digest_html(recipient_events, titles, tenants, max_items),
+            },
+        }, recipient_events))
+    return digests
+
+
+def digest_payload(personalizations):
+    """A single mail/send body carrying one personalization per recipient."""
+    return {
+        "from": {"email": Config.SENDGRID_FROM_EMAIL},
+        "subject": DIGEST_SUBJECT,
+        "content": [{"type": "text/html", "value": DIGEST_HTML}],
+        "personalizations": personalizations,
+    }
+
+
+def _send_batch(session, client, chunk, now, max_attempts, stats):
+    """
+    Send one batch of (personalization, events) and record the outcome on its events.
+
+    A 4xx other than 429 rejects the whole request for one bad
+    personalization (e.g. an invalid address), so the batch is split in
+    halves until the bad recipients are isolated and dead-lettered; the
+    rest still get their digest. Other failures leave the events for the
+    next window, up to max_attempts windows each.
+    """
+    chunk_events = [event for _, recipient_events in chunk for event in recipient_events]
+    started = time.perf_counter()
+    try:
+        status, error = client.send(digest_payload([p for p, _ in chunk]))
+    except Exception as exc:
+        status, error = None, f"{type(exc).__name__}: {exc}"
+    session.add(DigestBatch(
+        sent_at=now, events=len(chunk_events), emails=len(chunk),
+        duration_ms=(time.perf_counter() - started) * 1000, status="failed" if error else "sent",
+    ))
+    stats["batches"] += 1
+    if error is None:
+        for event in chunk_events:
+            event.processed_at = now
+            event.last_error = None
+        stats["events"] += len(chunk_events)
+        stats["emails"] += len(chunk)
+        return
+
+    stats["failed_batches"] += 1
+    error = f"{status}: {error}" if status else error
+    print(f"Booking digests: batch of {len(chunk)} failed: {error}")
+    retryable = status is None or status == 429 or status >= 500
+    if not retryable and len(chunk) > 1:
+        middle = len(chunk) // 2
+        _send_batch(session, client, chunk[:middle], now, max_attempts, stats)
+        _send_batch(session, client, chunk[middle:], now, max_attempts, stats)
+        return
+    for event in chunk_events:
+        event.attempts += 1
+        event.last_error = error
+        if not retryable or event.attempts >= max_attempts:
+            event.processed_at = now
+            stats["dead_lettered"] += 1
+
+
+def send_digests(session, client, events, now, batch_size=SENDGRID_MAX_PERSONALIZATIONS, max_items=20,
+                 max_attempts=5):
+    """
+    Send one digest per recipient, batch_size recipients per SendGrid request.
+
+    Events of a batch are marked processed only when SendGrid accepts it;
+    a failed batch stays in the backlog for the next window, and its events
+    are dead-lettered (processed, with last_error) after max_attempts
+    tries or a rejection of their own recipient. Each request is recorded
+    as a DigestBatch row. The caller commits.
+    """
+    batch_size = min(batch_size, SENDGRID_MAX_PERSONALIZATIONS)
+    digests = build_digests(session, events, max_items)
+    for personalization, recipient_events in digests:
+        if personalization is None:
+            for event in recipient_events:
+                event.processed_at = now
+
+    deliverable = [d for d in digests if d[0] is not None]
+    stats = {"events": 0, "emails": 0, "batches": 0, "failed_batches": 0, "dead_lettered": 0}
+    for offset in range(0, len(deliverable), batch_size):
+        _send_batch(session, client, deliverable[offset:offset + batch_size], now, max_attempts, stats)
+    return stats
+
+
+def digest_metrics(session, since, now=None):
+    """Throughput since `since`: events/s, emails per batch, and the current backlog."""
+    now = now or datetime.utcnow()
+    totals = {
+        status: (batches, events, emails)
+        for status, batches, events, emails in session.query(
+            DigestBatch.status, func.count(DigestBatch.id), func.sum(DigestBatch.events), func.sum(DigestBatch.emails)
+        ).filter(DigestBatch.sent_at >= since).group_by(DigestBatch.status)
+    }
+    batches, events, emails = totals.get("sent", (0, 0, 0))
+    backlog, oldest = session.query(func.count(BookingEvent.id), func.min(BookingEvent.created_at)).filter(
+        BookingEvent.processed_at.is_(None)
+    ).one()
+    dead_lettered = session.query(func.count(BookingEvent.id)).filter(
+        BookingEvent.processed_at >= since, BookingEvent.last_error.isnot(None)
+    ).scalar()
+    seconds = max((now - since).total_seconds(), 1)
+    return {
+        "since": since,
+        "batches": batches,
+        "failed_batches": totals.get("failed", (0,))[0],
+        "events": events,
+        "emails": emails,
+        "events_per_second": round(events / seconds, 4),
+        "emails_per_batch": round(emails / batches, 2) if batches else None,
+        "backlog": backlog,
+        "dead_lettered": dead_lettered,
+        "oldest_pending_seconds": round((now - oldest).total_seconds(), 1) if oldest else None,
+    }
@@ -1,4 +1,6 @@
+import json
 import os
+import urllib3
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
 from server.config import Config
@@ -24,3 +26,33 @@ def send_email(to_email, subject, html_content):
     except Exception as e:
         print(f"❌ Error sending email: {e}")
         return None
+
+
+class SendGridClient:
+    """
+    Minimal v3 mail/send client over a pooled, keep-alive HTTP connection.
+
+    Unlike send_email, one instance is reused for every message a worker
+    sends, so the TLS handshake happens once per pooled connection rather
+    than once per email. `base_url` can point at the offline stand-in in
+    server/workers/fake_sendgrid.py.
+    """
+
+    def __init__(self, api_key=None, base_url=None, pool_size=4, timeout=10.0):
+        self.api_key = api_key if api_key is not None else Config.SENDGRID_API_KEY
+        self.url = (base_url or Config.SENDGRID_API_URL).rstrip("/") + "/v3/mail/send"
+        self.http = urllib3.PoolManager(
+            maxsize=pool_size, block=True, retries=False, timeout=urllib3.Timeout(total=timeout)
+        )
+
+    def send(self, payload):
+        """POST a mail/send body (e.g. Mail(...).get()); returns (status, error text or None)."""
+        response = self.http.request(
+            "POST",
+            self.url,
+            body=json.dumps(payload).encode(),
+            headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+        )
+        if 200 <= response.status < 300:
+            return response.status, None
+        return response.status, response.data.decode(errors="replace")[:500]
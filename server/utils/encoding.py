@@ -0,0 +1,88 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import request, has_request_context
+from flask.json.provider import DefaultJSONProvider
+
+# Both encoders are optional: without them responses fall back to the stdlib json module.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+
+
+def _default(obj):
+    """Fallback for values the encoders do not handle natively (matches the old to_dict strings)."""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def negotiated_mimetype():
+    """application/msgpack when the client prefers it (and msgpack is installed), else JSON."""
+    if msgpack is None or not has_request_context():
+        return JSON_MIMETYPE
+    best = request.accept_mimetypes.best_match([JSON_MIMETYPE, MSGPACK_MIMETYPE], default=JSON_MIMETYPE)
+    return best
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes with orjson when available.
+
+    Models hand over datetimes, dates and Decimals as-is; orjson serializes
+    datetimes natively and Decimals go through `_default`, producing the
+    same strings to_dict used to build by hand. jsonify() responses are
+    also content-negotiated: `Accept: application/msgpack` gets a compact
+    MessagePack body.
+    """
+
+    sort_keys = False
+
+    @staticmethod
+    def default(obj):
+        return _default(obj)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs.get("indent"):
+            return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS).decode()
+        kwargs.setdefault("default", _default)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def encode(self, obj):
+        """Serialize for the negotiated content type; returns (body bytes, mimetype)."""
+        mimetype = negotiated_mimetype()
+        if mimetype == MSGPACK_MIMETYPE:
+            return msgpack.packb(obj, default=_default, use_bin_type=True), mimetype
+        if orjson is not None and not self._pretty():
+            return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS), JSON_MIMETYPE
+        indent = 2 if self._pretty() else None
+        separators = None if indent else (",", ":")
+        return self.dumps(obj, indent=indent, separators=separators).encode(), JSON_MIMETYPE
+
+    def _pretty(self):
+        return (self.compact is None and self._app.debug) or self.compact is False
+
+    def response(self, *args, **kwargs):
+        body, mimetype = self.encode(self._prepare_response_obj(args, kwargs))
+        response = self._app.response_class(body, mimetype=mimetype)
+        if msgpack is not None:
+            response.vary.add("Accept")
+        return response
@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import Response, current_app, stream_with_context
+
+from server.models import db
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+class InvalidExportFormat(ValueError):
+    """Raised for a ?format= other than ndjson or csv."""
+
+
+def _batches(statement, fieldset, model):
+    """
+    Serialize `statement`'s rows EXPORT_BATCH_SIZE at a time.
+
+    yield_per streams from a server-side cursor where the driver supports one
+    (psycopg2 named cursors), and the identity map is cleared after every
+    batch, so memory stays flat however many rows the table has.
+    """
+    serialize = getattr(model, "bulk_to_dict", None) or (lambda objs, fs: [o.to_dict(fs) for o in objs])
+    result = db.session.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    for partition in result.scalars().partitions():
+        yield serialize(partition, fieldset)
+        # expunge_all() would swap out the identity map under the open result
+        for obj in list(db.session.identity_map.values()):
+            db.session.expunge(obj)
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=str)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _ndjson(batches):
+    dumps = current_app.json.dumps
+    for rows in batches:
+        yield "".join(dumps(row) + "\n" for row in rows)
+
+
+def _csv(batches, fieldset):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fieldset.names)
+    for rows in batches:
+        writer.writerows([_csv_cell(row[name]) for name in fieldset.names] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_response(statement, model, fieldset, fmt, filename):
+    """Stream `statement`'s rows as an NDJSON or CSV attachment."""
+    if fmt not in EXPORT_FORMATS:
+        raise InvalidExportFormat(f"Invalid format. Must be one of {list(EXPORT_FORMATS)}")
+    batches = _batches(statement, fieldset, model)
+    body = _ndjson(batches) if fmt == "ndjson" else _csv(batches, fieldset)
+    return Response(
+        stream_with_context(body),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
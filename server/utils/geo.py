@@ -0,0 +1,93 @@
+import math
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; fall back to a plain Python loop
+    np = None
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 110.574  # the shortest degree of latitude, so candidate boxes never undershoot
+CELL_DEGREES = 0.05  # ~5.5 km grid cells
+LAT_CELLS = int(180 / CELL_DEGREES)
+LNG_CELLS = int(360 / CELL_DEGREES)
+MAX_RADIUS_KM = 100.0
+
+
+class InvalidCoordinates(ValueError):
+    """Raised for latitude/longitude/radius values outside their valid range."""
+
+
+def parse_coordinate(value, name, limit):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise InvalidCoordinates(f"Invalid {name}")
+    if not -limit <= value <= limit:
+        raise InvalidCoordinates(f"{name} must be between -{limit} and {limit}")
+    return value
+
+
+def _row(lat):
+    return min(int((lat + 90) // CELL_DEGREES), LAT_CELLS - 1)
+
+
+def _col(lng):
+    return int((lng + 180) // CELL_DEGREES) % LNG_CELLS
+
+
+def grid_cell(lat, lng):
+    """
+    Integer id of the grid cell containing (lat, lng).
+
+    Cells are numbered row-major, so the cells of one latitude row that lie
+    between two longitudes form a contiguous id range. That keeps a radius
+    lookup to a handful of BETWEEN clauses on one plain B-tree index, which
+    behaves the same on SQLite and PostgreSQL.
+    """
+    return _row(lat) * LNG_CELLS + _col(lng)
+
+
+def candidate_cell_ranges(lat, lng, radius_km):
+    """Inclusive (low, high) cell id ranges covering every point within radius_km of (lat, lng)."""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    lat_min, lat_max = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+
+    # longitude degrees shrink towards the poles; size the box for the widest row it spans
+    widest = max(abs(lat_min), abs(lat_max))
+    cos_lat = math.cos(math.radians(widest))
+    dlng = 180.0 if cos_lat < 1e-6 else radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+
+    if dlng >= 180.0:
+        col_spans = [(0, LNG_CELLS - 1)]
+    else:
+        first, last = _col(lng - dlng), _col(lng + dlng)
+        col_spans = [(first, last)] if first <= last else [(first, LNG_CELLS - 1), (0, last)]
+
+    ranges = []
+    for row in range(_row(lat_min), _row(lat_max) + 1):
+        base = row * LNG_CELLS
+        ranges.extend((base + lo, base + hi) for lo, hi in col_spans)
+    return ranges
+
+
+def haversine_km(lat, lng, lats, lngs):
+    """
+    Great-circle distances from (lat, lng) to each of lats/lngs, in km.
+
+    The candidate cells of a large radius cover every listing of a city,
+    so the whole candidate set is computed in one vectorized numpy pass;
+    the loop is only the fallback when numpy is not installed.
+    """
+    if np is not None:
+        lat1, lng1 = np.radians(lat), np.radians(lng)
+        lat2, lng2 = np.radians(np.asarray(lats, dtype=float)), np.radians(np.asarray(lngs, dtype=float))
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+        return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))).tolist()
+
+    lat1, lng1 = math.radians(lat), math.radians(lng)
+    distances = []
+    for lat2, lng2 in zip(lats, lngs):
+        lat2, lng2 = math.radians(lat2), math.radians(lng2)
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+        distances.append(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a)))
+    return distances
@@ -0,0 +1,84 @@
+import time
+from collections import namedtuple
+
+from server.config import Config
+from server.utils.cache import LRUCache
+
+# What authenticated routes get as flask_jwt_extended.current_user: the
+# token's own claims, not a users row. Load a User explicitly when a route
+# needs relationships or aggregates.
+SessionUser = namedtuple("SessionUser", ["id", "name", "email", "role"])
+
+CLAIMS = ("name", "email", "role")
+
+# cache entries besides SessionUser
+_GONE = object()   # the user no longer exists
+_STALE = object()  # the user changed since their tokens were issued; verify against the database
+
+
+def identity_claims(user):
+    """Claims embedded in a user's access token; enough to build a SessionUser without a query."""
+    return {claim: getattr(user, claim) for claim in CLAIMS}
+
+
+def session_user(user):
+    """The slim, serializable form of a User (or anything with the same attributes)."""
+    return SessionUser(user.id, user.name, user.email, user.role)
+
+
+class IdentityCache:
+    """
+    Per-worker cache of SessionUser by user id behind the JWT user loader.
+
+    A token issued less than `ttl` seconds ago is trusted as is: its
+    claims are no staler than a cached row would be. Older tokens, and
+    tokens of users changed since, are checked against the database once
+    and the result is kept for `ttl` seconds. User updates and deletes call
+    invalidate(); other workers catch up within the TTL, like the response
+    cache's local tier.
+    """
+
+    def __init__(self, max_entries=4096, ttl=60):
+        self.ttl = ttl
+        self._entries = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.stats = {"hits": 0, "claims": 0, "lookups": 0}
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(max_entries=config["IDENTITY_CACHE_MAX_ENTRIES"], ttl=config["IDENTITY_CACHE_TTL"])
+
+    def load(self, jwt_data, lookup):
+        """
+        The SessionUser for a decoded token, or None when the user is gone.
+
+        lookup(user_id) is called on a miss and returns a SessionUser or None.
+        """
+        user_id = int(jwt_data["sub"])
+        entry = self._entries.get(user_id)
+        if entry is _GONE:
+            self.stats["hits"] += 1
+            return None
+        if isinstance(entry, SessionUser):
+            self.stats["hits"] += 1
+            return entry
+        if entry is None and all(claim in jwt_data for claim in CLAIMS) and time.time() - jwt_data["iat"] < self.ttl:
+            self.stats["claims"] += 1
+            return SessionUser(user_id, *(jwt_data[claim] for claim in CLAIMS))
+        self.stats["lookups"] += 1
+        user = lookup(user_id)
+        self._entries.set(user_id, user if user is not None else _GONE)
+        return user
+
+    def invalidate(self, user_id):
+        self._entries.set(user_id, _STALE)
+
+    def clear(self):
+        """Forget every cached identity, e.g. when the users table is emptied."""
+        self._entries = LRUCache(max_entries=self._entries.max_entries, ttl=self.ttl)
+
+    def metrics(self):
+        return {**self.stats, "entries": len(self._entries), "ttl": self.ttl}
+
+
+# shared by the JWT user loader in app.py and the User mapper events
+identity_cache = IdentityCache.from_config(vars(Config))
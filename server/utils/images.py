@@ -0,0 +1,18 @@
+# Widths served to <img srcset>; Cloudinary derives each on first request and caches it at the CDN
+RESPONSIVE_WIDTHS = (320, 640, 1024, 1600)
+
+
+def responsive_urls(url):
+    """
+    {width: url} for a Cloudinary delivery URL, inserting a width-limited, auto-format transformation.
+
+    URLs from anywhere else are returned unchanged at every width.
+    """
+    if not url or "/upload/" not in url:
+        return {str(width): url for width in RESPONSIVE_WIDTHS}
+    head, tail = url.split("/upload/", 1)
+    return {str(width): f"{head}/upload/w_{width},c_limit,f_auto,q_auto/{tail}" for width in RESPONSIVE_WIDTHS}
+
+
+def srcset(url):
+    return ", ".join(f"{size_url} {width}w" for width, size_url in responsive_urls(url).items())
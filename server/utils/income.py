@@ -0,0 +1,101 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import func
+
+from server.models import PaymentRollup
+
+GRANULARITIES = ("month", "year")
+DEFAULT_MONTHS = 12
+MAX_MONTHS = 120
+ZERO = Decimal("0.00")
+
+
+class InvalidIncomeRange(ValueError):
+    """Raised for an unknown ?granularity= or an unparseable or inverted ?from=/?to=."""
+
+
+def _parse_month(value, name):
+    """YYYY-MM (or a full YYYY-MM-DD date) -> yyyymm."""
+    try:
+        year, month = value.split("-")[:2]
+        parsed = date(int(year), int(month), 1)
+    except ValueError:
+        raise InvalidIncomeRange(f"Invalid {name}, expected YYYY-MM")
+    return parsed.year * 100 + parsed.month
+
+
+def _shift(month, delta):
+    index = (month // 100) * 12 + month % 100 - 1 + delta
+    return (index // 12) * 100 + index % 12 + 1
+
+
+def _label(month):
+    return f"{month // 100:04d}-{month % 100:02d}"
+
+
+def parse_income_range(granularity, from_value, to_value, today):
+    """Resolve ?granularity=&from=&to= into (granularity, first yyyymm, last yyyymm)."""
+    if granularity not in GRANULARITIES:
+        raise InvalidIncomeRange(f"Invalid granularity. Must be one of {list(GRANULARITIES)}")
+    end = _parse_month(to_value, "to") if to_value else today.year * 100 + today.month
+    start = _parse_month(from_value, "from") if from_value else _shift(end, 1 - DEFAULT_MONTHS)
+    if end < start:
+        raise InvalidIncomeRange("to must be on or after from")
+    if _shift(start, MAX_MONTHS) <= end:
+        raise InvalidIncomeRange(f"Income range cannot exceed {MAX_MONTHS} months")
+    return granularity, start, end
+
+
+def income_total(session, landlord_id):
+    """All-time completed income, summed over the landlord's monthly rollup rows."""
+    return session.query(func.coalesce(func.sum(PaymentRollup.amount), 0)).filter(
+        PaymentRollup.landlord_id == landlord_id,
+        PaymentRollup.status == "completed",
+    ).scalar()
+
+
+def income_by_status(session, landlord_id):
+    """All-time {status: {"amount", "count"}} from the rollup."""
+    rows = (
+        session.query(PaymentRollup.status, func.sum(PaymentRollup.amount), func.sum(PaymentRollup.count))
+        .filter(PaymentRollup.landlord_id == landlord_id)
+        .group_by(PaymentRollup.status)
+    )
+    return {status: {"amount": amount, "count": count} for status, amount, count in rows if count}
+
+
+def income_series(session, landlord_id, granularity, start, end):
+    """
+    One entry per month (or year) from start to end, empty periods included.
+
+    Reads at most one rollup row per month and status, so the cost depends
+    on the length of the range, not on how many payments the landlord has.
+    """
+    rows = session.query(PaymentRollup.month, PaymentRollup.status, PaymentRollup.amount, PaymentRollup.count).filter(
+        PaymentRollup.landlord_id == landlord_id,
+        PaymentRollup.month.between(start, end),
+    )
+    period_of = _label if granularity == "month" else (lambda month: f"{month // 100:04d}")
+
+    periods = {}
+    month = start
+    while month <= end:
+        periods.setdefault(period_of(month), {"period": period_of(month), "income": ZERO, "by_status": {}})
+        month = _shift(month, 1)
+    for month, status, amount, count in rows:
+        if not count:
+            continue
+        entry = periods[period_of(month)]
+        bucket = entry["by_status"].setdefault(status, {"amount": ZERO, "count": 0})
+        bucket["amount"] += amount
+        bucket["count"] += count
+        if status == "completed":
+            entry["income"] += amount
+    return {
+        "landlord_id": landlord_id,
+        "granularity": granularity,
+        "from": _label(start),
+        "to": _label(end),
+        "series": list(periods.values()),
+    }
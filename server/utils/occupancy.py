@@ -0,0 +1,59 @@
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+
+# A month of occupancy is one integer: bit (day - 1) is set when that day is booked.
+MAX_CALENDAR_DAYS = 366
+DEFAULT_CALENDAR_DAYS = 90
+
+
+class InvalidCalendarRange(ValueError):
+    """Raised for unparseable, inverted or overly long ?from=/?to= ranges."""
+
+
+def parse_calendar_range(from_value, to_value, today):
+    """Resolve ?from= (default today) and ?to= (default from + 89 days), both inclusive."""
+    try:
+        start = date.fromisoformat(from_value) if from_value else today
+        end = date.fromisoformat(to_value) if to_value else start + timedelta(days=DEFAULT_CALENDAR_DAYS - 1)
+    except ValueError:
+        raise InvalidCalendarRange("from and to must be in YYYY-MM-DD format")
+    if end < start:
+        raise InvalidCalendarRange("to must be on or after from")
+    if (end - start).days >= MAX_CALENDAR_DAYS:
+        raise InvalidCalendarRange(f"Calendar range cannot exceed {MAX_CALENDAR_DAYS} days")
+    return start, end
+
+
+def month_key(day):
+    return day.year * 100 + day.month
+
+
+def as_date(value):
+    """A datetime's calendar day; dates pass through. Date columns hold whatever was assigned until reloaded."""
+    return value.date() if isinstance(value, datetime) else value
+
+
+def month_bits(start, end):
+    """{yyyymm: bitmask} covering every day from start to end inclusive."""
+    start, end = as_date(start), as_date(end)
+    bits = {}
+    cursor = start
+    while cursor <= end:
+        last = min(end, date(cursor.year, cursor.month, monthrange(cursor.year, cursor.month)[1]))
+        span = last.day - cursor.day + 1
+        bits[month_key(cursor)] = ((1 << span) - 1) << (cursor.day - 1)
+        cursor = last + timedelta(days=1)
+    return bits
+
+
+def expand(start, end, months):
+    """Split the days start..end into (booked, free) lists using {yyyymm: bitmask}."""
+    booked, free = [], []
+    day = start
+    while day <= end:
+        if months.get(month_key(day), 0) >> (day.day - 1) & 1:
+            booked.append(day)
+        else:
+            free.append(day)
+        day += timedelta(days=1)
+    return booked, free
@@ -0,0 +1,85 @@
+import random
+from datetime import datetime, timedelta
+
+from sendgrid.helpers.mail import Mail
+from sqlalchemy import select
+
+from server.config import Config
+from server.models import OutboxEmail
+
+# a claimed row is invisible to other workers for this long; if its worker dies it becomes due again
+CLAIM_LEASE = timedelta(minutes=5)
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 6 * 3600
+
+
+def enqueue_email(session, to_email, subject, html_content):
+    """Queue an email in the caller's transaction; nothing is sent until it commits."""
+    email = OutboxEmail(to_email=to_email, subject=subject, html_content=html_content)
+    session.add(email)
+    return email
+
+
+def claim_due(session, batch_size, now=None):
+    """
+    Lease up to batch_size due emails to this worker and commit the lease.
+
+    On PostgreSQL, SKIP LOCKED lets several workers claim disjoint batches
+    concurrently; SQLite serializes writers anyway.
+    """
+    now = now or datetime.utcnow()
+    query = (
+        select(OutboxEmail)
+        .where(OutboxEmail.status == "pending", OutboxEmail.next_attempt_at <= now)
+        .order_by(OutboxEmail.next_attempt_at, OutboxEmail.id)
+        .limit(batch_size)
+    )
+    if session.get_bind().dialect.name == "postgresql":
+        query = query.with_for_update(skip_locked=True)
+    emails = session.execute(query).scalars().all()
+    for email in emails:
+        email.next_attempt_at = now + CLAIM_LEASE
+    session.commit()
+    return emails
+
+
+def backoff(attempts):
+    """Exponential backoff with full jitter: up to 30s, 60s, 120s... capped at 6h."""
+    return timedelta(seconds=random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))))
+
+
+def mail_payload(email):
+    return Mail(
+        from_email=Config.SENDGRID_FROM_EMAIL,
+        to_emails=email.to_email,
+        subject=email.subject,
+        html_content=email.html_content,
+    ).get()
+
+
+def deliver(email, client, max_attempts, now=None):
+    """
+    Send one claimed email and record the outcome on the row (the caller commits).
+
+    5xx, 429 and network errors are retried with backoff; other 4xx
+    responses will not succeed on retry and go straight to "dead", as does
+    anything still failing after max_attempts.
+    """
+    now = now or datetime.utcnow()
+    email.attempts += 1
+    try:
+        status, error = client.send(mail_payload(email))
+    except Exception as exc:
+        status, error = None, f"{type(exc).__name__}: {exc}"
+    if error is None:
+        email.status = "sent"
+        email.sent_at = now
+        email.last_error = None
+        return True
+    email.last_error = f"{status}: {error}" if status else error
+    retryable = status is None or status == 429 or status >= 500
+    if not retryable or email.attempts >= max_attempts:
+        email.status = "dead"
+    else:
+        email.next_attempt_at = now + backoff(email.attempts)
+    return False
@@ -0,0 +1,77 @@
+import base64
+import json
+from datetime import datetime
+from urllib.parse import urlencode
+
+from flask import request
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import undefer
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a malformed `after` cursor."""
+
+
+def encode_cursor(obj):
+    """Encode the (created_at, id) sort key of a row into an opaque cursor."""
+    created_at = obj.created_at.isoformat() if obj.created_at else None
+    raw = json.dumps([created_at, obj.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by `encode_cursor` back into (created_at, id)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, obj_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(obj_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def parse_limit(value):
+    """Clamp the `limit` query param to [1, MAX_PAGE_SIZE]."""
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise InvalidCursor("Invalid limit")
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def paginate_keyset(query, model, limit=None, after=None):
+    """
+    Return one page of `query` ordered newest first on (created_at, id).
+
+    Rows after the cursor are selected with a range predicate on the
+    (created_at, id) index instead of OFFSET, so every page costs the same.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    limit = parse_limit(limit)
+    if after:
+        created_at, obj_id = decode_cursor(after)
+        query = query.filter(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < obj_id),
+        ))
+
+    # the cursor is built from the sort key, so load it even under load_only()
+    query = query.options(undefer(model.created_at))
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def paginated_response(response, next_cursor):
+    """Attach the next-page cursor to a list response as headers."""
+    if next_cursor:
+        args = request.args.to_dict(flat=False)
+        args["after"] = [next_cursor]
+        next_url = f"{request.base_url}?{urlencode(args, doseq=True)}"
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return response
@@ -0,0 +1,57 @@
+import threading
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from server.config import Config
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when PASSWORD_HASH_MAX_PENDING hash/verify calls are already running; answered with 503."""
+
+
+class PasswordHasher:
+    """
+    Password hashing and verification, at most `max_pending` at a time per web worker.
+
+    scrypt is deliberately CPU-heavy, and hashlib releases the GIL while it
+    runs, so the gthread workers (gunicorn.conf.py) hash on the request
+    thread. Each worker process serves several requests at once; once
+    max_pending of them are hashing, the next one raises PasswordHasherBusy
+    at once instead of queueing, which caps a login burst at
+    workers * max_pending cores. Keep max_pending below the worker's thread
+    count so requests that do not hash are still served.
+    """
+
+    def __init__(self, method="scrypt", max_pending=2):
+        self.method = method
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._prefix = None
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(method=config["PASSWORD_HASH_METHOD"], max_pending=config["PASSWORD_HASH_MAX_PENDING"])
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy("Too many concurrent sign-ins; please retry shortly")
+        try:
+            return fn(*args)
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True when password_hash was made with other parameters than the configured method."""
+        if self._prefix is None:
+            # werkzeug expands e.g. "scrypt" to "scrypt:32768:8:1"; hash once to learn the full form
+            self._prefix = generate_password_hash("", self.method).split("$", 1)[0]
+        return password_hash.split("$", 1)[0] != self._prefix
+
+
+# shared by User.password / User.check_password
+password_hasher = PasswordHasher.from_config(vars(Config))
@@ -0,0 +1,94 @@
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import and_, exists
+
+from server.models import Booking, Property, PropertyAmenity
+
+TRUTHY = {"1", "true", "yes"}
+FALSY = {"0", "false", "no"}
+
+
+class InvalidFilter(ValueError):
+    """Raised when a filter query param cannot be parsed."""
+
+
+def _decimal(args, name):
+    value = args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise InvalidFilter(f"Invalid {name}")
+
+
+def _date(args, name):
+    value = args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise InvalidFilter(f"Invalid {name}, expected YYYY-MM-DD")
+
+
+def _free_between(start, end):
+    """No blocking booking of the property overlaps [start, end] (both inclusive)."""
+    return ~exists().where(and_(
+        Booking.property_id == Property.id,
+        Booking.start_date <= end,
+        Booking.end_date >= start,
+        Booking.status.in_(Booking.BLOCKING_STATUSES),
+    ))
+
+
+def apply_property_filters(query, args):
+    """
+    Narrow a Property query by the listing filters in `args`.
+
+    Supported params: min_rent, max_rent, location (prefix match, e.g.
+    "Westlands"), available (true/false), any number of amenity=<name>
+    (a property must include all of them) and available_from/available_to
+    (no approved, active or paid booking overlaps those dates; either end
+    alone means that single day). Everything compiles into the
+    WHERE clause of a single statement so the composite indexes on
+    properties and property_amenities can be used.
+    """
+    min_rent = _decimal(args, "min_rent")
+    max_rent = _decimal(args, "max_rent")
+    if min_rent is not None:
+        query = query.filter(Property.rent_price >= min_rent)
+    if max_rent is not None:
+        query = query.filter(Property.rent_price <= max_rent)
+
+    location = (args.get("location") or "").strip()
+    if location:
+        # a range rather than LIKE so the (location, rent_price) index stays usable
+        query = query.filter(Property.location >= location, Property.location < location + "\U0010ffff")
+
+    available = (args.get("available") or "").lower()
+    if available in TRUTHY:
+        query = query.filter(Property.available.is_(True))
+    elif available in FALSY:
+        query = query.filter(Property.available.is_(False))
+    elif available:
+        raise InvalidFilter("Invalid available, expected true or false")
+
+    for amenity in args.getlist("amenity"):
+        query = query.filter(exists().where(and_(
+            PropertyAmenity.amenity_name == amenity,
+            PropertyAmenity.property_id == Property.id,
+            PropertyAmenity.included.is_(True),
+        )))
+
+    available_from = _date(args, "available_from")
+    available_to = _date(args, "available_to")
+    if available_from or available_to:
+        available_from = available_from or available_to
+        available_to = available_to or available_from
+        if available_to < available_from:
+            raise InvalidFilter("available_to must be on or after available_from")
+        query = query.filter(_free_between(available_from, available_to))
+
+    return query
@@ -0,0 +1,187 @@
+from collections import defaultdict
+
+from sqlalchemy import UniqueConstraint, exists, extract, func, inspect, select, text
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from server.models import Booking
+from server.utils.occupancy import month_bits
+
+# Columns added to tables that had already shipped, oldest first. db.create_all()
+# creates missing tables with every column but never alters an existing one.
+ADDED_COLUMNS = [
+    ("properties", "latitude"),
+    ("properties", "longitude"),
+    ("properties", "geo_cell"),
+    ("properties", "updated_at"),
+    ("bookings", "updated_at"),
+    ("properties", "favorite_count"),
+    ("properties", "booking_count"),
+    ("properties", "rating_count"),
+    ("properties", "rating_avg"),
+    ("payments", "idempotency_key"),
+    ("properties", "image_status"),
+    ("booking_events", "attempts"),
+    ("booking_events", "last_error"),
+]
+
+# SQL run in the same transaction as adding a column, to fill it in for existing rows
+BACKFILLS = {
+    # existing rows count as last modified when created, so their ETags are stable from the start
+    ("properties", "updated_at"): ["UPDATE properties SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)"],
+    ("bookings", "updated_at"): ["UPDATE bookings SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)"],
+    # counter caches start out true; the write paths keep them so from here on
+    ("properties", "favorite_count"): [
+        "UPDATE properties SET favorite_count = "
+        "(SELECT COUNT(*) FROM favorites WHERE favorites.property_id = properties.id)"
+    ],
+    ("properties", "booking_count"): [
+        "UPDATE properties SET booking_count = "
+        "(SELECT COUNT(*) FROM bookings WHERE bookings.property_id = properties.id)"
+    ],
+    ("properties", "rating_count"): [
+        "UPDATE properties SET rating_count = "
+        "(SELECT COUNT(*) FROM reviews WHERE reviews.property_id = properties.id)"
+    ],
+    ("properties", "rating_avg"): [
+        "UPDATE properties SET rating_avg = "
+        "(SELECT AVG(rating) FROM reviews WHERE reviews.property_id = properties.id)"
+    ],
+}
+
+
+def _add_column(conn, column):
+    spec = CreateColumn(column).compile(dialect=conn.dialect)
+    if_not_exists = " IF NOT EXISTS" if conn.dialect.name == "postgresql" else ""
+    conn.execute(text(f"ALTER TABLE {column.table.name} ADD COLUMN{if_not_exists} {spec}"))
+    for statement in BACKFILLS.get((column.table.name, column.name), ()):
+        conn.execute(text(statement))
+
+
+def _create_unique_index(conn, constraint):
+    """A unique index does a UNIQUE constraint's job, and unlike one it can be added to a SQLite table."""
+    quote = conn.dialect.identifier_preparer.quote
+    columns = ", ".join(quote(column.name) for column in constraint.columns)
+    conn.execute(text(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {quote(constraint.name)} ON {quote(constraint.table.name)} ({columns})"
+    ))
+
+
+def _fill_occupancy(conn, metadata):
+    """One bitmap row per property and month, OR-ing together the days of its blocking bookings."""
+    bookings = metadata.tables["bookings"]
+    months = defaultdict(int)
+    rows = conn.execute(
+        select(bookings.c.property_id, bookings.c.start_date, bookings.c.end_date)
+        .where(bookings.c.status.in_(Booking.BLOCKING_STATUSES))
+    )
+    for property_id, start, end in rows:
+        for month, bits in month_bits(start, end).items():
+            months[property_id, month] |= bits
+    if months:
+        conn.execute(metadata.tables["property_occupancy"].insert(), [
+            {"property_id": property_id, "month": month, "booked_days": bits}
+            for (property_id, month), bits in months.items()
+        ])
+
+
+def _fill_payment_rollups(conn, metadata):
+    """One row per landlord, month and status, summed over the payments in one INSERT ... SELECT."""
+    payments, rollups = metadata.tables["payments"], metadata.tables["payment_rollups"]
+    month = extract("year", payments.c.created_at) * 100 + extract("month", payments.c.created_at)
+    totals = (
+        select(payments.c.landlord_id, month, payments.c.status, func.sum(payments.c.amount), func.count())
+        .where(payments.c.created_at.isnot(None))
+        .group_by(payments.c.landlord_id, month, payments.c.status)
+    )
+    conn.execute(rollups.insert().from_select(["landlord_id", "month", "status", "amount", "count"], totals))
+
+
+# Tables maintained from other tables by the write paths. db.create_all() adds them
+# empty to an existing database; they are filled once, from their source table.
+DERIVED_TABLES = {
+    "property_occupancy": ("bookings", _fill_occupancy),
+    "payment_rollups": ("payments", _fill_payment_rollups),
+}
+
+
+def _fill_derived(conn, metadata, table_name, source_name, fill):
+    """Fill table_name from source_name unless it already has rows (or there is nothing to derive)."""
+    table, source = metadata.tables[table_name], metadata.tables[source_name]
+    if conn.dialect.name == "postgresql":
+        # writers wait until the fill commits, and a second worker then finds the table filled
+        conn.execute(text(f"LOCK TABLE {table_name} IN SHARE ROW EXCLUSIVE MODE"))
+    if conn.execute(select(exists().select_from(table))).scalar():
+        return
+    if not conn.execute(select(exists().select_from(source))).scalar():
+        return
+    fill(conn, metadata)
+    print(f"Schema upgrade: filled {table_name} from {source_name}")
+
+
+def _apply(engine, description, step):
+    """Run one step in its own transaction; a failure is reported, not raised, so the app still boots."""
+    try:
+        with engine.begin() as conn:
+            step(conn)
+    except Exception as exc:
+        print(f"Schema upgrade: could not {description}: {type(exc).__name__}: {exc}")
+        return False
+    return True
+
+
+def upgrade_schema(engine, metadata):
+    """
+    Bring a database made by an older db.create_all() up to the current models.
+
+    Adds the ADDED_COLUMNS that are missing (with their backfills) and
+    creates every model index, and a unique index for every named unique
+    constraint, that does not exist yet. DERIVED_TABLES that are still
+    empty are filled from their source tables. Each statement is
+    idempotent, so every worker can run this at boot: when two race, the
+    loser's step fails, is reported and skipped. Index builds lock their
+    table against writes while they run; on a large production table,
+    build the index by hand with CREATE INDEX CONCURRENTLY before
+    deploying and this finds it and moves on.
+    """
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    columns = {}
+    for table_name, column_name in ADDED_COLUMNS:
+        if table_name not in tables:
+            continue
+        if table_name not in columns:
+            columns[table_name] = {c["name"] for c in inspector.get_columns(table_name)}
+        if column_name in columns[table_name]:
+            continue
+        column = metadata.tables[table_name].c[column_name]
+        if _apply(engine, f"add column {table_name}.{column_name}", lambda conn: _add_column(conn, column)):
+            print(f"Schema upgrade: added column {table_name}.{column_name}")
+
+    for table in metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            if _apply(engine, f"create index {index.name}",
+                      lambda conn: conn.execute(CreateIndex(index, if_not_exists=True))):
+                print(f"Schema upgrade: created index {index.name}")
+
+        existing |= {constraint["name"] for constraint in inspector.get_unique_constraints(table.name)}
+        for constraint in table.constraints:
+            if not isinstance(constraint, UniqueConstraint) or not constraint.name or constraint.name in existing:
+                continue
+            # fails (and is reported) while existing rows still hold duplicates
+            if _apply(engine, f"create unique index {constraint.name}",
+                      lambda conn: _create_unique_index(conn, constraint)):
+                print(f"Schema upgrade: created unique index {constraint.name}")
+
+    for table_name, (source_name, fill) in DERIVED_TABLES.items():
+        if table_name not in tables or source_name not in tables:
+            continue
+        with engine.connect() as conn:
+            if conn.execute(select(exists().select_from(metadata.tables[table_name]))).scalar():
+                continue  # the usual boot: filled long ago, and no lock taken
+        _apply(engine, f"fill {table_name}", lambda conn: _fill_derived(conn, metadata, table_name, source_name, fill))
+
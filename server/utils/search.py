@@ -0,0 +1,111 @@
+import re
+
+from sqlalchemy import text
+
+# Column weights: a hit in the title outranks one in the location, which outranks the description.
+SQLITE_FTS_DDL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS properties_fts
+USING fts5(title, description, location, tokenize = 'porter unicode61')
+"""
+
+POSTGRES_FTS_DDL = [
+    """
+    ALTER TABLE properties ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(location, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_properties_search_vector ON properties USING GIN (search_vector)",
+]
+
+
+def _dialect(session):
+    return session.get_bind().dialect.name
+
+
+def init_search_index(db):
+    """
+    Create the property text index if it is missing.
+
+    SQLite gets an FTS5 table that the write routes keep in sync (and is
+    backfilled on first creation); PostgreSQL gets a generated tsvector
+    column with a GIN index, which the database maintains itself.
+    """
+    dialect = db.engine.dialect.name
+    with db.engine.begin() as conn:
+        if dialect == "sqlite":
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'properties_fts'"
+            )).first()
+            if not exists:
+                conn.execute(text(SQLITE_FTS_DDL))
+                _backfill_sqlite(conn)
+        elif dialect == "postgresql":
+            for statement in POSTGRES_FTS_DDL:
+                conn.execute(text(statement))
+
+
+def _backfill_sqlite(conn):
+    conn.execute(text("DELETE FROM properties_fts"))
+    conn.execute(text(
+        "INSERT INTO properties_fts (rowid, title, description, location) "
+        "SELECT id, title, description, location FROM properties"
+    ))
+
+
+def rebuild_search_index(session):
+    """Re-index every property, for rows written outside the API (e.g. seed.py)."""
+    if _dialect(session) == "sqlite":
+        _backfill_sqlite(session)
+
+
+def index_property(session, prop):
+    """Write `prop` into the text index; call after flush, before commit."""
+    if _dialect(session) != "sqlite":
+        return
+    remove_property(session, prop.id)
+    session.execute(
+        text("INSERT INTO properties_fts (rowid, title, description, location) "
+             "VALUES (:id, :title, :description, :location)"),
+        {"id": prop.id, "title": prop.title, "description": prop.description, "location": prop.location},
+    )
+
+
+def remove_property(session, property_id):
+    """Drop a property from the text index; call before commit."""
+    if _dialect(session) != "sqlite":
+        return
+    session.execute(text("DELETE FROM properties_fts WHERE rowid = :id"), {"id": property_id})
+
+
+def _fts5_query(q):
+    # Quote every term so user input can never be parsed as FTS5 syntax; prefix-match the last one
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return None
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search_property_ids(session, q, limit, offset=0):
+    """Return up to `limit` property ids matching `q`, best match first."""
+    if _dialect(session) == "postgresql":
+        rows = session.execute(text(
+            "SELECT id FROM properties, websearch_to_tsquery('english', :q) AS query "
+            "WHERE search_vector @@ query "
+            "ORDER BY ts_rank(search_vector, query) DESC, id DESC "
+            "LIMIT :limit OFFSET :offset"
+        ), {"q": q, "limit": limit, "offset": offset})
+    else:
+        match = _fts5_query(q)
+        if match is None:
+            return []
+        rows = session.execute(text(
+            "SELECT rowid FROM properties_fts WHERE properties_fts MATCH :match "
+            "ORDER BY bm25(properties_fts, 10.0, 1.0, 5.0), rowid DESC "
+            "LIMIT :limit OFFSET :offset"
+        ), {"match": match, "limit": limit, "offset": offset})
+    return [row[0] for row in rows]
@@ -0,0 +1,299 @@
+import hashlib
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import cloudinary.uploader
+from sqlalchemy.exc import IntegrityError
+
+from server.models import db, ImageUpload, Property, UploadedAsset
+from server.utils.upsert import upsert
+
+CHUNK_SIZE = 1 << 20
+
+
+def spool(file_storage, spool_dir):
+    """
+    Stream an uploaded file to spool_dir while hashing it.
+
+    Returns (path, sha256). Every call gets its own file (the hash lives in
+    the ImageUpload row, not the name), so concurrent uploads of the same
+    bytes never share, or delete, each other's copy.
+    """
+    os.makedirs(spool_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    extension = os.path.splitext(file_storage.filename or "")[1].lower()[:10]
+    fd, path = tempfile.mkstemp(dir=spool_dir, suffix=extension)
+    with os.fdopen(fd, "wb") as out:
+        while True:
+            chunk = file_storage.stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+    return path, digest.hexdigest()
+
+
+class CloudinaryUploader:
+    def upload(self, path, public_id):
+        result = cloudinary.uploader.upload(path, public_id=public_id, overwrite=False, resource_type="image")
+        return {"url": result["secure_url"], "public_id": result["public_id"]}
+
+
+class FakeUploader:
+    """
+    Offline stand-in for CloudinaryUploader, for tests and local development.
+
+    Returns Cloudinary-shaped URLs without any network access, optionally
+    after `delay` seconds, and records every upload in .uploads.
+    """
+
+    def __init__(self, base_url="https://res.cloudinary.com/fake", delay=0.0, fail_rate=0.0):
+        self.base_url = base_url.rstrip("/")
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.uploads = []
+        self._lock = threading.Lock()
+
+    def upload(self, path, public_id):
+        if self.delay:
+            time.sleep(self.delay)
+        if random.random() < self.fail_rate:
+            raise IOError("injected upload failure")
+        with self._lock:
+            self.uploads.append((path, public_id))
+        extension = os.path.splitext(path)[1] or ".jpg"
+        return {"url": f"{self.base_url}/image/upload/{public_id}{extension}", "public_id": public_id}
+
+
+def uploader_from_config(config):
+    return FakeUploader() if config.get("IMAGE_UPLOADER") == "fake" else CloudinaryUploader()
+
+
+def known_asset(session, sha256):
+    return session.get(UploadedAsset, sha256)
+
+
+def upload_deduplicated(session, uploader, path, sha256):
+    """
+    The Cloudinary copy of the file at path, uploading it only if these bytes were never uploaded before.
+
+    The public_id is derived from the hash, so two workers racing on the
+    same new file end up pointing at the same asset.
+    """
+    asset = known_asset(session, sha256)
+    if asset is not None:
+        return asset.url, asset.public_id
+    result = uploader.upload(path, public_id=f"rentease/{sha256[:32]}")
+    session.add(UploadedAsset(sha256=sha256, url=result["url"], public_id=result["public_id"]))
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        asset = known_asset(session, sha256)
+        return asset.url, asset.public_id
+    return result["url"], result["public_id"]
+
+
+class UploadFailed(Exception):
+    """Raised by upload_many when any file could not be uploaded; `errors` maps file index to message."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} image(s) failed to upload")
+        self.errors = errors
+
+
+def upload_many(session, uploader, executor, spooled):
+    """
+    Upload spooled (path, sha256) files in parallel; returns [(url, public_id)] in input order.
+
+    Already-known hashes are looked up in one query and repeated files in
+    the same request are uploaded once. The rest go to `executor` (a
+    bounded thread pool) together, so the wall time is roughly that of the
+    slowest file. New assets are recorded in one multi-row INSERT, even
+    when some files failed, so a retry only re-sends the failures.
+    """
+    hashes = {sha256 for _, sha256 in spooled}
+    assets = {
+        a.sha256: (a.url, a.public_id)
+        for a in session.query(UploadedAsset).filter(UploadedAsset.sha256.in_(hashes))
+    }
+    pending = {}
+    for path, sha256 in spooled:
+        if sha256 not in assets and sha256 not in pending:
+            pending[sha256] = executor.submit(uploader.upload, path, f"rentease/{sha256[:32]}")
+
+    failed, new_assets = {}, []
+    for sha256, future in pending.items():
+        try:
+            result = future.result()
+        except Exception as exc:
+            failed[sha256] = f"{type(exc).__name__}: {exc}"
+            continue
+        assets[sha256] = (result["url"], result["public_id"])
+        new_assets.append({"sha256": sha256, "url": result["url"], "public_id": result["public_id"],
+                           "created_at": datetime.utcnow()})
+    if new_assets:
+        upsert(session.connection(), UploadedAsset.__table__, new_assets, index_elements=["sha256"], set_=None)
+        session.commit()
+    for path, _ in spooled:
+        discard_spool(path)
+    if failed:
+        raise UploadFailed({i: failed[sha256] for i, (_, sha256) in enumerate(spooled) if sha256 in failed})
+    return [assets[sha256] for _, sha256 in spooled]
+
+
+def discard_spool(path):
+    """Delete a spooled file; each one belongs to the single request or upload that spooled it."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def stale_upload_ids(session, older_than):
+    return [
+        upload_id for (upload_id,) in session.query(ImageUpload.id)
+        .filter(ImageUpload.status == "processing", ImageUpload.created_at < older_than)
+        .order_by(ImageUpload.created_at)
+    ]
+
+
+class ImageUploadPool:
+    """
+    Uploads spooled files to Cloudinary on a small thread pool, off the request thread.
+
+    The request spools the file, commits an ImageUpload row (and sets its
+    property's image_status to "processing") and calls submit(); the HTTP
+    transfer happens here. Failed transfers retry with backoff up to
+    max_attempts, then mark the upload and property "failed". on_ready is
+    called with the property id after its image changes, e.g. to drop
+    cached responses.
+
+    Uploads left "processing" by a web worker that exited mid-transfer are
+    picked up by recover(), which every web worker runs at boot and then
+    periodically (start_recovery): the spool files are on this host's disk.
+    """
+
+    def __init__(self, app, uploader, max_workers=4, max_attempts=3, on_ready=None, stale_after=timedelta(minutes=15)):
+        self.app = app
+        self.uploader = uploader
+        self.max_attempts = max_attempts
+        self.on_ready = on_ready
+        self.stale_after = stale_after
+        self._active = set()
+        self._active_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-upload")
+
+    @classmethod
+    def from_config(cls, app, on_ready=None):
+        return cls(
+            app,
+            uploader_from_config(app.config),
+            max_workers=app.config["IMAGE_UPLOAD_WORKERS"],
+            max_attempts=app.config["IMAGE_UPLOAD_MAX_ATTEMPTS"],
+            on_ready=on_ready,
+            stale_after=timedelta(minutes=app.config["IMAGE_UPLOAD_STALE_MINUTES"]),
+        )
+
+    def submit(self, upload_id, claimed=False):
+        return self.executor.submit(self.process, upload_id, claimed)
+
+    def recover(self):
+        """
+        Resubmit stale "processing" uploads whose spool file is on this host; returns their ids.
+
+        Each one is claimed by bumping its attempts with a conditional
+        UPDATE, so of the web workers recovering at once only one resubmits it.
+        """
+        submitted = []
+        with self.app.app_context():
+            session = db.session
+            for upload_id in stale_upload_ids(session, datetime.utcnow() - self.stale_after):
+                with self._active_lock:
+                    if upload_id in self._active:
+                        continue
+                upload = session.get(ImageUpload, upload_id)
+                if not os.path.exists(upload.spool_path):
+                    continue
+                claimed = session.query(ImageUpload).filter(
+                    ImageUpload.id == upload_id,
+                    ImageUpload.status == "processing",
+                    ImageUpload.attempts == upload.attempts,
+                ).update({"attempts": upload.attempts + 1}, synchronize_session=False)
+                session.commit()
+                if claimed:
+                    self.submit(upload_id, claimed=True)
+                    submitted.append(upload_id)
+        return submitted
+
+    def start_recovery(self, every):
+        """Run recover() now and then every `every` seconds on a daemon thread."""
+        def loop():
+            while True:
+                try:
+                    ids = self.recover()
+                    if ids:
+                        print(f"Image uploads: resubmitted stale uploads {ids}")
+                except Exception as exc:
+                    print(f"Image uploads: recovery failed: {type(exc).__name__}: {exc}")
+                time.sleep(every)
+
+        threading.Thread(target=loop, name="image-upload-recovery", daemon=True).start()
+
+    def process(self, upload_id, claimed=False):
+        """
+        Upload one pending ImageUpload; safe to call again for one left behind by a restart.
+
+        claimed means recover() has already counted this attempt.
+        """
+        with self._active_lock:
+            self._active.add(upload_id)
+        try:
+            self._process(upload_id, claimed)
+        finally:
+            with self._active_lock:
+                self._active.discard(upload_id)
+
+    def _process(self, upload_id, claimed):
+        with self.app.app_context():
+            session = db.session
+            upload = session.get(ImageUpload, upload_id)
+            if upload is None or upload.status != "processing":
+                return
+            while True:
+                if claimed:
+                    claimed = False
+                else:
+                    upload.attempts += 1
+                    session.commit()
+                try:
+                    url, public_id = upload_deduplicated(session, self.uploader, upload.spool_path, upload.sha256)
+                except Exception as exc:
+                    session.rollback()
+                    if upload.attempts >= self.max_attempts:
+                        self._finish(session, upload, "failed", error=f"{type(exc).__name__}: {exc}")
+                        return
+                    time.sleep(min(30, 2 ** upload.attempts) * random.uniform(0.5, 1))
+                    continue
+                self._finish(session, upload, "ready", url=url, public_id=public_id)
+                return
+
+    def _finish(self, session, upload, status, url=None, public_id=None, error=None):
+        upload.status = status
+        upload.url, upload.public_id, upload.error = url, public_id, error
+        upload.finished_at = datetime.utcnow()
+        if upload.property_id is not None:
+            prop = session.get(Property, upload.property_id)
+            if prop is not None:
+                prop.image_status = status
+                if url:
+                    prop.image_url = url
+        session.commit()
+        discard_spool(upload.spool_path)
+        if upload.property_id is not None and self.on_ready:
+            self.on_ready(upload.property_id)
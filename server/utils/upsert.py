@@ -0,0 +1,24 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def upsert(connection, table, values, index_elements, set_):
+    """
+    INSERT `values` into `table`, or apply `set_` to the existing row on conflict.
+
+    `set_` maps column names to SQL expressions; reference the proposed row
+    with `excluded` (the insert statement's .excluded) by passing a callable
+    that receives it. set_=None leaves existing rows untouched (ON CONFLICT
+    DO NOTHING). `values` may be a list of rows for a multi-row INSERT.
+    """
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(table).values(values)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(table).values(values)
+    else:
+        raise NotImplementedError(f"upsert is not implemented for {dialect}")
+    if set_ is None:
+        connection.execute(stmt.on_conflict_do_nothing(index_elements=index_elements))
+        return
+    updates = set_(stmt.excluded) if callable(set_) else set_
+    connection.execute(stmt.on_conflict_do_update(index_elements=index_elements, set_=updates))
@@ -0,0 +1,2 @@
+# Background jobs that run outside the gunicorn web workers, e.g.
+#   python -m server.workers.reconcile_counters
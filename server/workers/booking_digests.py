@@ -0,0 +1,68 @@
+"""
+Send landlords and tenants digests of their booking events.
+
+Booking writes only insert booking_events rows (in the same transaction);
+this worker wakes every BOOKING_DIGEST_WINDOW seconds, groups everything
+that accumulated per recipient, and sends one email per recipient through
+SendGrid's multi-personalization API, up to BOOKING_DIGEST_BATCH_SIZE
+recipients per request. Failed events are retried in later windows and
+dead-lettered after BOOKING_DIGEST_MAX_ATTEMPTS. Throughput is logged per
+window and recorded in digest_batches for GET /metrics/booking-events.
+
+    python -m server.workers.booking_digests               # every window
+    python -m server.workers.booking_digests --once        # one window now
+    SENDGRID_API_URL=http://localhost:8025 python -m server.workers.booking_digests   # against fake_sendgrid
+"""
+import argparse
+import time
+from datetime import datetime
+
+from server.models import db
+from server.utils.digests import claim_events, send_digests
+from server.utils.email_service import SendGridClient
+
+
+def run_window(session, client, batch_size, max_items, max_attempts, now=None):
+    """Digest and send every pending event up to now; returns the window's stats."""
+    now = now or datetime.utcnow()
+    started = time.perf_counter()
+    events = claim_events(session, now)
+    stats = send_digests(session, client, events, now, batch_size=batch_size, max_items=max_items,
+                         max_attempts=max_attempts)
+    session.commit()
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send booking event digests")
+    parser.add_argument("--once", action="store_true", help="run a single window now instead of looping")
+    parser.add_argument("--window", type=float, help="seconds between digests")
+    args = parser.parse_args()
+
+    from server.app import app
+
+    window = args.window or app.config["BOOKING_DIGEST_WINDOW"]
+    batch_size = app.config["BOOKING_DIGEST_BATCH_SIZE"]
+    max_items = app.config["BOOKING_DIGEST_MAX_ITEMS"]
+    max_attempts = app.config["BOOKING_DIGEST_MAX_ATTEMPTS"]
+    client = SendGridClient(base_url=app.config["SENDGRID_API_URL"])
+
+    with app.app_context():
+        while True:
+            tick = time.monotonic()
+            stats = run_window(db.session, client, batch_size, max_items, max_attempts)
+            if stats["batches"]:
+                per_batch = stats["emails"] / (stats["batches"] - stats["failed_batches"] or 1)
+                print(f"Booking digests: {stats['events']} events -> {stats['emails']} emails in "
+                      f"{stats['batches']} batches ({stats['failed_batches']} failed, "
+                      f"{stats['dead_lettered']} events dead-lettered), "
+                      f"{stats['events'] / window:.2f} events/s over the window, "
+                      f"{per_batch:.1f} emails/batch, {stats['seconds'] * 1000:.0f} ms")
+            if args.once:
+                break
+            time.sleep(max(0.0, window - (time.monotonic() - tick)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Report, and optionally resolve, blocking bookings whose dates overlap.
+
+Overlaps written before the conflict check existed keep PostgreSQL's
+bookings_no_overlap constraint from being added at boot. This lists them;
+with --cancel-later it cancels the later-created booking of each pair
+(through the ORM, so calendars, counters and digests follow) and then adds
+the constraint.
+
+    python -m server.workers.booking_overlaps                  # report only
+    python -m server.workers.booking_overlaps --cancel-later   # resolve, then add the constraint
+"""
+import argparse
+
+from server.models import db, Booking
+from server.utils.bookings import find_overlapping_bookings, init_booking_constraints
+
+
+def cancel_later_overlaps(session):
+    """Cancel the later booking of every overlapping pair; returns the cancelled booking ids."""
+    cancelled = set()
+    for earlier_id, later_id in find_overlapping_bookings(session):
+        if earlier_id in cancelled or later_id in cancelled:
+            continue
+        session.get(Booking, later_id).status = "cancelled"
+        cancelled.add(later_id)
+    session.commit()
+    return sorted(cancelled)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report or resolve overlapping bookings")
+    parser.add_argument("--cancel-later", action="store_true",
+                        help="cancel the later booking of each overlapping pair, then add the constraint")
+    args = parser.parse_args()
+
+    from server.app import app
+
+    with app.app_context():
+        overlaps = find_overlapping_bookings(db.session)
+        for earlier_id, later_id in overlaps:
+            earlier, later = db.session.get(Booking, earlier_id), db.session.get(Booking, later_id)
+            print(f"property #{earlier.property_id}: booking #{earlier.id} ({earlier.status}, "
+                  f"{earlier.start_date} to {earlier.end_date}) overlaps #{later.id} ({later.status}, "
+                  f"{later.start_date} to {later.end_date})")
+        print(f"{len(overlaps)} overlapping pairs")
+        if args.cancel_later and overlaps:
+            cancelled = cancel_later_overlaps(db.session)
+            print(f"Cancelled bookings {', '.join(f'#{i}' for i in cancelled)}")
+            init_booking_constraints(db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Deliver queued transactional emails from the email_outbox table.
+
+Each pass leases a batch of due rows, sends them through one pooled
+SendGrid client and records the result: sent, retried later with
+exponential backoff, or dead-lettered (status "dead", with last_error)
+after EMAIL_OUTBOX_MAX_ATTEMPTS or a non-retryable 4xx. Run as many
+copies as needed; on PostgreSQL they claim disjoint batches.
+
+    python -m server.workers.email_outbox                # drain continuously
+    python -m server.workers.email_outbox --once         # one pass, then exit
+    SENDGRID_API_URL=http://localhost:8025 python -m server.workers.email_outbox   # against fake_sendgrid
+"""
+import argparse
+import time
+
+from server.models import db
+from server.utils.email_service import SendGridClient
+from server.utils.outbox import claim_due, deliver
+
+
+def drain_once(session, client, batch_size, max_attempts):
+    """Claim and deliver one batch; returns (claimed, sent)."""
+    emails = claim_due(session, batch_size)
+    sent = sum(deliver(email, client, max_attempts) for email in emails)
+    session.commit()
+    return len(emails), sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deliver queued transactional emails")
+    parser.add_argument("--once", action="store_true", help="run a single pass instead of polling")
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--poll-interval", type=float)
+    args = parser.parse_args()
+
+    from server.app import app
+
+    batch_size = args.batch_size or app.config["EMAIL_OUTBOX_BATCH_SIZE"]
+    poll_interval = args.poll_interval or app.config["EMAIL_OUTBOX_POLL_INTERVAL"]
+    max_attempts = app.config["EMAIL_OUTBOX_MAX_ATTEMPTS"]
+    client = SendGridClient(base_url=app.config["SENDGRID_API_URL"])
+
+    with app.app_context():
+        while True:
+            claimed, sent = drain_once(db.session, client, batch_size, max_attempts)
+            if claimed:
+                print(f"Email outbox: {sent}/{claimed} sent")
+            if args.once and claimed < batch_size:
+                break
+            if claimed < batch_size:
+                time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Offline stand-in for SendGrid's v3 mail/send endpoint.
+
+Accepts POST /v3/mail/send, answers 202 like SendGrid and appends each
+request body as one JSON line to --log (or prints it), so the email
+workers can be exercised without network access or an API key.
+--fail-rate makes a share of requests answer 503, to exercise retries.
+
+    python -m server.workers.fake_sendgrid --port 8025 --log /tmp/sent.jsonl
+    SENDGRID_API_URL=http://localhost:8025 python -m server.workers.email_outbox
+"""
+import argparse
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeSendGridHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    log_path = None
+    fail_rate = 0.0
+    lock = threading.Lock()
+    received = []
+
+    def _reply(self, status, body=b""):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != "/v3/mail/send":
+            return self._reply(404, b'{"errors": [{"message": "not found"}]}')
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            return self._reply(401, b'{"errors": [{"message": "authorization required"}]}')
+        if random.random() < self.fail_rate:
+            return self._reply(503, b'{"errors": [{"message": "injected failure"}]}')
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return self._reply(400, b'{"errors": [{"message": "invalid JSON"}]}')
+        with self.lock:
+            type(self).received.append(payload)
+            if self.log_path:
+                with open(self.log_path, "a") as log:
+                    log.write(json.dumps(payload) + "\n")
+            else:
+                recipients = [to["email"] for p in payload.get("personalizations", []) for to in p.get("to", [])]
+                print(f"fake sendgrid: {payload.get('subject')!r} -> {', '.join(recipients)}")
+        self._reply(202)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=8025, log_path=None, fail_rate=0.0):
+    """Start the fake in a background thread; returns the server (call .shutdown() to stop)."""
+    handler = type("Handler", (FakeSendGridHandler,), {"log_path": log_path, "fail_rate": fail_rate, "received": []})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline stand-in for SendGrid's v3 mail/send endpoint")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--log", help="append received messages to this JSONL file")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with 503")
+    args = parser.parse_args()
+
+    handler = type("Handler", (FakeSendGridHandler,), {"log_path": args.log, "fail_rate": args.fail_rate})
+    print(f"fake sendgrid listening on http://127.0.0.1:{args.port}")
+    ThreadingHTTPServer(("127.0.0.1", args.port), handler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
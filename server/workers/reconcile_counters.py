@@ -0,0 +1,191 @@
+"""
+Reconcile the Property counter-cache columns with the rows they count.
+
+The write paths keep favorite_count, booking_count, rating_count and
+rating_avg up to date incrementally; this job repairs any drift (bulk
+deletes, favorites removed by user deletion, rows written with raw SQL).
+It walks the table in id batches and only rewrites rows that are off, so
+untouched properties keep their updated_at (and their clients' ETags).
+The property_occupancy calendar bitmaps are rebuilt from the blocking
+bookings in the same id batches, and the payment_rollups income table
+from the payments in landlord id batches. (Both tables are filled once
+from the existing rows at boot, by utils/schema.py.)
+
+    python -m server.workers.reconcile_counters              # one pass
+    python -m server.workers.reconcile_counters --every 3600 # loop
+"""
+import argparse
+import time
+from collections import defaultdict
+
+from sqlalchemy import and_, func, or_, select, text
+
+from server.models import db, Property, PropertyOccupancy, PaymentRollup, Booking, Payment, Review, User, favorites
+from server.utils.occupancy import month_bits, month_key
+
+BATCH_SIZE = 1000
+
+
+def _true_counts():
+    pid = Property.__table__.c.id
+    return {
+        "booking_count": select(func.count()).where(Booking.property_id == pid).scalar_subquery(),
+        "favorite_count": select(func.count()).where(favorites.c.property_id == pid).scalar_subquery(),
+        "rating_count": select(func.count()).where(Review.property_id == pid).scalar_subquery(),
+        "rating_avg": select(func.avg(Review.rating)).where(Review.property_id == pid).scalar_subquery(),
+    }
+
+
+def reconcile_property_counters(session, batch_size=BATCH_SIZE):
+    """Fix drifted counters for every property; returns the number of rows rewritten."""
+    true = _true_counts()
+    table = Property.__table__
+    drifted = or_(
+        table.c.booking_count != true["booking_count"],
+        table.c.favorite_count != true["favorite_count"],
+        table.c.rating_count != true["rating_count"],
+        func.abs(func.coalesce(table.c.rating_avg, -1) - func.coalesce(true["rating_avg"], -1)) > 1e-9,
+    )
+
+    fixed = 0
+    last_id = 0
+    max_id = session.query(func.max(Property.id)).scalar() or 0
+    while last_id < max_id:
+        batch = and_(table.c.id > last_id, table.c.id <= last_id + batch_size)
+        result = session.execute(table.update().where(batch, drifted).values(**true))
+        session.commit()
+        fixed += result.rowcount
+        last_id += batch_size
+    return fixed
+
+
+def _expected_occupancy(session, low, high):
+    expected = defaultdict(int)
+    bookings = session.query(Booking.property_id, Booking.start_date, Booking.end_date).filter(
+        Booking.property_id > low, Booking.property_id <= high,
+        Booking.status.in_(Booking.BLOCKING_STATUSES),
+    )
+    for property_id, start, end in bookings:
+        for month, bits in month_bits(start, end).items():
+            expected[property_id, month] |= bits
+    return expected
+
+
+def _lock_batch(session, model, low, high):
+    """
+    Hold the rows of one id batch of `model` until commit.
+
+    The incremental writers lock the parent row first (a property for its
+    occupancy months, the landlord for their payment rollups; see models.py),
+    so anything they commit between this pass reading the source rows and
+    writing the rebuilt ones cannot be overwritten. On SQLite a no-op UPDATE
+    takes the database write lock instead.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(select(model.id).where(model.id > low, model.id <= high).with_for_update()).all()
+    else:
+        session.execute(text(f"UPDATE {model.__tablename__} SET id = id WHERE id > :low AND id <= :high"),
+                        {"low": low, "high": high})
+
+
+def reconcile_occupancy(session, batch_size=BATCH_SIZE):
+    """Rebuild drifted occupancy bitmaps from blocking bookings; returns the number of months rewritten."""
+    table = PropertyOccupancy.__table__
+    fixed = 0
+    last_id = 0
+    max_id = session.query(func.max(Property.id)).scalar() or 0
+    while last_id < max_id:
+        high = last_id + batch_size
+        _lock_batch(session, Property, last_id, high)
+        expected = _expected_occupancy(session, last_id, high)
+        stored = {
+            (row.property_id, row.month): row.booked_days
+            for row in session.execute(
+                select(table).where(table.c.property_id > last_id, table.c.property_id <= high)
+            )
+        }
+        for key in stored.keys() | expected.keys():
+            bits = expected.get(key, 0)
+            if stored.get(key, 0) == bits:
+                continue
+            property_id, month = key
+            if key in stored:
+                session.execute(
+                    table.update().where(table.c.property_id == property_id, table.c.month == month)
+                    .values(booked_days=bits)
+                )
+            else:
+                session.execute(table.insert().values(property_id=property_id, month=month, booked_days=bits))
+            fixed += 1
+        session.commit()
+        last_id = high
+    return fixed
+
+
+def reconcile_payment_rollups(session, batch_size=BATCH_SIZE):
+    """Rebuild drifted payment_rollups rows from the payments; returns the number of rows rewritten."""
+    table = PaymentRollup.__table__
+    fixed = 0
+    last_id = 0
+    max_id = session.query(func.max(User.id)).scalar() or 0
+    while last_id < max_id:
+        high = last_id + batch_size
+        _lock_batch(session, User, last_id, high)
+        expected = defaultdict(lambda: [0, 0])
+        payments = session.query(Payment.landlord_id, Payment.created_at, Payment.status, Payment.amount).filter(
+            Payment.landlord_id > last_id, Payment.landlord_id <= high,
+        )
+        for landlord_id, created_at, status, amount in payments:
+            bucket = expected[landlord_id, month_key(created_at), status]
+            bucket[0] += amount
+            bucket[1] += 1
+        stored = {
+            (row.landlord_id, row.month, row.status): [row.amount, row.count]
+            for row in session.execute(
+                select(table).where(table.c.landlord_id > last_id, table.c.landlord_id <= high)
+            )
+        }
+        for key in stored.keys() | expected.keys():
+            amount, count = expected.get(key, (0, 0))
+            if key in stored and stored[key] == [amount, count]:
+                continue
+            landlord_id, month, status = key
+            if key in stored:
+                session.execute(
+                    table.update()
+                    .where(table.c.landlord_id == landlord_id, table.c.month == month, table.c.status == status)
+                    .values(amount=amount, count=count)
+                )
+            else:
+                session.execute(table.insert().values(
+                    landlord_id=landlord_id, month=month, status=status, amount=amount, count=count
+                ))
+            fixed += 1
+        session.commit()
+        last_id = high
+    return fixed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile property counter caches")
+    parser.add_argument("--every", type=float, help="repeat every N seconds instead of running once")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    from server.app import app
+
+    with app.app_context():
+        while True:
+            fixed = reconcile_property_counters(db.session, args.batch_size)
+            print(f"Reconciled property counters: {fixed} rows fixed")
+            fixed = reconcile_occupancy(db.session, args.batch_size)
+            print(f"Reconciled occupancy calendars: {fixed} months fixed")
+            fixed = reconcile_payment_rollups(db.session, args.batch_size)
+            print(f"Reconciled payment rollups: {fixed} rows fixed")
+            if not args.every:
+                break
+            time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
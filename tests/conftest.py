@@ -0,0 +1,98 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+# server.app reads its config at import time: point it at a throwaway SQLite
+# database, offline uploads and cheap password hashing first.
+_tmp = tempfile.mkdtemp(prefix="rentease-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["CACHE_SHARED_URL"] = ""
+os.environ["IMAGE_UPLOADER"] = "fake"
+os.environ["IMAGE_SPOOL_DIR"] = os.path.join(_tmp, "spool")
+os.environ["IMAGE_UPLOAD_RECOVER_EVERY"] = "0"
+os.environ["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy import event, text  # noqa: E402
+
+from server.app import app as flask_app, response_cache  # noqa: E402
+from server.models import db, Property, PropertyAmenity, User  # noqa: E402
+from server.utils.identity import identity_cache  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    """The app with every table emptied and the in-process caches dropped."""
+    with flask_app.app_context():
+        with db.engine.begin() as conn:
+            for table in reversed(db.metadata.sorted_tables):
+                conn.execute(table.delete())
+            conn.execute(text("DELETE FROM properties_fts"))
+        response_cache.invalidate_prefix("")
+        identity_cache.clear()  # SQLite reuses the emptied tables' ids
+        yield flask_app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def queries(app):
+    """SQL statements executed while the test runs."""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def make_user(app):
+    def make(role="tenant", name=None, email=None, password="pw"):
+        count = User.query.count()
+        user = User(name=name or f"{role.title()} {count}", email=email or f"{role}{count}@example.com", role=role)
+        user.password = password
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def make_property(app):
+    base = datetime(2025, 1, 1)
+
+    def make(landlord, n=1, **values):
+        created = []
+        for i in range(n):
+            count = Property.query.count()
+            prop = Property(**{
+                "title": f"Flat {count}",
+                "description": "A quiet flat",
+                "rent_price": 1000 + count,
+                "location": "Westlands, Nairobi",
+                "landlord_id": landlord.id,
+                "created_at": base + timedelta(hours=count),
+                **values,
+            })
+            prop.amenities.append(PropertyAmenity(amenity_name="wifi"))
+            db.session.add(prop)
+            created.append(prop)
+        db.session.commit()
+        return created if n > 1 else created[0]
+    return make
+
+
+@pytest.fixture
+def auth(app):
+    def headers(user):
+        return {"Authorization": f"Bearer {create_access_token(identity=user)}"}
+    return headers
@@ -0,0 +1,70 @@
+from datetime import date
+
+from server.models import db, Booking
+from server.utils.bookings import find_overlapping_bookings
+from server.workers.booking_overlaps import cancel_later_overlaps
+
+
+def book(client, tenant, prop, start, end):
+    return client.post("/bookings", json={
+        "tenant_id": tenant.id, "property_id": prop.id, "start_date": start, "end_date": end,
+    })
+
+
+def test_overlapping_request_is_a_409(client, make_user, make_property):
+    prop = make_property(make_user("landlord"))
+    first = book(client, make_user("tenant"), prop, "2025-06-01", "2025-06-10").get_json()
+    client.put(f"/bookings/{first['id']}", json={"status": "approved"})
+
+    response = book(client, make_user("tenant"), prop, "2025-06-10", "2025-06-12")
+
+    assert response.status_code == 409
+    assert response.get_json()["conflicting_booking_id"] == first["id"]
+    assert book(client, make_user("tenant"), prop, "2025-06-11", "2025-06-12").status_code == 201
+
+
+def test_approving_into_an_approved_range_is_a_409(client, make_user, make_property):
+    prop = make_property(make_user("landlord"))
+    first = book(client, make_user("tenant"), prop, "2025-06-01", "2025-06-10").get_json()
+    second = book(client, make_user("tenant"), prop, "2025-06-05", "2025-06-06").get_json()
+    assert client.put(f"/bookings/{first['id']}", json={"status": "approved"}).status_code == 200
+
+    assert client.put(f"/bookings/{second['id']}", json={"status": "approved"}).status_code == 409
+    assert db.session.get(Booking, second["id"]).status == "pending"
+
+
+def test_inverted_dates_are_a_bad_request(client, make_user, make_property):
+    prop = make_property(make_user("landlord"))
+    assert book(client, make_user("tenant"), prop, "2025-06-10", "2025-06-01").status_code == 400
+
+
+def test_legacy_overlaps_are_found_and_resolved(app, make_user, make_property):
+    prop = make_property(make_user("landlord"))
+    tenant = make_user("tenant")
+    # written directly, as rows from before the conflict check
+    for start, end in [(1, 10), (5, 12), (11, 15), (20, 25)]:
+        db.session.add(Booking(tenant_id=tenant.id, property_id=prop.id, status="approved",
+                               start_date=date(2025, 6, start), end_date=date(2025, 6, end)))
+    db.session.commit()
+    ids = [b.id for b in Booking.query.order_by(Booking.id)]
+
+    assert [tuple(pair) for pair in find_overlapping_bookings(db.session)] == [(ids[0], ids[1]), (ids[1], ids[2])]
+    assert cancel_later_overlaps(db.session) == [ids[1]]
+    assert find_overlapping_bookings(db.session) == []
+
+
+def test_conflicts_with_legacy_overlapping_bookings_are_still_found(client, make_user, make_property):
+    prop = make_property(make_user("landlord"))
+    tenant = make_user("tenant")
+    long_stay = Booking(tenant_id=tenant.id, property_id=prop.id, status="approved",
+                        start_date=date(2025, 6, 1), end_date=date(2025, 6, 30))
+    # written directly, overlapping the long stay, as rows from before the conflict check
+    db.session.add_all([long_stay, Booking(tenant_id=tenant.id, property_id=prop.id, status="approved",
+                                           start_date=date(2025, 6, 5), end_date=date(2025, 6, 6))])
+    db.session.commit()
+    long_stay_id = long_stay.id
+
+    response = book(client, make_user("tenant"), prop, "2025-06-20", "2025-06-25")
+
+    assert response.status_code == 409
+    assert response.get_json()["conflicting_booking_id"] == long_stay_id
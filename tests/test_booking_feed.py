@@ -0,0 +1,53 @@
+from datetime import date
+
+from server.models import db, Booking
+
+
+def add_bookings(tenant, *properties):
+    for day, prop in enumerate(properties, start=1):
+        db.session.add(Booking(tenant_id=tenant.id, property_id=prop.id, status="pending",
+                               start_date=date(2025, 8, day), end_date=date(2025, 8, day)))
+    db.session.commit()
+
+
+def test_embedded_feed_by_default(client, make_user, make_property):
+    tenant = make_user("tenant")
+    prop = make_property(make_user("landlord"), title="Loft")
+    add_bookings(tenant, prop)
+
+    feed = client.get(f"/bookings?tenant_id={tenant.id}").get_json()
+
+    assert [b["property"]["title"] for b in feed] == ["Loft"]
+
+
+def test_sideload_includes_each_property_once(client, queries, make_user, make_property):
+    tenant = make_user("tenant")
+    loft, cabin = make_property(make_user("landlord"), n=2)
+    add_bookings(tenant, loft, cabin, loft, loft)
+    tenant_id, loft_id, cabin_id = tenant.id, loft.id, cabin.id
+    queries.clear()
+
+    feed = client.get(f"/bookings?tenant_id={tenant_id}&sideload=properties").get_json()
+
+    assert [b["property_id"] for b in feed["bookings"]] == [loft_id, cabin_id, loft_id, loft_id]
+    assert all("property" not in b for b in feed["bookings"])
+    assert set(feed["included"]["properties"]) == {str(loft_id), str(cabin_id)}
+    # one load of the properties table (older SQLAlchemy also joins "properties AS properties_1" into a selectin load)
+    assert sum("FROM properties " in q and "FROM properties AS" not in q for q in queries) == 1
+
+
+def test_sideload_property_fields_and_landlord_feed(client, make_user, make_property):
+    tenant, landlord = make_user("tenant"), make_user("landlord")
+    prop = make_property(landlord)
+    add_bookings(tenant, prop)
+    expected = {"id": prop.id, "title": prop.title}
+
+    feed = client.get(f"/landlord/bookings?landlord_id={landlord.id}&sideload=properties"
+                      f"&property_fields=id,title").get_json()
+
+    assert list(feed["included"]["properties"].values()) == [expected]
+
+
+def test_unknown_sideload_is_a_bad_request(client, make_user):
+    tenant = make_user("tenant")
+    assert client.get(f"/bookings?tenant_id={tenant.id}&sideload=tenants").status_code == 400
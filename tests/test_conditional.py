@@ -0,0 +1,44 @@
+def revalidate(client, url, etag):
+    return client.get(url, headers={"If-None-Match": etag})
+
+
+def test_property_detail_answers_304_until_it_changes(client, make_user, make_property):
+    prop = make_property(make_user("landlord"))
+    url = f"/properties/{prop.id}"
+
+    first = client.get(url)
+    assert first.status_code == 200 and first.headers["ETag"]
+    assert revalidate(client, url, first.headers["ETag"]).status_code == 304
+
+    client.put(url, json={"title": "Renamed"})
+    changed = revalidate(client, url, first.headers["ETag"])
+    assert changed.status_code == 200
+    assert changed.get_json()["title"] == "Renamed"
+
+
+def test_listing_etag_depends_on_the_query_string(client, make_user, make_property):
+    make_property(make_user("landlord"), n=2)
+
+    etag = client.get("/properties?limit=1").headers["ETag"]
+
+    assert revalidate(client, "/properties?limit=1", etag).status_code == 304
+    assert revalidate(client, "/properties?limit=2", etag).status_code == 200
+
+
+def test_booking_feed_etag_changes_with_the_booking_status(client, make_user, make_property):
+    tenant = make_user("tenant")
+    prop = make_property(make_user("landlord"))
+    booking = client.post("/bookings", json={
+        "tenant_id": tenant.id, "property_id": prop.id, "start_date": "2025-06-01", "end_date": "2025-06-05",
+    }).get_json()
+    url = f"/bookings?tenant_id={tenant.id}"
+    etag = client.get(url).headers["ETag"]
+    assert revalidate(client, url, etag).status_code == 304
+
+    client.put(f"/bookings/{booking['id']}", json={"status": "approved"})
+
+    assert revalidate(client, url, etag).status_code == 200
+
+
+def test_missing_property_is_not_a_304(client):
+    assert revalidate(client, "/properties/999", '"anything"').status_code == 404
@@ -0,0 +1,58 @@
+from datetime import date
+
+from server.models import db, Booking, Property, Review
+from server.workers.reconcile_counters import reconcile_property_counters
+
+
+def counters(property_id):
+    db.session.expire_all()
+    prop = db.session.get(Property, property_id)
+    return prop.booking_count, prop.favorite_count, prop.rating_count, prop.rating_avg
+
+
+def test_write_paths_keep_the_counters_in_step(app, make_user, make_property):
+    tenant, other = make_user("tenant"), make_user("tenant")
+    prop = make_property(make_user("landlord"))
+    booking = Booking(tenant_id=tenant.id, property_id=prop.id, start_date=date(2025, 6, 1),
+                      end_date=date(2025, 6, 3), status="approved")
+    db.session.add(booking)
+    prop.favorited_by.extend([tenant, other])
+    db.session.commit()
+    db.session.add(Review(booking_id=booking.id, tenant_id=tenant.id, property_id=prop.id,
+                          landlord_id=prop.landlord_id, rating=4, review_text="Nice"))
+    db.session.commit()
+    assert counters(prop.id) == (1, 2, 1, 4.0)
+
+    prop.favorited_by.remove(other)
+    db.session.commit()
+    assert counters(prop.id)[1] == 1
+
+
+def test_listing_serves_counters_without_loading_id_lists(client, queries, make_user, make_property):
+    prop = make_property(make_user("landlord"))
+    prop.favorited_by.append(make_user("tenant"))
+    db.session.commit()
+    queries.clear()
+
+    item = client.get("/properties").get_json()[0]
+
+    assert item["favorite_count"] == 1
+    assert "favorited_by" not in item and "bookings" not in item
+    assert not any("favorites" in q or "FROM bookings" in q for q in queries)
+    # the id lists are still there for the detail view and explicit ?fields=
+    assert client.get(f"/properties/{prop.id}").get_json()["favorited_by"]
+    assert "bookings" in client.get("/properties?fields=detail").get_json()[0]
+
+
+def test_reconciler_repairs_drift(app, make_user, make_property):
+    prop = make_property(make_user("landlord"))
+    untouched = make_property(make_user("landlord"))
+    prop.favorited_by.append(make_user("tenant"))
+    db.session.commit()
+    db.session.execute(Property.__table__.update().where(Property.id == prop.id)
+                       .values(favorite_count=7, booking_count=3))
+    db.session.commit()
+
+    assert reconcile_property_counters(db.session, batch_size=1) == 1
+    assert counters(prop.id) == (0, 1, 0, None)
+    assert counters(untouched.id) == (0, 0, 0, None)
@@ -0,0 +1,42 @@
+from datetime import date, datetime
+
+from server.models import db, Booking, Payment
+
+
+def test_dashboard_sections_in_a_fixed_number_of_queries(client, queries, make_user, make_property):
+    landlord, tenant = make_user("landlord"), make_user("tenant", name="Wanjiru")
+    first, second = make_property(landlord, n=2)
+    approved = Booking(tenant_id=tenant.id, property_id=first.id, status="approved",
+                       start_date=date(2025, 6, 1), end_date=date(2025, 6, 15))
+    db.session.add_all([
+        approved,
+        Booking(tenant_id=tenant.id, property_id=second.id, status="pending",
+                start_date=date(2025, 6, 20), end_date=date(2025, 6, 22)),
+    ])
+    db.session.commit()
+    db.session.add(Payment(booking_id=approved.id, tenant_id=tenant.id, landlord_id=landlord.id, amount=1200,
+                           payment_method="bank_transfer", transaction_id="TXN-1", status="completed",
+                           created_at=datetime(2025, 6, 1)))
+    db.session.commit()
+    landlord_id, first_id = landlord.id, first.id
+    queries.clear()
+
+    response = client.get(f"/landlord/dashboard?landlord_id={landlord_id}&from=2025-06-01&to=2025-06-30")
+
+    dashboard = response.get_json()
+    assert dashboard["bookings_by_status"] == {"approved": 1, "pending": 1}
+    assert dashboard["pending_approvals"]["count"] == 1
+    assert dashboard["pending_approvals"]["oldest"][0]["tenant_name"] == "Wanjiru"
+    occupancy = {row["property_id"]: row for row in dashboard["occupancy"]}
+    assert occupancy[first_id]["booked_days"] == 15 and occupancy[first_id]["occupancy_rate"] == 0.5
+    assert dashboard["income"]["completed"]["count"] == 1
+    assert len(queries) <= 5
+
+    queries.clear()
+    again = client.get(f"/landlord/dashboard?landlord_id={landlord_id}&from=2025-06-01&to=2025-06-30")
+    assert again.headers["X-Cache"] == "HIT" and not queries
+
+
+def test_dashboard_requires_a_landlord(client):
+    assert client.get("/landlord/dashboard").status_code == 400
+    assert client.get("/landlord/dashboard?landlord_id=1&from=2025-06-30&to=2025-06-01").status_code == 400
@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from server.utils.db_pool import (
+    PoolMetrics, TimedNullPool, TimedQueuePool, engine_options, pool_metrics, pool_status,
+)
+
+
+def test_engine_options_per_mode():
+    queue = engine_options("postgresql://db/rentease", pool_size=3, max_overflow=2, pool_timeout=4)
+    assert queue["poolclass"] is TimedQueuePool
+    assert (queue["pool_size"], queue["max_overflow"], queue["pool_timeout"]) == (3, 2, 4)
+
+    assert engine_options("postgresql+psycopg2://bouncer/rentease", "pgbouncer") == {"poolclass": TimedNullPool}
+    assert engine_options("sqlite://") == {}
+    with pytest.raises(ValueError):
+        engine_options("postgresql://db/rentease", "session")
+
+
+def test_checkout_waits_and_timeouts_are_recorded(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.05)
+    before = pool_metrics.snapshot()
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert pool_status(engine)["checked_out"] == 1
+        with pytest.raises(PoolTimeout):
+            engine.connect()
+
+    after = pool_status(engine)
+    assert (after["size"], after["checked_out"], after["max_overflow"]) == (1, 0, 0)
+    assert after["checkouts"] == before["checkouts"] + 1
+    assert after["timeouts"] == before["timeouts"] + 1
+
+
+def test_percentiles():
+    metrics = PoolMetrics()
+    for ms in range(1, 101):
+        metrics.record(ms / 1000)
+
+    wait = metrics.snapshot()["wait_ms"]
+    assert (wait["p50"], wait["p99"], wait["max"], wait["samples"]) == (51.0, 100.0, 100.0, 100)
+
+
+def test_metrics_endpoint(client):
+    status = client.get("/metrics/db-pool").get_json()
+    assert status["pool"] == "TimedQueuePool" and status["checkouts"] >= 1
@@ -0,0 +1,71 @@
+from datetime import date, datetime, timedelta
+
+from server.models import db, Booking, BookingEvent
+from server.workers.booking_digests import run_window
+
+
+class SendGridStub:
+    """Rejects (with `status`) every request whose recipients include one of `bad`; accepts the rest."""
+
+    def __init__(self, bad=(), status=400):
+        self.bad, self.status = set(bad), status
+        self.requests = []
+
+    def send(self, payload):
+        recipients = [p["to"][0]["email"] for p in payload["personalizations"]]
+        self.requests.append(recipients)
+        if self.bad & set(recipients):
+            return self.status, "rejected"
+        return 202, None
+
+
+def book(tenant, prop):
+    db.session.add(Booking(tenant_id=tenant.id, property_id=prop.id, status="pending",
+                           start_date=date(2025, 10, 1), end_date=date(2025, 10, 2)))
+    db.session.commit()
+
+
+def window(sendgrid, max_attempts=3):
+    return run_window(db.session, sendgrid, batch_size=1000, max_items=20, max_attempts=max_attempts,
+                      now=datetime.utcnow() + timedelta(seconds=1))
+
+
+def test_one_digest_per_recipient_per_window(app, make_user, make_property):
+    landlord = make_user("landlord", email="landlord@example.com")
+    prop = make_property(landlord)
+    for _ in range(3):
+        book(make_user("tenant"), prop)
+    sendgrid = SendGridStub()
+
+    stats = window(sendgrid)
+
+    assert sendgrid.requests == [["landlord@example.com"]]
+    assert (stats["events"], stats["emails"], stats["batches"]) == (3, 1, 1)
+    assert BookingEvent.query.filter(BookingEvent.processed_at.is_(None)).count() == 0
+
+
+def test_a_rejected_recipient_is_isolated_and_dead_lettered(app, make_user, make_property):
+    landlords = [make_user("landlord", email=f"landlord{i}@example.com") for i in range(4)]
+    for landlord in landlords:
+        book(make_user("tenant"), make_property(landlord))
+    sendgrid = SendGridStub(bad={"landlord2@example.com"})
+
+    stats = window(sendgrid)
+
+    assert stats["emails"] == 3 and stats["dead_lettered"] == 1
+    dead = BookingEvent.query.filter(BookingEvent.last_error.isnot(None)).one()
+    assert dead.recipient_id == landlords[2].id and dead.processed_at is not None
+    assert BookingEvent.query.filter(BookingEvent.processed_at.is_(None)).count() == 0
+
+
+def test_retryable_failures_are_dead_lettered_after_max_attempts(app, make_user, make_property):
+    book(make_user("tenant"), make_property(make_user("landlord", email="landlord@example.com")))
+    sendgrid = SendGridStub(bad={"landlord@example.com"}, status=503)
+
+    assert window(sendgrid, max_attempts=2)["dead_lettered"] == 0
+    event = BookingEvent.query.one()
+    assert (event.attempts, event.processed_at) == (1, None)
+
+    assert window(sendgrid, max_attempts=2)["dead_lettered"] == 1
+    assert window(sendgrid, max_attempts=2)["batches"] == 0
+    assert BookingEvent.query.one().last_error == "503: rejected"
@@ -0,0 +1,26 @@
+from decimal import Decimal
+
+import pytest
+
+
+def test_json_renders_decimals_and_datetimes_as_strings(client, make_user, make_property):
+    prop = make_property(make_user("landlord"), rent_price=Decimal("1250.50"))
+
+    body = client.get(f"/properties/{prop.id}").get_json()
+
+    assert body["rent_price"] == "1250.50"
+    assert body["created_at"].startswith("2025-01-01T")
+
+
+def test_msgpack_is_negotiated_and_cached_separately(client, make_user, make_property):
+    msgpack = pytest.importorskip("msgpack")  # optional, like orjson: JSON is served without it
+    make_property(make_user("landlord"))
+
+    as_json = client.get("/properties")
+    as_msgpack = client.get("/properties", headers={"Accept": "application/msgpack"})
+
+    assert as_msgpack.mimetype == "application/msgpack"
+    assert "Accept" in as_msgpack.headers["Vary"]
+    assert msgpack.unpackb(as_msgpack.data) == as_json.get_json()
+    # a JSON client after a MessagePack one still gets JSON, from its own cache entry
+    assert client.get("/properties").mimetype == "application/json"
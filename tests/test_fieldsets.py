@@ -0,0 +1,28 @@
+def test_fields_projects_keys_and_columns(client, queries, make_user, make_property):
+    property_id = make_property(make_user("landlord")).id
+    queries.clear()
+
+    response = client.get(f"/properties/{property_id}?fields=title,rent_price")
+
+    assert response.status_code == 200
+    assert set(response.get_json()) == {"id", "title", "rent_price"}
+    select = next(q for q in queries if "properties.title" in q)
+    assert "description" not in select
+
+
+def test_include_adds_to_the_summary_tier(client, make_user, make_property):
+    prop = make_property(make_user("landlord"))
+
+    body = client.get(f"/properties/{prop.id}?fields=summary&include=amenities").get_json()
+
+    assert "description" not in body
+    assert body["amenities"][0]["amenity_name"] == "wifi"
+
+
+def test_unknown_field_is_a_bad_request(client, make_user, make_property):
+    prop = make_property(make_user("landlord"))
+
+    response = client.get(f"/properties/{prop.id}?fields=title,password")
+
+    assert response.status_code == 400
+    assert "password" in response.get_json()["error"]
@@ -0,0 +1,48 @@
+import io
+
+from server.models import PropertyImage
+
+
+def images(*names):
+    return [(io.BytesIO(b"\x89PNG" + name.encode()), f"{name}.png", "image/png") for name in names]
+
+
+def post_images(client, property_id, *names, **form):
+    return client.post(f"/properties/{property_id}/images", data={"images": images(*names), **form},
+                       content_type="multipart/form-data")
+
+
+def test_first_batch_sets_the_primary_image(client, make_user, make_property):
+    property_id = make_property(make_user("landlord")).id
+
+    response = post_images(client, property_id, "front", "kitchen", caption=["Front", "Kitchen"])
+
+    assert response.status_code == 201
+    gallery = response.get_json()
+    assert [(i["caption"], i["is_primary"], i["sort_order"]) for i in gallery] == [
+        ("Front", True, 0), ("Kitchen", False, 1),
+    ]
+    assert client.get(f"/properties/{property_id}").get_json()["image_url"] == gallery[0]["image_url"]
+
+
+def test_every_batch_changes_the_etag(client, make_user, make_property):
+    property_id = make_property(make_user("landlord")).id
+    post_images(client, property_id, "front")
+    etag = client.get(f"/properties/{property_id}").headers["ETag"]
+
+    assert post_images(client, property_id, "garden").status_code == 201  # no primary given
+
+    response = client.get(f"/properties/{property_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+
+
+def test_out_of_range_primary_keeps_the_current_one(client, make_user, make_property):
+    property_id = make_property(make_user("landlord")).id
+    post_images(client, property_id, "front")
+
+    response = post_images(client, property_id, "a", "b", "c", primary="5")
+
+    assert response.status_code == 400
+    assert [(i.caption, i.is_primary) for i in PropertyImage.query.filter_by(property_id=property_id)] == [
+        (None, True),
+    ]
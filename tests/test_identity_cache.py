@@ -0,0 +1,53 @@
+from server.models import db, User
+from server.utils.identity import identity_cache
+
+
+def payments(client, headers):
+    return client.get("/payments", headers=headers)
+
+
+def test_fresh_tokens_are_trusted_without_a_users_query(client, queries, auth, make_user):
+    headers = auth(make_user("tenant"))
+    before = dict(identity_cache.stats)
+    queries.clear()
+
+    assert payments(client, headers).status_code == 200
+
+    assert identity_cache.stats["claims"] == before["claims"] + 1
+    assert not any("FROM users" in q for q in queries)
+
+
+def test_a_changed_user_is_looked_up_once_then_cached(client, auth, make_user):
+    user = make_user("tenant")
+    headers = auth(user)
+    db.session.expire_all()  # as after any commit: the old role has to be reloaded to see the change
+    user.role = "landlord"
+    db.session.commit()
+    before = dict(identity_cache.stats)
+
+    payments(client, headers)
+    payments(client, headers)
+
+    assert identity_cache.stats["lookups"] == before["lookups"] + 1
+    assert identity_cache.stats["hits"] == before["hits"] + 1
+
+
+def test_a_deleted_users_token_is_refused(client, auth, make_user):
+    user = make_user("tenant")
+    headers = auth(user)
+    db.session.delete(db.session.get(User, user.id))
+    db.session.commit()
+
+    assert payments(client, headers).status_code == 401
+
+
+def test_login_still_returns_the_full_user(client, make_property, make_user):
+    landlord = make_user("landlord", email="wanjiru@example.com", password="secret")
+    make_property(landlord)
+
+    response = client.post("/login", json={"email": "wanjiru@example.com", "password": "secret"})
+
+    user = response.get_json()["user"]
+    assert response.status_code == 200
+    assert len(user["properties"]) == 1 and user["bookings"] == [] and user["favorites"] == []
+    assert user["total_income"] == 0
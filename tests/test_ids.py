@@ -0,0 +1,43 @@
+import runpy
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from server.utils.ids import MAX_WORKER_ID, SnowflakeGenerator, process_worker_id
+
+GUNICORN_CONF = runpy.run_path(str(Path(__file__).parent.parent / "gunicorn.conf.py"))
+
+
+def test_worker_id_is_the_base_plus_the_worker_index(monkeypatch):
+    monkeypatch.delenv("WORKER_INDEX", raising=False)
+    assert process_worker_id(8) == 8
+    monkeypatch.setenv("WORKER_INDEX", "3")
+    assert process_worker_id(8) == 11
+    assert SnowflakeGenerator(8).next_int() >> 12 & MAX_WORKER_ID == 11
+    with pytest.raises(ValueError):
+        process_worker_id(MAX_WORKER_ID)
+
+
+def test_ids_increase_within_a_process():
+    generator = SnowflakeGenerator()
+    ids = [generator.next_id() for _ in range(5000)]
+    assert ids == sorted(ids) and len(set(ids)) == 5000
+
+
+def test_gunicorn_workers_get_the_lowest_free_index(monkeypatch):
+    server = SimpleNamespace(WORKERS={})
+    for pid in (101, 102, 103):
+        worker = SimpleNamespace()
+        GUNICORN_CONF["pre_fork"](server, worker)
+        server.WORKERS[pid] = worker
+    assert [w.worker_index for w in server.WORKERS.values()] == [0, 1, 2]
+
+    del server.WORKERS[102]  # a worker died; its replacement takes over slot 1
+    replacement = SimpleNamespace()
+    GUNICORN_CONF["pre_fork"](server, replacement)
+    assert replacement.worker_index == 1
+
+    monkeypatch.setenv("WORKER_INDEX", "")  # restored after the test
+    GUNICORN_CONF["post_fork"](server, replacement)
+    assert process_worker_id(0) == 1
@@ -0,0 +1,56 @@
+from datetime import date, datetime
+
+from server.models import db, Booking, Payment, PaymentRollup
+from server.workers.reconcile_counters import reconcile_payment_rollups
+
+
+def pay(landlord, tenant, prop, amount, status, created_at):
+    booking = Booking(tenant_id=tenant.id, property_id=prop.id, status="pending",
+                      start_date=created_at.date(), end_date=created_at.date())
+    db.session.add(booking)
+    db.session.flush()
+    payment = Payment(booking_id=booking.id, tenant_id=tenant.id, landlord_id=landlord.id, amount=amount,
+                      payment_method="bank_transfer", transaction_id=f"TXN-{booking.id}", status=status,
+                      created_at=created_at)
+    db.session.add(payment)
+    db.session.commit()
+    return payment
+
+
+def test_income_total_and_monthly_series(client, make_user, make_property):
+    landlord, tenant = make_user("landlord"), make_user("tenant")
+    prop = make_property(landlord)
+    pay(landlord, tenant, prop, 1000, "completed", datetime(2025, 1, 5))
+    pay(landlord, tenant, prop, 500, "completed", datetime(2025, 3, 9))
+    refunded = pay(landlord, tenant, prop, 200, "completed", datetime(2025, 3, 20))
+    refunded.status = "refunded"
+    db.session.commit()
+
+    assert client.get(f"/landlord/income?landlord_id={landlord.id}").get_json()["income"] == 1500.0
+
+    series = client.get(f"/landlord/income?landlord_id={landlord.id}&granularity=month"
+                        f"&from=2025-01&to=2025-03").get_json()["series"]
+    assert [(p["period"], float(p["income"])) for p in series] == [("2025-01", 1000), ("2025-02", 0), ("2025-03", 500)]
+    assert float(series[2]["by_status"]["refunded"]["amount"]) == 200
+
+
+def test_bad_income_ranges(client):
+    assert client.get("/landlord/income?landlord_id=1&granularity=week").status_code == 400
+    assert client.get("/landlord/income?landlord_id=1&granularity=month&from=2025-05&to=2025-01").status_code == 400
+
+
+def test_reconciler_rebuilds_rollups_per_landlord_batch(app, make_user, make_property):
+    landlord, tenant = make_user("landlord"), make_user("tenant")
+    prop = make_property(landlord)
+    pay(landlord, tenant, prop, 1000, "completed", datetime(2025, 1, 5))
+    landlord_id = landlord.id
+    table = PaymentRollup.__table__
+    db.session.execute(table.update().values(amount=1, count=9))
+    db.session.execute(table.insert().values(landlord_id=landlord_id, month=202502, status="completed",
+                                             amount=50, count=1))
+    db.session.commit()
+
+    assert reconcile_payment_rollups(db.session, batch_size=1) == 2
+    rows = {(r.month, r.amount, r.count) for r in db.session.execute(db.select(table))}
+    assert rows == {(202501, 1000, 1), (202502, 0, 0)}
+    assert reconcile_payment_rollups(db.session) == 0
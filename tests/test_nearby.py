@@ -0,0 +1,59 @@
+import pytest
+
+from server.utils.geo import candidate_cell_ranges, grid_cell, haversine_km
+
+WESTLANDS = (-1.2676, 36.8108)
+KAREN = (-1.3194, 36.7073)  # ~12.8 km from Westlands
+MOMBASA = (-4.0435, 39.6682)
+
+
+def create(client, landlord, title, lat, lng):
+    response = client.post("/properties", json={
+        "title": title, "description": "A flat", "location": "Kenya", "rent_price": 1000,
+        "landlord_id": landlord.id, "latitude": lat, "longitude": lng,
+    })
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+
+def test_nearby_returns_properties_within_the_radius_nearest_first(client, make_user):
+    landlord = make_user("landlord")
+    create(client, landlord, "Karen", *KAREN)
+    create(client, landlord, "Westlands", *WESTLANDS)
+    create(client, landlord, "Mombasa", *MOMBASA)
+
+    response = client.get("/properties/nearby", query_string={"lat": WESTLANDS[0], "lng": WESTLANDS[1], "radius_km": 20})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [p["title"] for p in body] == ["Westlands", "Karen"]
+    assert body[0]["distance_km"] == 0
+    assert body[1]["distance_km"] == pytest.approx(12.8, abs=0.3)
+
+
+def test_nearby_rejects_out_of_range_coordinates(client):
+    assert client.get("/properties/nearby?lat=91&lng=0").status_code == 400
+    assert client.get("/properties/nearby?lat=0&lng=0&radius_km=0").status_code == 400
+
+
+@pytest.mark.parametrize("lat,lng", [WESTLANDS, (0.0, 179.99), (-89.9, 10.0)])
+def test_candidate_cells_cover_every_point_in_the_radius(lat, lng):
+    ranges = candidate_cell_ranges(lat, lng, 10)
+    for dlat in (-0.08, 0.0, 0.08):
+        for dlng in (-0.08, 0.0, 0.08):
+            plat, plng = max(-90.0, min(90.0, lat + dlat)), (lng + dlng + 180) % 360 - 180
+            if haversine_km(lat, lng, [plat], [plng])[0] <= 10:
+                cell = grid_cell(plat, plng)
+                assert any(lo <= cell <= hi for lo, hi in ranges)
+
+
+def test_vectorized_and_fallback_distances_agree(monkeypatch):
+    pytest.importorskip("numpy")
+    lats, lngs = [KAREN[0], MOMBASA[0]], [KAREN[1], MOMBASA[1]]
+    vectorized = haversine_km(*WESTLANDS, lats, lngs)
+
+    monkeypatch.setattr("server.utils.geo.np", None)
+
+    assert haversine_km(*WESTLANDS, lats, lngs) == pytest.approx(vectorized)
+    assert vectorized[0] == pytest.approx(12.8, abs=0.2)
+    assert isinstance(vectorized[0], float)
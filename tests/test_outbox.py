@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+from server.models import db, OutboxEmail
+from server.workers.email_outbox import drain_once
+
+
+class RecordingClient:
+    """Stands in for SendGridClient: answers each send with the next (status, error) in `responses`."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent = []
+
+    def send(self, payload):
+        self.sent.append(payload)
+        return self.responses.pop(0) if self.responses else (202, None)
+
+
+def test_registration_queues_the_welcome_email(client):
+    response = client.post("/register", json={"name": "Amina", "email": "amina@example.com", "password": "pw"})
+
+    assert response.status_code == 201
+    email = OutboxEmail.query.one()
+    assert (email.to_email, email.status) == ("amina@example.com", "pending")
+    assert "Amina" in email.subject
+
+
+def test_drain_sends_and_records_outcomes(app):
+    for address in ("a@example.com", "b@example.com", "c@example.com"):
+        db.session.add(OutboxEmail(to_email=address, subject="Hi", html_content="<p>Hi</p>",
+                                   next_attempt_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+    sendgrid = RecordingClient((202, None), (503, "busy"), (400, "bad address"))
+
+    assert drain_once(db.session, sendgrid, batch_size=10, max_attempts=3) == (3, 1)
+
+    rows = {e.to_email: e for e in OutboxEmail.query}
+    assert rows["a@example.com"].status == "sent"
+    assert rows["b@example.com"].status == "pending" and rows["b@example.com"].attempts == 1
+    assert rows["b@example.com"].next_attempt_at > datetime.utcnow() - timedelta(seconds=1)
+    assert rows["c@example.com"].status == "dead" and rows["c@example.com"].last_error == "400: bad address"
+
+
+def test_retryable_failures_dead_letter_after_max_attempts(app):
+    db.session.add(OutboxEmail(to_email="a@example.com", subject="Hi", html_content="x",
+                               next_attempt_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+
+    for _ in range(2):
+        drain_once(db.session, RecordingClient((500, "down")), batch_size=10, max_attempts=2)
+        OutboxEmail.query.update({"next_attempt_at": datetime.utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+
+    email = OutboxEmail.query.one()
+    assert (email.status, email.attempts) == ("dead", 2)
+    # a dead row is never claimed again
+    assert drain_once(db.session, RecordingClient(), batch_size=10, max_attempts=2) == (0, 0)
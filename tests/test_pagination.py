@@ -0,0 +1,33 @@
+from urllib.parse import parse_qs, urlparse
+
+
+def test_keyset_pages_cover_every_property_once(client, make_user, make_property):
+    landlord = make_user("landlord")
+    make_property(landlord, n=7)
+
+    seen, after = [], None
+    while True:
+        response = client.get("/properties", query_string={"limit": 3, **({"after": after} if after else {})})
+        assert response.status_code == 200
+        seen += [p["id"] for p in response.get_json()]
+        after = response.headers.get("X-Next-Cursor")
+        if not after:
+            break
+        next_url = urlparse(response.headers["Link"].split(";")[0].strip("<>"))
+        assert parse_qs(next_url.query)["after"] == [after]
+
+    assert len(seen) == 7 and len(set(seen)) == 7
+    # newest first
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get("/properties?after=not-a-cursor")
+    assert response.status_code == 400
+
+
+def test_cursor_headers_are_exposed_to_other_origins(client, make_user, make_property):
+    make_property(make_user("landlord"), n=3)
+    response = client.get("/properties?limit=1", headers={"Origin": "https://rentease.example"})
+    exposed = {h.strip().lower() for h in response.headers["Access-Control-Expose-Headers"].split(",")}
+    assert {"x-next-cursor", "link"} <= exposed
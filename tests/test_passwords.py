@@ -0,0 +1,95 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from server.utils.passwords import PasswordHasher, PasswordHasherBusy, password_hasher
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_login_is_a_503_while_every_slot_is_taken(client, monkeypatch, make_user):
+    make_user(email="amina@example.com", password="secret")
+    monkeypatch.setattr(password_hasher, "_slots", threading.BoundedSemaphore(1))
+    password_hasher._slots.acquire()
+
+    response = client.post("/login", json={"email": "amina@example.com", "password": "secret"})
+
+    assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+    password_hasher._slots.release()
+    assert client.post("/login", json={"email": "amina@example.com", "password": "secret"}).status_code == 200
+
+
+def test_a_failed_hash_gives_its_slot_back():
+    hasher = PasswordHasher(max_pending=1)
+
+    with pytest.raises(ZeroDivisionError):
+        hasher._run(lambda: 1 / 0)
+
+    assert hasher._run(lambda: "ok") == "ok"
+
+
+def post(port, path, body):
+    request = urllib.request.Request(f"http://127.0.0.1:{port}{path}", data=json.dumps(body).encode(),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+@pytest.fixture
+def gunicorn_server(tmp_path):
+    """One gunicorn worker from gunicorn.conf.py (gthread, 4 threads) serving server.app, with slow hashes."""
+    pytest.importorskip("gunicorn")
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{tmp_path / 'gunicorn.db'}",
+        IMAGE_SPOOL_DIR=str(tmp_path / "spool"),
+        PASSWORD_HASH_METHOD="pbkdf2:sha256:600000",
+        PASSWORD_HASH_MAX_PENDING="1",
+        GUNICORN_THREADS="4",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-w", "1", "-b", f"127.0.0.1:{port}", "server.app:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1).close()
+                break
+            except OSError:
+                if server.poll() is not None or time.monotonic() > deadline:
+                    pytest.fail("gunicorn did not start")
+                time.sleep(0.1)
+        yield port
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def test_a_threaded_worker_turns_a_login_burst_away(gunicorn_server):
+    port = gunicorn_server
+    credentials = {"email": "amina@example.com", "password": "secret"}
+    assert post(port, "/register", dict(credentials, name="Amina")) == 201
+
+    with ThreadPoolExecutor(4) as burst:
+        statuses = list(burst.map(lambda _: post(port, "/login", credentials), range(4)))
+
+    # one hash runs, the rest of the burst is answered at once; afterwards the slot is free again
+    assert statuses.count(200) >= 1 and statuses.count(503) >= 1
+    assert post(port, "/login", credentials) == 200
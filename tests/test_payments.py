@@ -0,0 +1,55 @@
+from datetime import date
+
+from server.models import db, Booking, Payment
+
+
+def approved_booking(make_user, make_property):
+    tenant = make_user("tenant")
+    booking = Booking(tenant_id=tenant.id, property_id=make_property(make_user("landlord")).id, status="approved",
+                      start_date=date(2025, 9, 1), end_date=date(2025, 9, 30))
+    db.session.add(booking)
+    db.session.commit()
+    return tenant, booking
+
+
+def test_retry_with_the_same_key_replays_the_payment(client, auth, make_user, make_property):
+    tenant, booking = approved_booking(make_user, make_property)
+    headers = {**auth(tenant), "Idempotency-Key": "checkout-1"}
+    body = {"booking_id": booking.id, "amount": 1500}
+
+    first = client.post("/payments", json=body, headers=headers)
+    retry = client.post("/payments", json=body, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.get_json()["payment"]["transaction_id"] == first.get_json()["payment"]["transaction_id"]
+    assert Payment.query.count() == 1
+
+
+def test_reusing_a_key_for_another_payment_is_a_422(client, auth, make_user, make_property):
+    tenant, booking = approved_booking(make_user, make_property)
+    headers = {**auth(tenant), "Idempotency-Key": "checkout-1"}
+    client.post("/payments", json={"booking_id": booking.id, "amount": 1500}, headers=headers)
+
+    response = client.post("/payments", json={"booking_id": booking.id, "amount": 900}, headers=headers)
+
+    assert response.status_code == 422
+    assert Payment.query.count() == 1
+
+
+def test_transaction_ids_are_unique_and_sortable(client, auth, make_user, make_property):
+    ids = []
+    for _ in range(2):
+        tenant, booking = approved_booking(make_user, make_property)
+        response = client.post("/payments", json={"booking_id": booking.id, "amount": 100}, headers=auth(tenant))
+        ids.append(response.get_json()["payment"]["transaction_id"])
+
+    assert ids[0] < ids[1] and all(i.startswith("TXN-") for i in ids)
+
+
+def test_cors_preflight_allows_the_idempotency_key(client):
+    response = client.options("/payments", headers={
+        "Origin": "https://app.example", "Access-Control-Request-Method": "POST",
+        "Access-Control-Request-Headers": "Idempotency-Key",
+    })
+    assert "idempotency-key" in response.headers["Access-Control-Allow-Headers"].lower()
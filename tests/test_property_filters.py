@@ -0,0 +1,63 @@
+from datetime import date
+
+from server.models import db, Booking, PropertyAmenity
+
+
+def listed(client, **params):
+    response = client.get("/properties", query_string=params)
+    assert response.status_code == 200
+    return {p["title"] for p in response.get_json()}
+
+
+def test_rent_location_and_availability_filters(client, make_user, make_property):
+    landlord = make_user("landlord")
+    make_property(landlord, title="Cheap Karen", rent_price=800, location="Karen, Nairobi")
+    make_property(landlord, title="Mid Westlands", rent_price=1500, location="Westlands, Nairobi")
+    make_property(landlord, title="Let Westlands", rent_price=1600, location="Westlands, Nairobi", available=False)
+
+    assert listed(client, min_rent=1000, max_rent=1550) == {"Mid Westlands"}
+    assert listed(client, location="Westlands") == {"Mid Westlands", "Let Westlands"}
+    assert listed(client, location="Westlands", available="true") == {"Mid Westlands"}
+    assert listed(client, available="false") == {"Let Westlands"}
+
+
+def test_every_requested_amenity_must_be_included(client, make_user, make_property):
+    landlord = make_user("landlord")
+    both = make_property(landlord, title="Both")
+    make_property(landlord, title="Wifi only")
+    both.amenities.append(PropertyAmenity(amenity_name="parking"))
+    db.session.commit()
+
+    assert listed(client, amenity=["wifi", "parking"]) == {"Both"}
+    assert listed(client, amenity="wifi") == {"Both", "Wifi only"}
+
+
+def test_malformed_filters_are_bad_requests(client):
+    assert client.get("/properties?min_rent=cheap").status_code == 400
+    assert client.get("/properties?available=maybe").status_code == 400
+
+
+def test_available_between_dates_skips_blocking_bookings(client, make_user, make_property):
+    landlord, tenant = make_user("landlord"), make_user("tenant")
+    booked = make_property(landlord, title="Booked")
+    pending = make_property(landlord, title="Pending only")
+    make_property(landlord, title="Free")
+    db.session.add_all([
+        Booking(tenant_id=tenant.id, property_id=booked.id, status="approved",
+                start_date=date(2025, 7, 10), end_date=date(2025, 7, 20)),
+        Booking(tenant_id=tenant.id, property_id=pending.id, status="pending",
+                start_date=date(2025, 7, 10), end_date=date(2025, 7, 20)),
+    ])
+    db.session.commit()
+
+    everything = {"Booked", "Pending only", "Free"}
+    assert listed(client, available_from="2025-07-20", available_to="2025-07-25") == everything - {"Booked"}
+    assert listed(client, available_from="2025-07-01", available_to="2025-07-09") == everything
+    assert listed(client, available_from="2025-07-21") == everything
+    assert listed(client, available_to="2025-07-15") == everything - {"Booked"}
+
+
+def test_inverted_availability_range_is_a_bad_request(client):
+    response = client.get("/properties?available_from=2025-07-10&available_to=2025-07-01")
+    assert response.status_code == 400
+    assert client.get("/properties?available_from=July").status_code == 400
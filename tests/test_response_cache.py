@@ -0,0 +1,40 @@
+from server.utils.cache import LRUCache
+
+
+def test_listing_is_served_from_cache_until_a_write(client, queries, make_user, make_property):
+    landlord = make_user("landlord")
+    make_property(landlord)
+
+    assert client.get("/properties").headers["X-Cache"] == "MISS"
+    queries.clear()
+    hit = client.get("/properties")
+    assert hit.headers["X-Cache"] == "HIT"
+    assert not any("FROM properties" in q and "properties.title" in q for q in queries)
+
+    client.post("/properties", json={"title": "New", "description": "x", "location": "Karen",
+                                     "rent_price": 900, "landlord_id": landlord.id})
+    fresh = client.get("/properties")
+    assert fresh.headers["X-Cache"] == "MISS"
+    assert "New" in {p["title"] for p in fresh.get_json()}
+
+
+def test_query_strings_are_cached_separately(client, make_user, make_property):
+    make_property(make_user("landlord"))
+
+    client.get("/properties?limit=1")
+    assert client.get("/properties?limit=2").headers["X-Cache"] == "MISS"
+    assert client.get("/properties?limit=1").headers["X-Cache"] == "HIT"
+
+
+def test_lru_evicts_oldest_and_expires_entries(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("server.utils.cache.time.monotonic", lambda: clock[0])
+    cache = LRUCache(max_entries=2, ttl=5)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1
+
+    clock[0] += 6
+    assert cache.get("a") is None
@@ -0,0 +1,115 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from server.models import db
+from server.utils.schema import upgrade_schema
+
+# the tables as the first release created them (the columns later requests rely on)
+OLD_SCHEMA = [
+    "CREATE TABLE properties (id INTEGER PRIMARY KEY, title VARCHAR(150) NOT NULL, description TEXT NOT NULL, "
+    "rent_price NUMERIC(10, 2) NOT NULL, location VARCHAR(255) NOT NULL, image_url VARCHAR(255), "
+    "available BOOLEAN, landlord_id INTEGER NOT NULL, created_at DATETIME)",
+    "CREATE TABLE bookings (id INTEGER PRIMARY KEY, tenant_id INTEGER NOT NULL, property_id INTEGER NOT NULL, "
+    "start_date DATE NOT NULL, end_date DATE NOT NULL, status VARCHAR(20), created_at DATETIME)",
+    "CREATE TABLE favorites (user_id INTEGER NOT NULL, property_id INTEGER NOT NULL)",
+    "CREATE TABLE reviews (id INTEGER PRIMARY KEY, property_id INTEGER NOT NULL, rating INTEGER NOT NULL)",
+    "CREATE TABLE payments (id INTEGER PRIMARY KEY, booking_id INTEGER NOT NULL, tenant_id INTEGER NOT NULL, "
+    "landlord_id INTEGER NOT NULL, amount NUMERIC(10, 2) NOT NULL, payment_method VARCHAR(50) NOT NULL, "
+    "status VARCHAR(20) NOT NULL, transaction_id VARCHAR(255) NOT NULL UNIQUE, paid_at DATETIME, created_at DATETIME)",
+]
+OLD_ROWS = [
+    "INSERT INTO properties (id, title, description, rent_price, location, landlord_id, created_at) "
+    "VALUES (1, 'Old flat', 'x', 900, 'Nairobi', 1, '2024-05-01 10:00:00')",
+    "INSERT INTO bookings (tenant_id, property_id, start_date, end_date, status, created_at) "
+    "VALUES (2, 1, '2024-06-01', '2024-06-05', 'approved', '2024-05-02 09:00:00')",
+    "INSERT INTO favorites VALUES (2, 1)",
+    "INSERT INTO favorites VALUES (3, 1)",
+    "INSERT INTO reviews (property_id, rating) VALUES (1, 4)",
+    "INSERT INTO reviews (property_id, rating) VALUES (1, 5)",
+]
+
+
+def old_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        for statement in OLD_SCHEMA + OLD_ROWS:
+            conn.execute(text(statement))
+    return engine
+
+
+def test_upgrade_adds_columns_and_indexes_to_old_tables(tmp_path):
+    engine = old_database(tmp_path)
+
+    upgrade_schema(engine, db.metadata)
+    upgrade_schema(engine, db.metadata)  # a second run (another worker) is a no-op
+
+    inspector = inspect(engine)
+    columns = {c["name"] for c in inspector.get_columns("properties")}
+    assert {"latitude", "longitude", "geo_cell", "updated_at", "image_status"} <= columns
+    indexes = {i["name"] for i in inspector.get_indexes("properties")}
+    assert {"ix_properties_geo_cell", "ix_properties_updated_at"} <= indexes
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT title, geo_cell, updated_at FROM properties")).one()
+    assert tuple(row) == ("Old flat", None, "2024-05-01 10:00:00")
+
+
+def test_upgrade_backfills_counter_caches(tmp_path):
+    engine = old_database(tmp_path)
+
+    upgrade_schema(engine, db.metadata)
+
+    with engine.connect() as conn:
+        row = conn.execute(text(
+            "SELECT booking_count, favorite_count, rating_count, rating_avg FROM properties"
+        )).one()
+    assert tuple(row) == (1, 2, 2, 4.5)
+
+
+def test_upgrade_makes_idempotency_keys_unique_per_tenant(tmp_path):
+    engine = old_database(tmp_path)
+
+    upgrade_schema(engine, db.metadata)
+
+    indexes = {i["name"]: i for i in inspect(engine).get_indexes("payments")}
+    assert indexes["uq_payments_tenant_idempotency_key"]["unique"]
+    insert = text("INSERT INTO payments (booking_id, tenant_id, landlord_id, amount, payment_method, status, "
+                  "transaction_id, idempotency_key) VALUES (1, :tenant, 1, 10, 'card', 'completed', :txn, 'key-1')")
+    with engine.begin() as conn:
+        conn.execute(insert, {"tenant": 2, "txn": "TXN-1"})
+        conn.execute(insert, {"tenant": 3, "txn": "TXN-2"})
+    with pytest.raises(IntegrityError), engine.begin() as conn:
+        conn.execute(insert, {"tenant": 2, "txn": "TXN-3"})
+
+
+def test_upgrade_fills_the_occupancy_calendars(tmp_path):
+    engine = old_database(tmp_path)
+
+    db.metadata.create_all(engine)  # as at boot: new tables first, then the upgrade
+    upgrade_schema(engine, db.metadata)
+    upgrade_schema(engine, db.metadata)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT property_id, month, booked_days FROM property_occupancy")).all()
+    assert [tuple(row) for row in rows] == [(1, 202406, 0b11111)]
+
+
+def test_upgrade_fills_the_payment_rollups(tmp_path):
+    engine = old_database(tmp_path)
+    with engine.begin() as conn:
+        for amount, status, created_at in [(100, "completed", "2024-06-02 10:00:00"),
+                                           (50.5, "completed", "2024-06-20 10:00:00"),
+                                           (30, "refunded", "2024-07-01 10:00:00")]:
+            conn.execute(text(
+                "INSERT INTO payments (booking_id, tenant_id, landlord_id, amount, payment_method, status, "
+                "transaction_id, created_at) VALUES (1, 2, 1, :amount, 'card', :status, :txn, :created_at)"
+            ), {"amount": amount, "status": status, "txn": f"TXN-{created_at}", "created_at": created_at})
+
+    db.metadata.create_all(engine)
+    upgrade_schema(engine, db.metadata)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT landlord_id, month, status, amount, count FROM payment_rollups ORDER BY month"
+        )).all()
+    assert [tuple(row) for row in rows] == [(1, 202406, "completed", 150.5, 2), (1, 202407, "refunded", 30, 1)]
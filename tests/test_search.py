@@ -0,0 +1,49 @@
+def create(client, landlord, title, description="A flat", location="Nairobi"):
+    response = client.post("/properties", json={
+        "title": title, "description": description, "location": location,
+        "rent_price": 1000, "landlord_id": landlord.id,
+    })
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+
+def search(client, q, **params):
+    response = client.get("/properties/search", query_string={"q": q, **params})
+    assert response.status_code == 200
+    return [p["id"] for p in response.get_json()], response
+
+
+def test_title_hits_rank_above_description_hits(client, make_user):
+    landlord = make_user("landlord")
+    in_description = create(client, landlord, "Studio", description="Sunny balcony with garden view")
+    in_title = create(client, landlord, "Garden cottage")
+    create(client, landlord, "Penthouse")
+
+    ids, _ = search(client, "garden")
+
+    assert ids == [in_title, in_description]
+
+
+def test_index_follows_updates_and_deletes(client, make_user):
+    landlord = make_user("landlord")
+    property_id = create(client, landlord, "Loft")
+
+    client.put(f"/properties/{property_id}", json={"title": "Riverside loft"})
+    assert search(client, "riverside")[0] == [property_id]
+
+    client.delete(f"/properties/{property_id}")
+    assert search(client, "riverside")[0] == []
+
+
+def test_search_pages_with_a_cursor(client, make_user):
+    landlord = make_user("landlord")
+    created = {create(client, landlord, f"Garden flat {i}") for i in range(3)}
+
+    first, response = search(client, "garden", limit=2)
+    second, _ = search(client, "garden", limit=2, after=response.headers["X-Next-Cursor"])
+
+    assert len(first) == 2 and set(first + second) == created
+
+
+def test_query_is_required(client):
+    assert client.get("/properties/search").status_code == 400
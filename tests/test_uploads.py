@@ -0,0 +1,93 @@
+import io
+import os
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.datastructures import FileStorage
+
+from server.app import app, image_uploads
+from server.models import db, ImageUpload, Property, UploadedAsset
+from server.utils.uploads import discard_spool, spool
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+def wait_for(client, upload_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        upload = client.get(f"/uploads/{upload_id}").get_json()
+        if upload["status"] != "processing" or time.monotonic() > deadline:
+            return upload
+        time.sleep(0.01)
+
+
+def test_upload_is_accepted_at_once_and_finished_in_the_background(client):
+    uploads_before = len(image_uploads.uploader.uploads)
+
+    response = client.post("/upload", data={"file": (io.BytesIO(PNG), "photo.png")})
+
+    assert response.status_code == 202
+    upload = wait_for(client, response.get_json()["id"])
+    assert upload["status"] == "ready" and upload["url"].endswith(".png")
+    assert len(image_uploads.uploader.uploads) == uploads_before + 1
+
+    # the same bytes again are answered from the asset table without another transfer
+    again = client.post("/upload", data={"file": (io.BytesIO(PNG), "copy.png")})
+    assert again.status_code == 200 and again.get_json()["url"] == upload["url"]
+    assert len(image_uploads.uploader.uploads) == uploads_before + 1
+    assert UploadedAsset.query.count() == 1
+
+
+def test_new_property_image_status_follows_its_upload(client, make_user):
+    landlord = make_user("landlord")
+
+    response = client.post("/properties", data={
+        "title": "Loft", "description": "Bright", "location": "Kilimani", "rent_price": "1200",
+        "landlord_id": str(landlord.id), "image": (io.BytesIO(PNG + b"loft"), "loft.png"),
+    })
+
+    created = response.get_json()
+    assert response.status_code == 201 and created["image_status"] == "processing"
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        db.session.expire_all()
+        prop = db.session.get(Property, created["id"])
+        if prop.image_status != "processing":
+            break
+        time.sleep(0.01)
+    assert prop.image_status == "ready" and prop.image_url.endswith(".png")
+
+
+def test_identical_uploads_get_their_own_spool_files():
+    spool_dir = app.config["IMAGE_SPOOL_DIR"]
+    first, first_hash = spool(FileStorage(io.BytesIO(PNG), "a.png"), spool_dir)
+    second, second_hash = spool(FileStorage(io.BytesIO(PNG), "b.png"), spool_dir)
+
+    assert first != second and first_hash == second_hash
+    discard_spool(first)
+    assert not os.path.exists(first)
+    with open(second, "rb") as f:
+        assert f.read() == PNG
+    discard_spool(second)
+
+
+def test_stale_uploads_are_resubmitted_once(client):
+    path, sha256 = spool(FileStorage(io.BytesIO(PNG + b"stale"), "stale.png"), app.config["IMAGE_SPOOL_DIR"])
+    upload = ImageUpload(sha256=sha256, spool_path=path, attempts=1,
+                         created_at=datetime.utcnow() - timedelta(hours=1))
+    fresh_path, _ = spool(FileStorage(io.BytesIO(PNG + b"stale"), "fresh.png"), app.config["IMAGE_SPOOL_DIR"])
+    fresh = ImageUpload(sha256=sha256, spool_path=fresh_path, created_at=datetime.utcnow())
+    db.session.add_all([upload, fresh])
+    db.session.commit()
+    upload_id, fresh_id = upload.id, fresh.id
+    db.session.close()
+
+    assert image_uploads.recover() == [upload_id]
+    finished = wait_for(client, upload_id)
+    assert finished["status"] == "ready"
+    assert db.session.get(ImageUpload, upload_id).attempts == 2
+    assert image_uploads.recover() == []
+    # the fresh one may still be in flight on another worker, and its file is untouched
+    assert wait_for(client, fresh_id, timeout=0)["status"] == "processing"
+    assert os.path.exists(fresh_path) and not os.path.exists(path)
+    discard_spool(fresh_path)
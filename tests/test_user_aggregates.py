@@ -0,0 +1,43 @@
+from datetime import date, datetime
+
+from server.models import db, Booking, Payment
+
+
+def add_completed_payment(tenant, prop, amount):
+    booking = Booking(tenant_id=tenant.id, property_id=prop.id, start_date=date(2025, 1, 1),
+                      end_date=date(2025, 1, 2), status="active")
+    db.session.add(booking)
+    db.session.flush()
+    db.session.add(Payment(booking_id=booking.id, tenant_id=tenant.id, landlord_id=prop.landlord_id, amount=amount,
+                           payment_method="card", transaction_id=f"TXN-{booking.id}", status="completed",
+                           paid_at=datetime(2025, 1, 1)))
+    db.session.commit()
+
+
+def test_admin_users_query_count_does_not_grow_with_users(client, queries, make_user, make_property):
+    def count_for_page():
+        queries.clear()
+        assert client.get("/admin/users").status_code == 200
+        return len(queries)
+
+    landlord = make_user("landlord")
+    make_property(landlord)
+    small = count_for_page()
+    for _ in range(10):
+        make_property(make_user("landlord"))
+        make_user("tenant")
+    assert count_for_page() == small
+
+
+def test_admin_users_carry_ids_and_landlord_income(client, make_user, make_property):
+    landlord, tenant = make_user("landlord"), make_user("tenant")
+    prop = make_property(landlord)
+    add_completed_payment(tenant, prop, 1200)
+    add_completed_payment(tenant, prop, 300)
+
+    users = {u["id"]: u for u in client.get("/admin/users").get_json()}
+
+    assert users[landlord.id]["properties"] == [prop.id]
+    assert users[landlord.id]["total_income"] == 1500.0
+    assert users[tenant.id]["total_income"] is None
+    assert len(users[tenant.id]["bookings"]) == 2